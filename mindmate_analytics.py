@@ -0,0 +1,56 @@
+# mindmate_analytics.py — analitika po korisniku: figure iz dnevnih/nedeljnih/mesečnih zbirova (mindmate_rollup)
+import numpy as np
+import plotly.graph_objects as go
+
+LAYOUT = dict(paper_bgcolor="#0B0D12", plot_bgcolor="#11141C", font_color="#E8EAEE",
+              margin=dict(l=10,r=10,t=50,b=10))
+
+GRAIN_LABEL = {"day": "danu", "week": "nedelji", "month": "mesecu"}
+PART_LABEL = {"phq1": "Gubitak interesovanja", "phq2": "Potištenost", "gad1": "Nervoza", "gad2": "Briga"}
+
+def rollup_figures(grain, rows, hours):
+    # rows: kofe iz mindmate_rollup (prosek/min/max po danu, nedelji ili mesecu) — najviše ~100 tačaka
+    x = [r["bucket"] for r in rows]
+    mean = np.array([r["mean"] for r in rows])
+    per = GRAIN_LABEL[grain]
+    mode = "lines+markers" if len(rows) <= 120 else "lines"
+    fig1 = go.Figure([
+        go.Scatter(x=x, y=[r["max"] for r in rows], mode="lines", line=dict(width=0), hoverinfo="skip", showlegend=False),
+        go.Scatter(x=x, y=[r["min"] for r in rows], mode="lines", line=dict(width=0), fill="tonexty",
+                   fillcolor="rgba(124,92,255,.18)", name="min–max", hoverinfo="skip"),
+        go.Scatter(x=x, y=mean, mode=mode, name="Prosek", customdata=[r["n"] for r in rows],
+                   hovertemplate="%{x}<br>prosek %{y:.1f} · check-in-a: %{customdata}<extra></extra>")])
+    fig1.update_layout(title=f"Ukupan skor (PHQ2+GAD2) — prosek po {per}", xaxis_title="Datum", yaxis_title="Skor (0–12)",
+                       showlegend=False, **LAYOUT)
+    mood = np.clip(95 - mean*4, 40, 100)
+    prod = np.clip(92 - mean*3 + (np.arange(len(rows)) % 3 == 0)*2, 35, 100)
+    fig2 = go.Figure([go.Scatter(x=x, y=prod, mode=mode, name="Produktivnost"), go.Scatter(x=x, y=mood, mode=mode, name="Raspoloženje")])
+    fig2.update_layout(title="Raspoloženje & Produktivnost", xaxis_title="Datum", yaxis_title="Skor (0–100)", **LAYOUT)
+    fig3 = go.Figure([go.Scatter(x=x, y=[r[k] for r in rows], mode=mode, name=label) for k, label in PART_LABEL.items()])
+    fig3.update_layout(title=f"Pitanja pojedinačno — prosek po {per}", xaxis_title="Datum", yaxis_title="Odgovor (0–3)",
+                       yaxis_range=[0, 3], **LAYOUT)
+    figs = [fig1, fig2, fig3]
+    if any(hours):
+        fig4 = go.Figure(go.Bar(x=list(range(24)), y=hours))
+        fig4.update_layout(title="Vreme dana kada radiš check-in", xaxis_title="Sat u danu", yaxis_title="Broj check-in-a",
+                           bargap=0.05, **LAYOUT)
+        figs.append(fig4)
+    return figs
+
+# ---------- Admin: angažovanje svih korisnika (mindmate_engagement) ----------
+def engagement_figures(dau, cohorts, summary):
+    labels, counts = dau
+    fig1 = go.Figure(go.Bar(x=labels, y=counts))
+    fig1.update_layout(title="Dnevno aktivni korisnici (DAU)", xaxis_title="Datum", yaxis_title="Korisnika", **LAYOUT)
+    weeks, sizes, frac = cohorts
+    z = np.array(frac, dtype="float64")*100
+    fig2 = go.Figure(go.Heatmap(z=z, x=[f"N{i}" for i in range(len(weeks))], y=[f"{w} ({n})" for w, n in zip(weeks, sizes)],
+                                colorscale="Teal", zmin=0, zmax=100, hoverongaps=False,
+                                text=np.where(np.isnan(z), "", np.round(z).astype(str)), texttemplate="%{text}"))
+    fig2.update_layout(title="Nedeljne kohorte: % aktivnih N nedelja posle prve aktivnosti", yaxis_autorange="reversed", **LAYOUT)
+    fig3 = go.Figure(go.Bar(x=list(range(13)), y=summary["score_hist"]))
+    fig3.update_layout(title="Raspodela skorova check-in-a (30 dana)", xaxis_title="PHQ2+GAD2", yaxis_title="Check-in-a",
+                       bargap=0.05, **LAYOUT)
+    fig4 = go.Figure(go.Bar(x=["1", "2–3", "4–7", "8–14", "15–30", "31+"], y=summary["streak_hist"]))
+    fig4.update_layout(title="Aktivni streak-ovi (dana zaredom)", xaxis_title="Dužina", yaxis_title="Korisnika", **LAYOUT)
+    return [fig1, fig2, fig3, fig4]
@@ -0,0 +1,299 @@
+# mindmate_archive.py — arhiva starih chat_events: mesečni gzip segmenti + mali indeks po segmentu
+#   python mindmate_archive.py archive [--days 90] [--vacuum]   — prebaci starije od N dana iz vruće baze
+#   python mindmate_archive.py compact                           — spoji blokove po uid-u u svakom segmentu
+#   python mindmate_archive.py stats | history UID [--since ISO] [--until ISO]
+# Raspored (za MINDMATE_DB=mindmate_db.json → mindmate_db.archive/):
+#   chat_events-2025-01.<gen>.ndjson.gz — niz nezavisnih gzip članova, jedan član = zapisi jednog uid-a (sortirano po ts)
+#   chat_events-2025-01.idx.json        — {"gen", "size", "count", "roles", "ts_min", "ts_max",
+#                                          "uids": {uid: [[off, len, n, ts_min, ts_max], …]}}
+#   manifest.json                       — {"pending": ISO | null}: krug arhiviranja koji nije stigao do brisanja
+# Redosled: manifest(pending) → blokovi (append + fsync) → indeks (atomski) → brisanje iz vruće baze → manifest(null).
+# Pad posle upisa bloka a pre indeksa: višak na kraju segmenta se odseca pri sledećem upisu.
+# Pad pre brisanja: sledeći krug dopisuje samo zapise kojih još nema u segmentima, pa briše.
+# Kompakcija segmenta piše novu generaciju; indeks se prebacuje atomski, pa se stara briše.
+# Više procesa (npr. više app instanci sa rasporedom + CLI): krug arhiviranja i kompakcija idu pod
+# <arhiva>/.lock (StoreLock), a indeks se pod zaključavanjem čita iznova (keš po mtime+inode).
+import os, sys, gzip, json, time, argparse, threading
+from datetime import datetime, timedelta
+from mindmate_store import StoreLock, atomic_write_json, parse_db_url
+from mindmate_telemetry import span, observe, inc
+
+ARCHIVE_DAYS    = int(os.environ.get("MINDMATE_ARCHIVE_DAYS", "90"))
+ARCHIVE_DIR     = os.environ.get("MINDMATE_ARCHIVE_DIR", "")
+ARCHIVE_EVERY_H = float(os.environ.get("MINDMATE_ARCHIVE_EVERY_H", "0"))   # 0 = bez pozadinskog rasporeda
+COLL = "chat_events"
+
+def archive_dir_for(db_url):
+    if ARCHIVE_DIR: return ARCHIVE_DIR
+    _, path = parse_db_url(db_url)
+    return os.path.splitext(path)[0] + ".archive"
+
+def _month(ts): return (ts or "")[:7] or "0000-00"
+
+def _block(recs):
+    # jedan gzip član: NDJSON zapisi jednog uid-a sortirani po ts → (bajtovi, ts_min, ts_max)
+    recs.sort(key=lambda r: r.get("ts", ""))
+    data = gzip.compress("".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                 for r in recs).encode("utf-8"), mtime=0)
+    return data, recs[0].get("ts", ""), recs[-1].get("ts", "")
+
+def _by_uid(rows):
+    out = {}
+    for r in rows: out.setdefault(r.get("uid", ""), []).append(r)
+    return sorted(out.items())
+
+class ChatArchive:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.RLock()
+        self._idx = {}   # mesec → ((mtime_ns, inode), indeks)
+        self._flock = None
+
+    def locked(self):
+        # zaključavanje između procesa (i niti); ugnežđivanje u istoj niti je dozvoljeno
+        with self._lock:
+            if self._flock is None:
+                os.makedirs(self.root, exist_ok=True)
+                self._flock = StoreLock(os.path.join(self.root, ".lock"))
+            return self._flock
+
+    def _seg(self, month, gen): return os.path.join(self.root, f"{COLL}-{month}.{gen}.ndjson.gz")
+    def _idx_path(self, month): return os.path.join(self.root, f"{COLL}-{month}.idx.json")
+
+    def months(self):
+        if not os.path.isdir(self.root): return []
+        pre, suf = f"{COLL}-", ".idx.json"
+        return sorted(n[len(pre):-len(suf)] for n in os.listdir(self.root) if n.startswith(pre) and n.endswith(suf))
+
+    def index(self, month):
+        p = self._idx_path(month)
+        try: st = os.stat(p)
+        except OSError: return None
+        key = (st.st_mtime_ns, st.st_ino)   # atomski upis drugog procesa → novi inode i kad se mtime poklopi
+        with self._lock:
+            hit = self._idx.get(month)
+            if hit and hit[0] == key: return hit[1]
+            with open(p, encoding="utf-8") as f: idx = json.load(f)
+            self._idx[month] = (key, idx)
+            return idx
+
+    def _write_index(self, month, idx):
+        atomic_write_json(self._idx_path(month), idx)
+        self._idx.pop(month, None)
+
+    @staticmethod
+    def _empty(gen=0): return {"gen": gen, "size": 0, "count": 0, "roles": {}, "ts_min": None, "ts_max": None, "uids": {}}
+
+    def pending(self):
+        try:
+            with open(os.path.join(self.root, "manifest.json"), encoding="utf-8") as f:
+                return json.load(f).get("pending")
+        except FileNotFoundError:
+            return None
+
+    def _set_pending(self, cutoff):
+        os.makedirs(self.root, exist_ok=True)
+        atomic_write_json(os.path.join(self.root, "manifest.json"), {"pending": cutoff})
+
+    def _missing(self, rows):
+        # oporavak posle pada: samo zapisi kojih nema u segmentima (ključ uid+ts+uloga+sadržaj)
+        key = lambda r: (r.get("uid", ""), r.get("ts", ""), r.get("role", ""), r.get("content", ""))
+        seen = set()
+        for m in {_month(r.get("ts")) for r in rows}:
+            idx = self.index(m)
+            if idx:
+                for blocks in idx["uids"].values(): seen.update(map(key, self._read_blocks(m, idx["gen"], blocks)))
+        return [r for r in rows if key(r) not in seen]
+
+    # --- upis ---
+    def _append_month(self, month, rows):
+        self._idx.pop(month, None)   # pod zaključavanjem: indeks uvek sa diska
+        idx = self.index(month) or self._empty()
+        off = start = idx["size"]
+        with open(self._seg(month, idx["gen"]), "ab") as f:
+            f.truncate(start)   # nedovršen rep prethodnog pokušaja (blok upisan, indeks nije)
+            for uid, recs in _by_uid(rows):
+                data, lo, hi = _block(recs)
+                f.write(data)
+                idx["uids"].setdefault(uid, []).append([off, len(data), len(recs), lo, hi])
+                off += len(data)
+                if lo: idx["ts_min"] = min(idx["ts_min"] or lo, lo)
+                if hi: idx["ts_max"] = max(idx["ts_max"] or hi, hi)
+            f.flush(); os.fsync(f.fileno())
+        for r in rows:
+            role = r.get("role", "")
+            idx["roles"][role] = idx["roles"].get(role, 0) + 1
+        idx["size"], idx["count"] = off, idx["count"] + len(rows)
+        self._write_index(month, idx)
+        observe("mindmate_db_write_bytes", off-start, backend="archive", op="append")
+        # mnogo malih blokova po uid-u (česta arhiviranja) → prepiši segment spojeno
+        if sum(len(v) for v in idx["uids"].values()) > 2*len(idx["uids"]): self.compact_month(month)
+
+    def add(self, rows):
+        months = {}
+        for r in rows: months.setdefault(_month(r.get("ts")), []).append(r)
+        with self.locked():
+            for month, recs in sorted(months.items()): self._append_month(month, recs)
+        return {m: len(v) for m, v in months.items()}
+
+    def compact_month(self, month):
+        # jedan blok po uid-u u novoj generaciji segmenta; indeks se prebacuje atomski, stara generacija se briše
+        with self.locked():
+            self._idx.pop(month, None)
+            idx = self.index(month)
+            if not idx: return
+            rows = [r for blocks in idx["uids"].values() for r in self._read_blocks(month, idx["gen"], blocks)]
+            new = self._empty(idx["gen"] + 1)
+            new.update(count=idx["count"], roles=idx["roles"], ts_min=idx["ts_min"], ts_max=idx["ts_max"])
+            off = 0
+            with open(self._seg(month, new["gen"]), "wb") as f:
+                for uid, recs in _by_uid(rows):
+                    data, lo, hi = _block(recs)
+                    f.write(data)
+                    new["uids"][uid] = [[off, len(data), len(recs), lo, hi]]
+                    off += len(data)
+                f.flush(); os.fsync(f.fileno())
+            new["size"] = off
+            self._write_index(month, new)
+            self._drop_stale(month, new["gen"])
+
+    def _drop_stale(self, month, gen):
+        # ostale generacije segmenta (prekinuta kompakcija ili stari fajl posle nje)
+        keep = os.path.basename(self._seg(month, gen))
+        pre = f"{COLL}-{month}."
+        for n in os.listdir(self.root):
+            if n.startswith(pre) and n.endswith(".ndjson.gz") and n != keep:
+                try: os.remove(os.path.join(self.root, n))
+                except OSError: pass
+
+    def compact(self):
+        for m in self.months(): self.compact_month(m)
+
+    # --- čitanje ---
+    def _read_blocks(self, month, gen, blocks, since=None, until=None):
+        out = []
+        with open(self._seg(month, gen), "rb") as f:
+            for off, length, _, lo, hi in blocks:
+                if (since and hi < since) or (until and lo >= until): continue
+                f.seek(off)
+                for line in gzip.decompress(f.read(length)).splitlines():
+                    r = json.loads(line)
+                    ts = r.get("ts", "")
+                    if (since is None or ts >= since) and (until is None or ts < until): out.append(r)
+        return out
+
+    def iter_history(self, uid, since=None, until=None):
+        # čita samo segmente čiji mesec seče [since, until) i samo blokove tog uid-a; mesec po mesec
+        # (meseci su disjunktni → niz je sortiran po ts, a u memoriji je najviše jedan mesec)
+        for m in self.months():
+            if (since and m < since[:7]) or (until and m > until[:7]): continue
+            idx = self.index(m) or {}
+            blocks = idx.get("uids", {}).get(uid)
+            if blocks: yield from sorted(self._read_blocks(m, idx["gen"], blocks, since, until), key=lambda r: r.get("ts", ""))
+
+    def history(self, uid, since=None, until=None): return list(self.iter_history(uid, since, until))
+
+    def iter_all(self):
+        # svi zapisi arhive (npr. pun izvoz), segment po segment i uid po uid — u memoriji je jedan blok
+        for m in self.months():
+            idx = self.index(m) or {}
+            for uid, blocks in sorted(idx.get("uids", {}).items()): yield from self._read_blocks(m, idx["gen"], blocks)
+
+    def page(self, uid, before=None, limit=50):
+        # najnovijih `limit` zapisa sa ts < before; meseci se čitaju unazad dok se stranica ne popuni
+        out = []
+        for m in reversed(self.months()):
+            if before and m > before[:7]: continue
+            idx = self.index(m) or {}
+            blocks = idx.get("uids", {}).get(uid)
+            if blocks: out = self._read_blocks(m, idx["gen"], blocks, None, before) + out
+            if len(out) >= limit: break
+        out.sort(key=lambda r: r.get("ts", ""))
+        return out[-limit:] if limit else []
+
+    def totals(self):
+        # (uid-ovi, poruke po ulozi) — za landing agregat posle restarta
+        uids, roles = set(), {}
+        for m in self.months():
+            idx = self.index(m) or {}
+            uids.update(u for u in idx.get("uids", {}) if u)
+            for k, v in idx.get("roles", {}).items(): roles[k] = roles.get(k, 0) + v
+        return uids, roles
+
+    def stats(self):
+        out = []
+        for m in self.months():
+            idx = self.index(m) or self._empty()
+            out.append({"month": m, "count": idx["count"], "bytes": idx["size"], "uids": len(idx["uids"]),
+                        "blocks": sum(len(v) for v in idx["uids"].values())})
+        return out
+
+def archive_before(db, archive, cutoff):
+    # cutoff: ISO string; → (arhivirano, obrisano iz vruće baze)
+    # ceo krug pod zaključavanjem arhive: drugi proces ne arhivira iste zapise dvaput
+    with span("mindmate_archive_seconds"), archive.locked():
+        added = removed = 0
+        prev = archive.pending()
+        if prev:   # prethodni krug je pao između upisa u segmente i brisanja
+            rows = archive._missing(db.records_before(COLL, prev))
+            if rows: archive.add(rows)
+            added, removed = len(rows), db.delete_before(COLL, prev)
+        old = db.records_before(COLL, cutoff)
+        if old:
+            archive._set_pending(cutoff)
+            archive.add(old)
+            added += len(old); removed += db.delete_before(COLL, cutoff)
+        if prev or old: archive._set_pending(None)
+    return added, removed
+
+def cutoff_for(days=ARCHIVE_DAYS):
+    return (datetime.utcnow() - timedelta(days=days)).isoformat()
+
+def start_scheduler(get_db, archive, every_h=ARCHIVE_EVERY_H, days=ARCHIVE_DAYS):
+    # pozadinska nit u procesu aplikacije; prvi krug posle every_h (ne usporava start)
+    if every_h <= 0: return None
+    def loop():
+        while True:
+            time.sleep(every_h*3600)
+            try: archive_before(get_db(), archive, cutoff_for(days))
+            except Exception as e:
+                inc("mindmate_db_errors_total", backend="archive", op="archive")
+                sys.stderr.write(f"mindmate: arhiviranje nije uspelo: {e}\n")
+    t = threading.Thread(target=loop, name="mindmate-archiver", daemon=True)
+    t.start()
+    return t
+
+def main(argv=None):
+    import mindmate_core as core
+    ap = argparse.ArgumentParser(description="MindMate arhiva chat_events")
+    ap.add_argument("--db", default=None, help="URL baze (podrazumevano MINDMATE_DB)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    a_ = sub.add_parser("archive", help="prebaci stare chat_events u mesečne segmente")
+    a_.add_argument("--days", type=int, default=ARCHIVE_DAYS)
+    a_.add_argument("--vacuum", action="store_true", help="SQLite: VACUUM posle brisanja")
+    sub.add_parser("compact", help="spoji blokove po uid-u u svakom segmentu")
+    sub.add_parser("stats", help="pregled segmenata")
+    h = sub.add_parser("history", help="istorija jednog uid-a iz arhive (NDJSON)")
+    h.add_argument("uid"); h.add_argument("--since"); h.add_argument("--until")
+    a = ap.parse_args(argv)
+
+    url = a.db or core.DB_PATH
+    archive = ChatArchive(archive_dir_for(url))
+    if a.cmd == "archive":
+        db = core.open_app_db(url)
+        try:
+            n, removed = archive_before(db, archive, cutoff_for(a.days))
+            if a.vacuum and hasattr(db, "vacuum"): db.vacuum()
+        finally:
+            db.close()
+        print(f"arhivirano {n}, uklonjeno iz vruće baze {removed} (starije od {a.days} dana) → {archive.root}")
+    elif a.cmd == "compact":
+        archive.compact()
+    elif a.cmd == "stats":
+        for s in archive.stats(): print(f"{s['month']}  {s['count']:>9} zapisa  {s['bytes']:>11} B  {s['uids']:>6} uid  {s['blocks']:>6} blokova")
+    elif a.cmd == "history":
+        for r in archive.iter_history(a.uid, a.since, a.until): sys.stdout.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# mindmate_auth.py — heširanje lozinki (scrypt / PBKDF2, podesiva cena) + provera u malom pool-u niti
+import os, hmac, base64, hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD_SCHEME   = os.environ.get("MINDMATE_PASSWORD_SCHEME", "scrypt").lower().strip()
+SCRYPT_N          = int(os.environ.get("MINDMATE_SCRYPT_N", str(2**14)))
+SCRYPT_R          = int(os.environ.get("MINDMATE_SCRYPT_R", "8"))
+SCRYPT_P          = int(os.environ.get("MINDMATE_SCRYPT_P", "1"))
+PBKDF2_ITERATIONS = int(os.environ.get("MINDMATE_PBKDF2_ITERATIONS", "600000"))
+AUTH_WORKERS      = int(os.environ.get("MINDMATE_AUTH_WORKERS", "2"))
+AUTH_TIMEOUT_S    = 30
+
+if PASSWORD_SCHEME == "scrypt" and not hasattr(hashlib, "scrypt"):
+    PASSWORD_SCHEME = "pbkdf2_sha256"   # Python bez OpenSSL scrypt-a
+
+def _b64(b): return base64.b64encode(b).decode("ascii")
+def _unb64(s): return base64.b64decode(s.encode("ascii"))
+
+def _scrypt(pw, salt, n, r, p):
+    return hashlib.scrypt(pw.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256*r*n + (1 << 20), dklen=32)
+
+def _pbkdf2(pw, salt, iters):
+    return hashlib.pbkdf2_hmac("sha256", pw.encode("utf-8"), salt, iters, dklen=32)
+
+# Format: scrypt$n$r$p$salt$hash | pbkdf2_sha256$iter$salt$hash; sve ostalo je legacy plaintext
+def hash_password(pw):
+    salt = os.urandom(16)
+    if PASSWORD_SCHEME == "scrypt":
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(_scrypt(pw, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P))}"
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(_pbkdf2(pw, salt, PBKDF2_ITERATIONS))}"
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(("scrypt$", "pbkdf2_sha256$"))
+
+def verify_password(pw, stored):
+    # → (ispravna, treba_rehash): rehash za plaintext zapise i za hash sa zastarelom cenom
+    stored = stored or ""
+    try:
+        if stored.startswith("scrypt$"):
+            _, n, r, p, salt, h = stored.split("$")
+            ok = hmac.compare_digest(_scrypt(pw, _unb64(salt), int(n), int(r), int(p)), _unb64(h))
+            stale = PASSWORD_SCHEME != "scrypt" or (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+            return ok, ok and stale
+        if stored.startswith("pbkdf2_sha256$"):
+            _, iters, salt, h = stored.split("$")
+            ok = hmac.compare_digest(_pbkdf2(pw, _unb64(salt), int(iters)), _unb64(h))
+            stale = PASSWORD_SCHEME != "pbkdf2_sha256" or int(iters) != PBKDF2_ITERATIONS
+            return ok, ok and stale
+    except (ValueError, TypeError):
+        return False, False
+    ok = hmac.compare_digest(pw.encode("utf-8"), stored.encode("utf-8"))
+    return ok, ok
+
+# hashlib oslobađa GIL tokom KDF-a; pool ograničava koliko CPU-a talas prijava može da zauzme
+_POOL = ThreadPoolExecutor(max_workers=max(AUTH_WORKERS, 1), thread_name_prefix="mindmate-auth")
+_DUMMY = None
+
+def verify_in_pool(pw, stored):
+    return _POOL.submit(verify_password, pw, stored).result(timeout=AUTH_TIMEOUT_S)
+
+def hash_in_pool(pw):
+    return _POOL.submit(hash_password, pw).result(timeout=AUTH_TIMEOUT_S)
+
+def burn_dummy(pw):
+    # nepostojeći nalog košta isto kao pogrešna lozinka (nema otkrivanja naloga po vremenu)
+    global _DUMMY
+    if _DUMMY is None: _DUMMY = hash_password("mindmate-dummy")
+    verify_in_pool(pw, _DUMMY)
@@ -0,0 +1,180 @@
+# mindmate_bench.py — generator sintetičkih podataka + mikrobenchmark za sloj podataka i metrika
+#   python mindmate_bench.py gen --users 100 --checkins-per-user 300 --chats-per-user 700 --out mindmate_db.json
+#   python mindmate_bench.py run --tiers 1k,100k,1m --storage json,journal,sqlite --out bench.json
+#   python mindmate_bench.py run --tiers 1k --baseline bench_prev.json     # izlaz 1 ako je nešto sporije
+import os, sys, json, time, random, shutil, argparse, platform, tempfile, statistics, tracemalloc
+from datetime import datetime, timedelta
+
+TIERS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+WORDS = ("danas sam bio umoran nervozan srećan spavao loše dobro posao škola porodica trening šetnja "
+         "disanje fokus anksioznost tuga motivacija pauza plan cilj mali korak hvala pomoć razgovor").split()
+
+# ---------- Generator ----------
+def _text(rng, lo, hi): return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+def generate(path, users, checkins_per_user, chats_per_user, days=365, seed=7):
+    # piše legacy JSON raspored zapis po zapis (bez celog dict-a u memoriji)
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    uids = [f"user_bench{u:06d}" for u in range(users)]
+    def checkins():
+        for uid in uids:
+            for _ in range(checkins_per_user):
+                t = now - timedelta(days=rng.randint(0, days-1), hours=rng.randint(0, 23), minutes=rng.randint(0, 59))
+                yield {"uid": uid, "ts": t.isoformat(), "date": t.date().isoformat(),
+                       "phq1": rng.choice((0,0,1,1,2,3)), "phq2": rng.choice((0,0,1,1,2,3)),
+                       "gad1": rng.choice((0,1,1,2,3)), "gad2": rng.choice((0,1,1,2,3)),
+                       "notes": _text(rng, 0, 12) if rng.random() < .4 else ""}
+    def chats():
+        for uid in uids:
+            t = now - timedelta(days=days)
+            for i in range(chats_per_user):
+                t += timedelta(seconds=rng.randint(20, 86400*days//max(chats_per_user, 1)))
+                user = i % 2 == 0
+                yield {"uid": uid, "ts": t.isoformat(), "role": "user" if user else "assistant",
+                       "content": _text(rng, 3, 20) if user else _text(rng, 20, 60)}
+    def accounts():
+        for u in range(users):
+            yield {"email": f"bench{u:06d}@example.com", "password": "bench", "created": now.isoformat()}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for k, (name, gen) in enumerate((("checkins", checkins), ("chat_events", chats), ("users", accounts))):
+            f.write(("," if k else "") + json.dumps(name) + ":[")
+            for i, rec in enumerate(gen()):
+                f.write(("," if i else "") + json.dumps(rec, ensure_ascii=False))
+            f.write("]")
+        f.write("}")
+    return users*(checkins_per_user+chats_per_user)
+
+def tier_shape(total):
+    # ~1000 zapisa po korisniku (30% check-in, 70% chat), najmanje 10 korisnika
+    users = max(10, total//1000)
+    per = max(1, total//users)
+    return users, max(1, per*3//10), max(1, per - per*3//10)
+
+# ---------- Merenje ----------
+def _measure(fn, reps, warmup=1):
+    for _ in range(warmup): fn()
+    times = []
+    for _ in range(reps):
+        t = time.perf_counter(); fn(); times.append((time.perf_counter()-t)*1000)
+    tracemalloc.start()
+    try:
+        fn(); _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"reps": reps, "min_ms": round(min(times), 4), "median_ms": round(statistics.median(times), 4),
+            "mean_ms": round(statistics.fmean(times), 4), "peak_kb": round(peak/1024, 1)}
+
+def run_tier(tier, storage, workdir, reps):
+    import mindmate_core as core, mindmate_store as ms
+    from mindmate_metrics import MetricsAggregator
+    from mindmate_engagement import EngagementEngine
+    from mindmate_rollup import CheckinRollups
+    total = TIERS[tier]
+    users, cpu, epu = tier_shape(total)
+    src = os.path.join(workdir, f"gen_{tier}.json")
+    if not os.path.exists(src): generate(src, users, cpu, epu)
+    dbdir = os.path.join(workdir, f"{tier}_{storage}"); os.makedirs(dbdir, exist_ok=True)
+    if storage == "sqlite":
+        path = os.path.join(dbdir, "db.sqlite")
+        if not os.path.exists(path): ms.migrate_to_sqlite(src, path)
+        url = f"sqlite:///{path}"
+    else:
+        path = os.path.join(dbdir, "db.json"); shutil.copyfile(src, path)
+        url = f"{storage}://{path}"
+    res = []
+    def add(name, r, **extra): res.append({"tier": tier, "records": total, "storage": storage, "bench": name, **r, **extra})
+    heavy = reps if total < 1_000_000 else max(1, reps//5)
+
+    if storage != "sqlite":
+        store = ms.open_store(path, storage)
+        add("_init_db", _measure(lambda: core._init_db(store), heavy))
+    add("open_app_db", _measure(lambda: core.open_app_db(url), max(1, heavy//2)))
+    db = core._get_db()
+    add("metrics_rebuild", _measure(lambda: MetricsAggregator.from_db(db), heavy))
+    add("engagement_build", _measure(lambda: EngagementEngine.from_db(db), heavy))
+    eng = EngagementEngine.from_db(db)
+    def uncached(fn): return lambda: (eng._cache.clear(), fn())
+    add("engagement_summary", _measure(uncached(eng.summary), reps*4))
+    add("engagement_cohorts", _measure(uncached(eng.cohorts), reps*4))
+    add("engagement_summary_cached", _measure(eng.summary, reps*20))
+    add("compute_metrics", _measure(core.compute_metrics, reps*20))
+    add("compute_trend_series", _measure(core.compute_trend_series, reps*20))
+    uid = "user_bench000000"
+    add("rollup_build", _measure(lambda: CheckinRollups().build(db.iter_records("checkins")), heavy))
+    add("checkin_rollup_year", _measure(lambda: core.checkin_rollup(uid, 365), reps*20))
+    add("checkin_rollup_all", _measure(lambda: core.checkin_rollup(uid), reps*20), rows=cpu)
+    n = 200
+    def chats():
+        for i in range(n): core.save_chat_event(uid, "user" if i%2==0 else "assistant", "benchmark poruka "*8)
+    r = _measure(chats, max(1, reps//2)); r.update({k: round(v/n, 4) for k, v in r.items() if k.endswith("_ms")})
+    add("save_chat_event", r, per="call")
+    add("flush", _measure(lambda: (chats(), db.flush()), max(1, reps//2)), batch=n)
+    if storage != "sqlite":
+        add("_save_db", _measure(core._save_db, max(1, heavy//2)))
+    db.close()
+    return res
+
+# ---------- Poređenje sa prethodnim rezultatom ----------
+def compare(results, baseline, tolerance):
+    key = lambda r: (r["tier"], r["storage"], r["bench"])
+    old = {key(r): r for r in baseline.get("results", [])}
+    bad = []
+    for r in results:
+        b = old.get(key(r))
+        if b and b["median_ms"] > 0 and r["median_ms"] > b["median_ms"]*tolerance:
+            bad.append((key(r), b["median_ms"], r["median_ms"]))
+    return bad
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="MindMate benchmark")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    g = sub.add_parser("gen", help="sintetički mindmate_db.json")
+    g.add_argument("--users", type=int, default=100)
+    g.add_argument("--checkins-per-user", type=int, default=300)
+    g.add_argument("--chats-per-user", type=int, default=700)
+    g.add_argument("--days", type=int, default=365)
+    g.add_argument("--seed", type=int, default=7)
+    g.add_argument("--out", default="mindmate_db.json")
+    r = sub.add_parser("run", help="mikrobenchmark po nivoima")
+    r.add_argument("--tiers", default="1k,100k,1m")
+    r.add_argument("--storage", default="json,journal,sqlite")
+    r.add_argument("--reps", type=int, default=5)
+    r.add_argument("--workdir", default=None, help="čuva generisane fajlove između pokretanja")
+    r.add_argument("--out", default="-", help="JSON rezultati (- = stdout)")
+    r.add_argument("--baseline", default=None, help="prethodni JSON za poređenje")
+    r.add_argument("--tolerance", type=float, default=1.25, help="dozvoljen faktor usporenja")
+    a = ap.parse_args(argv)
+
+    if a.cmd == "gen":
+        n = generate(a.out, a.users, a.checkins_per_user, a.chats_per_user, a.days, a.seed)
+        print(f"{a.out}: {n} zapisa", file=sys.stderr)
+        return 0
+
+    workdir = a.workdir or tempfile.mkdtemp(prefix="mindmate-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    try:
+        for tier in a.tiers.split(","):
+            for storage in a.storage.split(","):
+                print(f"… {tier} / {storage}", file=sys.stderr)
+                results += run_tier(tier.strip(), storage.strip(), workdir, a.reps)
+    finally:
+        if not a.workdir: shutil.rmtree(workdir, ignore_errors=True)
+    doc = {"meta": {"when": datetime.utcnow().isoformat(), "python": platform.python_version(),
+                    "platform": platform.platform(), "reps": a.reps}, "results": results}
+    out = json.dumps(doc, indent=2)
+    if a.out == "-": print(out)
+    else:
+        with open(a.out, "w", encoding="utf-8") as f: f.write(out)
+    for res in results:
+        print(f"{res['tier']:>5} {res['storage']:<8} {res['bench']:<22} median {res['median_ms']:>10.3f} ms  peak {res['peak_kb']:>10.1f} KB", file=sys.stderr)
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f: bad = compare(results, json.load(f), a.tolerance)
+        for k, old, new in bad: print(f"REGRESIJA {'/'.join(k)}: {old:.3f} → {new:.3f} ms", file=sys.stderr)
+        if bad: return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
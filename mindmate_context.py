@@ -0,0 +1,108 @@
+# mindmate_context.py — kontekst prozor sa budžetom tokena + rolling sažetak starijih poruka
+import os, threading
+from concurrent.futures import ThreadPoolExecutor
+
+CONTEXT_TOKENS  = int(os.environ.get("MINDMATE_CONTEXT_TOKENS", "3000"))
+SUMMARY_TOKENS  = int(os.environ.get("MINDMATE_SUMMARY_TOKENS", "400"))
+MSG_OVERHEAD    = 4   # role + separatori po poruci
+
+SUMMARY_PROMPT = (
+    "Sažmi razgovor između korisnika i MindMate asistenta u najviše {words} reči, na srpskom. "
+    "Zadrži: ključne teme, osećanja, dogovorene mikro-korake i bitne činjenice o korisniku. "
+    "Bez uvoda i bez navođenja uloga."
+)
+
+def estimate_tokens(text):
+    # gruba procena (~4 znaka po tokenu); dovoljno za budžet, bez tokenizer zavisnosti
+    return (len(text or "")+3)//4 + MSG_OVERHEAD
+
+def _clip(text, tokens):
+    limit = tokens*4
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "…"
+
+def _usable(text):
+    # poruke o grešci backend-a ("[Greška …]", "[Nijedan LLM host …]", "[OPENAI_API_KEY …]") nisu sažetak
+    return bool(text) and not (text.startswith("[") and text.endswith("]"))
+
+class _UidState:
+    __slots__ = ("summary", "covered", "sid", "busy")
+    def __init__(self, summary=""):
+        self.summary, self.covered, self.sid, self.busy = summary, 0, None, False
+
+# Po uid-u: sažetak (trajno, preko persist) + koliko poruka tekuće sesije je već u sažetku.
+# Sažimanje ide u pozadini između poruka (maintain); dok ne završi, višak se samo izostavlja iz prompta.
+class ContextManager:
+    def __init__(self, summarize, load_summary=None, persist=None,
+                 budget=CONTEXT_TOKENS, summary_tokens=SUMMARY_TOKENS):
+        self.summarize = summarize          # fn(messages) -> tekst
+        self.load_summary = load_summary    # fn(uid) -> tekst | None
+        self.persist = persist              # fn(uid, tekst)
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self._states = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mindmate-summary")
+
+    def _state(self, uid, sid):
+        with self._lock:
+            st = self._states.get(uid)
+            if st is None:
+                saved = (self.load_summary(uid) or "").strip() if self.load_summary else ""
+                st = self._states[uid] = _UidState(saved if _usable(saved) else "")
+            if st.sid != sid:
+                # nova sesija: sažetak ostaje, log kreće iz početka
+                st.sid, st.covered = sid, 0
+            return st
+
+    def summary(self, uid):
+        st = self._states.get(uid)
+        return st.summary if st else ""
+
+    def _window(self, st, system, log):
+        covered = min(st.covered, len(log))
+        room = self.budget - estimate_tokens(system)
+        note = ("Sažetak ranijeg razgovora: " + st.summary) if st.summary else ""
+        if note: room -= estimate_tokens(note)
+        # najnovije poruke unazad dok ima mesta (poslednja uvek ulazi)
+        start = len(log)
+        while start > covered:
+            cost = estimate_tokens(log[start-1][1])
+            if cost > room and start < len(log): break
+            room -= cost; start -= 1
+        return note, covered, start
+
+    def build(self, uid, system, log, sid=None):
+        st = self._state(uid, sid)
+        note, _, start = self._window(st, system, log)
+        msgs = [{"role":"system","content":system}]
+        if note: msgs.append({"role":"system","content":note})
+        return msgs + [{"role":r,"content":m} for r,m in log[start:]]
+
+    def maintain(self, uid, system, log, sid=None):
+        # posle odgovora: ono što sledeći prompt ne bi obuhvatio sažima se u pozadini
+        st = self._state(uid, sid)
+        _, covered, start = self._window(st, system, log)
+        if start > covered: self._schedule(uid, st, log[covered:start], start)
+
+    def _schedule(self, uid, st, overflow, upto):
+        with self._lock:
+            if st.busy: return
+            st.busy = True
+        self._pool.submit(self._fold, uid, st, st.summary, list(overflow), upto, st.sid)
+
+    def _fold(self, uid, st, prev, overflow, upto, sid):
+        try:
+            words = max(30, self.summary_tokens*3//4)
+            convo = "\n".join(f"{'KORISNIK' if r=='user' else 'ASISTENT'}: {m}" for r,m in overflow)
+            if prev: convo = f"Dosadašnji sažetak: {prev}\n\nNove poruke:\n{convo}"
+            text = (self.summarize([{"role":"system","content":SUMMARY_PROMPT.format(words=words)},
+                                    {"role":"user","content":convo}]) or "").strip()
+            if not _usable(text): return
+            text = _clip(text, self.summary_tokens)
+            with self._lock:
+                st.summary = text
+                # ako je u međuvremenu počela nova sesija, njen log nije pokriven
+                if st.sid == sid: st.covered = max(st.covered, upto)
+            if self.persist: self.persist(uid, text)
+        finally:
+            with self._lock: st.busy = False
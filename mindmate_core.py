@@ -0,0 +1,262 @@
+# mindmate_core.py — MindMate podaci i metrike bez Streamlit-a (koriste ga app, benchmark i CLI alati)
+import os, math, hashlib, threading
+from datetime import datetime, date, timedelta
+from mindmate_store import open_db, empty_db, email_key
+from mindmate_metrics import MetricsAggregator
+from mindmate_auth import hash_in_pool, verify_in_pool, burn_dummy
+from mindmate_telemetry import inc
+from mindmate_archive import ChatArchive, archive_dir_for
+from mindmate_search import SearchIndex, search_dir_for, KINDS
+from mindmate_export import FORMATS
+from mindmate_rollup import RollupStore, rollup_path_for, pick_grain, ALL
+
+# MINDMATE_DB bira skladište po šemi:
+#   mindmate_db.json            — JSON fajl (MINDMATE_STORAGE=journal → append-only žurnal)
+#   journal://mindmate_db.json  — žurnal eksplicitno
+#   sqlite:///mindmate.db       — SQLite (WAL, indeksi); migracija: python mindmate_store.py migrate …
+# Stari chat_events idu u <baza>.archive/ (python mindmate_archive.py archive, MINDMATE_ARCHIVE_EVERY_H).
+# Indeksi pretrage po korisniku: <baza>.search/ (mindmate_search).
+# Zbirovi check-in-a po danu/nedelji/mesecu: <baza>.rollup.json.gz (python mindmate_rollup.py rebuild).
+# Izvoz jednog korisnika / cele baze i uvoz NDJSON dump-ova u grupama: python mindmate_export.py …
+DB_PATH = os.environ.get("MINDMATE_DB", "mindmate_db.json")
+TREND_POINTS = 12   # dana na landing grafiku trenda
+
+# ---------- Baza + agregat: jedna instanca po procesu ----------
+_STATE = {"db": None, "metrics": None, "archive": None, "engagement": None, "search": None, "rollups": None}
+_STATE_LOCK = threading.Lock()
+
+def _init_db(store):
+    try:
+        return store.load()
+    except Exception:
+        inc("mindmate_db_errors_total", backend=store.kind, op="load")
+        return empty_db()
+
+def _open_locked(url):
+    old = _STATE["db"]
+    if old is not None: old.close()
+    db = open_db(url or DB_PATH, _init_db)
+    archive = ChatArchive(archive_dir_for(url or DB_PATH))
+    # landing metrike: agregat se gradi iz baze (+ zbirovi arhive) jednom, dalje ga ažurira svaki upis
+    _STATE["db"], _STATE["archive"], _STATE["metrics"] = db, archive, MetricsAggregator.from_db(db, archive)
+    _STATE["engagement"] = None
+    _STATE["search"] = SearchIndex(search_dir_for(url or DB_PATH), _search_source)
+    _STATE["rollups"] = RollupStore(rollup_path_for(url or DB_PATH))
+    db.on_change(_on_change)
+    return db
+
+def _on_change(coll, rec):
+    # upisi drugih procesa (db.sync): agregat se dopunjuje; posle punog reload-a gradi iznova
+    if coll is None:
+        _STATE["metrics"] = MetricsAggregator.from_db(_STATE["db"], _STATE["archive"])
+        _STATE["engagement"] = None
+        _STATE["search"].observe(None, None)
+        _STATE["rollups"] = RollupStore(_STATE["rollups"].path)   # snimak + dopuna iz ponovo učitane baze
+    else:
+        _STATE["metrics"].observe(coll, rec)
+        if _STATE["engagement"] is not None: _STATE["engagement"].observe(coll, rec)
+        _STATE["search"].observe(coll, rec)
+        _STATE["rollups"].observe(coll, rec)
+
+def open_app_db(url=None):
+    # (ponovo) otvara bazu procesa — benchmark/alati eksplicitno; app implicitno preko _get_db
+    with _STATE_LOCK: return _open_locked(url)
+
+def _get_db():
+    db = _STATE["db"]
+    if db is None:
+        with _STATE_LOCK:
+            db = _STATE["db"] or _open_locked(None)
+    db.sync()   # jeftina provera verzije; tuđe izmene najviše jednom u MINDMATE_SYNC_MS
+    return db
+
+def metrics():
+    if _STATE["metrics"] is None: _get_db()
+    return _STATE["metrics"]
+
+def engagement():
+    # kolonski agregat angažovanja (NumPy se uvozi tek ovde); gradi se jednom, dalje ga dopunjuju upisi.
+    # Objekat se objavi pre punjenja, pa upisi tokom prolaza kroz bazu ne promaknu.
+    e = _STATE["engagement"]
+    if e is None:
+        from mindmate_engagement import EngagementEngine
+        db = _get_db()
+        with _STATE_LOCK:
+            e = _STATE["engagement"]
+            if e is None: e = _STATE["engagement"] = EngagementEngine()
+            else: return e
+        e.load(db)
+    return e
+
+def chat_archive():
+    if _STATE["archive"] is None: _get_db()
+    return _STATE["archive"]
+
+def search_index():
+    if _STATE["search"] is None: _get_db()
+    return _STATE["search"]
+
+def rollups():
+    # zbirovi check-in-a (mindmate_rollup); prvi poziv učitava snimak i dopunjuje ga iz baze
+    db = _get_db()
+    return _STATE["rollups"].get(db)
+
+def _save_db():
+    # puno prepisivanje stanja (snapshot); svakodnevni upisi idu preko _append_record
+    _get_db().save()
+
+def _persist_db():
+    try:
+        _save_db()
+    except Exception:
+        inc("mindmate_db_errors_total", backend=_get_db().backend, op="save")
+
+def _append_record(coll, rec):
+    # zapis je u pogledu i u redu; StoreError ako poslednji upis na disk nije uspeo
+    db = _get_db()
+    db.append(coll, rec)
+    metrics().observe(coll, rec)
+    if _STATE["engagement"] is not None: _STATE["engagement"].observe(coll, rec)
+    _STATE["search"].observe(coll, rec)
+    _STATE["rollups"].observe(coll, rec)
+    db.check()
+
+# ---------- Auth helpers (demo) ----------
+def register_user(email, password):
+    db = _get_db()
+    if db.find_user(email): return False, "Nalog već postoji."
+    if not db.add_user({"email":email, "password":hash_in_pool(password), "created": datetime.utcnow().isoformat()}):
+        return False, "Nalog već postoji."
+    return True, "Registracija uspešna."
+
+def authenticate(email, password):
+    db = _get_db()
+    u = db.find_user(email)
+    if not u:
+        burn_dummy(password); return False
+    ok, rehash = verify_in_pool(password, u.get("password"))
+    if ok and rehash:
+        # plaintext ili zastarela cena → tiho prebacivanje na trenutni hash
+        db.update_user(email, {"password": hash_in_pool(password)})
+    return ok
+
+def uid_for_email(email):
+    # stabilan uid po nalogu → istorija i sažetak razgovora preživljavaju novu sesiju;
+    # isti ključ kao pretraga naloga (casefold), pa „Straße” i „STRASSE” dele i nalog i istoriju
+    email = email_key(email)
+    return f"user_{hashlib.sha1(email.encode()).hexdigest()[:16]}" if email else f"user_{int(datetime.utcnow().timestamp())}"
+
+# ---------- Upisi ----------
+def save_checkin(uid, phq1, phq2, gad1, gad2, notes=""):
+    _append_record("checkins", {
+        "uid": uid,
+        "ts": datetime.utcnow().isoformat(),
+        "date": date.today().isoformat(),
+        "phq1": int(phq1), "phq2": int(phq2),
+        "gad1": int(gad1), "gad2": int(gad2),
+        "notes": notes or ""
+    })
+
+def save_chat_event(uid, role, content, stats=None):
+    rec = {
+        "uid": uid,
+        "ts": datetime.utcnow().isoformat(),
+        "role": role,
+        "content": (content or "")[:4000]
+    }
+    if stats:  # merenje odgovora modela (TTFT, tokena/s)
+        rec["ttft_ms"] = stats.get("ttft_ms"); rec["tps"] = stats.get("tps")
+    _append_record("chat_events", rec)
+
+def log_crisis_hit(uid, terms, mode):
+    # pogodak kriznog filtera (mindmate_crisis) za pregled; tekst poruke je već u chat_events
+    inc("mindmate_crisis_hits_total", mode=mode)
+    _append_record("crisis_events", {"uid": uid, "ts": datetime.utcnow().isoformat(), "terms": ", ".join(terms), "mode": mode})
+
+def crisis_events(limit=50):
+    # najnoviji pogoci, od najnovijeg
+    rows = list(_get_db().iter_records("crisis_events"))
+    return sorted(rows, key=lambda r: r.get("ts",""), reverse=True)[:limit]
+
+def chat_history(uid, since=None, until=None):
+    # arhiva (starije od watermark-a) + vruća baza, sortirano po ts
+    db, archive = _get_db(), chat_archive()
+    return archive.history(uid, since, until) + db.chat_events(uid, since, until)
+
+def chat_page(uid, before=None, limit=50):
+    # najnovijih `limit` poruka pre `before` (ISO ts), rastuće po ts; kad vruća baza presuši, nastavlja arhiva
+    rows = _get_db().chat_page(uid, before, limit)
+    if len(rows) < limit:
+        rows = chat_archive().page(uid, rows[0]["ts"] if rows else before, limit-len(rows)) + rows
+    return rows
+
+def _search_source(uid, since):
+    # zapisi jednog uid-a za indeks pretrage (beleške + chat, uključujući arhivu), od `since` (ISO ts)
+    for r in _get_db().checkins(uid):
+        if since is None or r.get("ts","") >= since: yield "checkins", r
+    for r in chat_history(uid, since): yield "chat_events", r
+
+def search_history(uid, query, since=None, until=None, kinds=KINDS, limit=20):
+    # rangirani pogoci u beleškama i razgovorima korisnika; since/until su datumi "YYYY-MM-DD" (uključivo)
+    return search_index().search(uid, query, since, until, kinds, limit)
+
+def _user_records(uid, email=None):
+    # sve o jednom korisniku iz pogleda procesa (+ arhiva mesec po mesec); nalog bez lozinke
+    db = _get_db()
+    for r in db.checkins(uid): yield "checkins", r
+    for r in chat_archive().iter_history(uid): yield "chat_events", r
+    for r in db.chat_events(uid): yield "chat_events", r
+    for coll in ("summaries", "crisis_events"):
+        for r in db.iter_records(coll):
+            if r.get("uid") == uid: yield coll, r
+    u = db.find_user(email) if email else None
+    if u: yield "users", {k: v for k, v in u.items() if k != "password"}
+
+def export_user(uid, email=None, fmt="ndjson"):
+    # "preuzmi moje podatke": generator delova NDJSON/CSV fajla (CLI bez aplikacije: mindmate_export.py)
+    return FORMATS[fmt](_user_records(uid, email))
+
+# ---------- Metrike ----------
+def _pct(x): return int(round(100*x)) if x is not None else 0
+
+def compute_metrics():
+    # korisnici/poruke iz inkrementalnog agregata (uključuje arhivu); zadovoljstvo = udeo check-in-a
+    # sa skorom ≤ 3 u 30 dana, retencija = 7-dnevna kohortna retencija (mindmate_engagement)
+    users, sessions, _, _ = metrics().snapshot()
+    s = engagement().summary()
+    return users or 1, sessions, _pct(s["satisfaction"]), _pct(s["retention"][7])
+
+def metrics_version():
+    # menja se kad i landing brojke: novi upis, nov agregat (reload baze) ili nov dan (prozori, retencija)
+    m = metrics()
+    return m.epoch, m.version, date.today().isoformat()
+
+def compute_trend_series():
+    # landing: prosečan skor svih korisnika za poslednjih TREND_POINTS dana sa check-in-om (dnevni zbir)
+    days = rollups().series(ALL, "day", last=TREND_POINTS)
+    labels, prod, mood = [], [], []
+    if days:
+        for i,d in enumerate(days):
+            labels.append(d["bucket"])
+            total = d["mean"]
+            mood.append(round(max(40,95-total*4)))
+            prod.append(round(max(35,92-total*3+(2 if (i%3==0) else 0))))
+    else:
+        base = [(date.today()-timedelta(days=(11-i))).isoformat() for i in range(12)]
+        labels = base
+        for i in range(12):
+            t=i/11
+            mood.append(int(70+20*math.sin(t*3.14)+5*t))
+            prod.append(int(65+18*math.sin(t*3.14*.9)+7*t))
+    return labels, prod, mood
+
+def checkin_rollup(uid, days=None):
+    # (granulacija, kofe, sati) za poslednjih `days` dana (None = od prvog check-in-a): najkrupniji zbir
+    # koji i dalje daje dovoljno tačaka — godina je ~12 meseci/52 nedelje, ne svi sirovi zapisi
+    ro = rollups()
+    if days is None:
+        first = ro.first_day(uid)
+        days = (date.today() - date.fromisoformat(first)).days + 1 if first else 1
+    since = (date.today() - timedelta(days=days-1)).isoformat()
+    grain = pick_grain(days)
+    return grain, ro.series(uid, grain, since), ro.hours_of(uid)
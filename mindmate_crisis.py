@@ -0,0 +1,166 @@
+# mindmate_crisis.py — lokalni filter kriznih izraza (samopovređivanje, suicidalnost) pre LLM poziva
+# Leksikon (srpski latinica/ćirilica + engleski) se normalizuje i jednom kompajlira u Aho-Corasick
+# automat; provera poruke je jedan prolaz kroz tekst (desetine µs), bez regex backtracking-a.
+#   MINDMATE_CRISIS_LEXICON=putanja.txt  — jedan izraz po redu (# komentar) umesto ugrađenog leksikona;
+#                                          "*" na kraju = bilo koji nastavak reči (samoubist* → samoubistvo, -va…)
+#   MINDMATE_CRISIS_MODE=inline|skip     — inline: resursi odmah, LLM odgovor i dalje stiže; skip: bez LLM-a
+import os, unicodedata
+
+CRISIS_MODE = os.environ.get("MINDMATE_CRISIS_MODE", "inline").lower().strip()
+LEXICON_PATH = os.environ.get("MINDMATE_CRISIS_LEXICON", "")
+
+LEXICON = """
+# srpski (normalizuje se: ćirilica → latinica, č/ć → c, š → s, ž → z, đ → dj)
+samoubist*
+samoubic*
+samoubij*
+ubiti se
+ubijem se
+ubicu se
+ubio bih se
+ubila bih se
+# klitika ispred glagola: „hoću da se ubijem”, „želim se ubiti”, „bih se ubio”
+se ubij*
+se ubiti
+se ubicu
+da se ubijem
+bih se ubio
+bih se ubila
+obesim se
+obesiti se
+se obesim
+se obesiti
+oduzmem sebi zivot
+oduzeti sebi zivot
+oduzmem zivot
+ne zelim da zivim
+ne zelim vise da zivim
+necu da zivim
+ne mogu vise da zivim
+ne vredi ziveti
+nema smisla ziveti
+zelim da umrem
+hocu da umrem
+volela bih da umrem
+voleo bih da umrem
+bolje da me nema
+bolje bi bilo da me nema
+samopovredj*
+povredim sebe
+povredjujem sebe
+sebe povredim
+naudim sebi
+sebi naudim
+secem se
+seckam se
+se secem
+se seckam
+iseci vene
+isecem vene
+preseci vene
+predozir*
+popijem sve tablete
+popiti sve tablete
+skocim sa
+skociti sa mosta
+oprostajno pismo
+# english
+suicid*
+kill myself
+killing myself
+end my life
+ending my life
+take my own life
+want to die
+wanna die
+better off dead
+no reason to live
+self harm*
+selfharm*
+hurt myself
+hurting myself
+cut myself
+cutting myself
+overdos*
+"""
+
+# Odgovor je konstanta (prikazuje se odmah, bez mreže); brojevi za Srbiju
+CRISIS_RESPONSE = (
+    "**Tvoja bezbednost je sada najvažnija.** Ako si u neposrednoj opasnosti ili razmišljaš da sebi naudiš, "
+    "odmah pozovi **112** ili Hitnu pomoć **194**.\n\n"
+    "- **Centar Srce** — besplatno, anonimno: **0800 300 303** (svakog dana 14–23 h)\n"
+    "- Najbliža hitna psihijatrijska služba ili dom zdravlja\n"
+    "- Javi se nekome kome veruješ i reci mu kako se osećaš — ne moraš ovo da nosiš sam/a.\n\n"
+    "MindMate nije zamena za hitnu pomoć, ali je tu da razgovara sa tobom."
+)
+
+# ---------- Normalizacija ----------
+_CYR = dict(zip("абвгдђежзијклљмнњопрстћуфхцчџш",
+                ["a","b","v","g","d","dj","e","z","z","i","j","k","l","lj","m","n","nj","o","p","r","s","t","c","u","f","h","c","c","dz","s"]))
+_LATIN = (("č", "c"), ("ć", "c"), ("š", "s"), ("ž", "z"), ("đ", "dj"))
+_CYR_FOLD = str.maketrans(_CYR)
+_ASCII = bytes(c if chr(c).isalnum() else 32 for c in range(128)) + b" "*128   # sve osim [a-z0-9] → razmak
+
+def normalize(text):
+    # mala slova, latinica bez dijakritika, reči odvojene jednim razmakom. Brzi put: str.replace za
+    # srpsku latinicu + bytes.translate; ćirilica/ostali dijakritici tek ako nešto ne-ASCII ostane
+    s = (text or "").casefold()
+    if not s.isascii():
+        for a, b in _LATIN: s = s.replace(a, b)
+        if not s.isascii():
+            s = "".join(c for c in unicodedata.normalize("NFKD", s.translate(_CYR_FOLD)) if not unicodedata.combining(c))
+    return " ".join(s.encode("ascii", "replace").translate(_ASCII).decode("ascii").split())
+
+# ---------- Aho-Corasick ----------
+class CrisisMatcher:
+    def __init__(self, terms):
+        # šabloni: " izraz " (cela reč/fraza) ili " osnova" (prefiks reči); tekst se proverava kao " tekst "
+        self._goto, self._fail, self._out = [{}], [0], [()]
+        for term in terms:
+            stem = term.endswith("*")
+            norm = normalize(term.rstrip("*"))
+            if norm: self._add(" " + norm + ("" if stem else " "), term)
+        self._build()
+
+    def _add(self, pat, term):
+        node = 0
+        for ch in pat:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = self._goto[node][ch] = len(self._goto)
+                self._goto.append({}); self._fail.append(0); self._out.append(())
+            node = nxt
+        self._out[node] += (term,)
+
+    def _build(self):
+        # BFS: fail link = najduži pravi sufiks koji je i prefiks nekog šablona; izlazi se nasleđuju
+        queue = list(self._goto[0].values())          # dubina 1: fail = koren
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]: f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+                queue.append(nxt)
+        # potpuna tabela prelaza (fail linkovi razrešeni unapred) → jedan dict lookup po karakteru
+        self._delta = [dict(self._goto[0])] + [None]*(len(self._goto)-1)
+        for node in queue:
+            d = self._delta[node] = dict(self._delta[self._fail[node]])
+            d.update(self._goto[node])
+
+    def scan(self, text):
+        # pogođeni izrazi iz leksikona (redosled pojavljivanja, bez ponavljanja); [] ako nema
+        delta, out = self._delta, self._out
+        node, hits = 0, []
+        for ch in " " + normalize(text) + " ":
+            node = delta[node].get(ch, 0)
+            if out[node]: hits += [t for t in out[node] if t not in hits]
+        return hits
+
+def load_terms(path=LEXICON_PATH):
+    text = open(path, encoding="utf-8").read() if path else LEXICON
+    return [l.strip() for l in text.splitlines() if l.strip() and not l.lstrip().startswith("#")]
+
+MATCHER = CrisisMatcher(load_terms())
+
+def scan(text): return MATCHER.scan(text)
@@ -0,0 +1,217 @@
+# mindmate_engagement.py — kolonska analitika angažovanja (NumPy): DAU/WAU/MAU, kohortna retencija,
+# check-in streak-ovi i raspodela skorova, bez petlji po redovima u upitima.
+# Aktivnost = check-in ili korisnička poruka; čuva se kao sortiran niz jedinstvenih ključeva uid·dan
+# (int64), check-in-ovi kao kolone (uid, dan, skor). Novi zapisi idu u mali bafer koji se spaja pri
+# prvom sledećem upitu. Rezultati se keširaju po (upit, UTC dan); dok pristižu upisi, keš sme da
+# zaostaje najviše MINDMATE_ENGAGEMENT_TTL_S sekundi.
+# Arhivirani chat_events (mindmate_archive) ne ulaze — kohorte starije od MINDMATE_ARCHIVE_DAYS
+# vide samo check-in aktivnost.
+import os, time, threading
+from datetime import datetime, timedelta
+import numpy as np
+from mindmate_metrics import checkin_total
+
+ENGAGEMENT_TTL_S = float(os.environ.get("MINDMATE_ENGAGEMENT_TTL_S", "60"))
+RETENTION_DAYS   = (1, 7, 30)
+STREAK_BUCKETS   = (1, 2, 4, 8, 15, 31)        # donje granice: 1, 2–3, 4–7, 8–14, 15–30, 31+
+_DAY = 1 << 20                                 # ključ = uid_kod*_DAY + dan (dani od 1970, < 2^20)
+_EPOCH = datetime(1970, 1, 1)
+
+def _today(): return (datetime.utcnow() - _EPOCH).days
+
+def day_label(d): return (_EPOCH + timedelta(days=int(d))).date().isoformat()
+
+def _days(strs):
+    # "YYYY-MM-DD…" → dani od 1970 (vektorski); neispravan datum → -1
+    try: d = np.array(strs, dtype="datetime64[D]")
+    except ValueError:
+        d = np.empty(len(strs), dtype="datetime64[D]")
+        for i, s in enumerate(strs):
+            try: d[i] = np.datetime64(s, "D")
+            except ValueError: d[i] = np.datetime64("NaT")
+    out = d.astype(np.int64)
+    out[np.isnat(d)] = -1
+    return out
+
+# ---------- Upiti nad kolonama (čiste funkcije; nizovi se ne menjaju posle spajanja) ----------
+def _uniq(a):
+    # sortirane jedinstvene vrednosti; sort + poređenje suseda je višestruko brže od np.unique
+    # (NumPy 2.x za int nizove bira heš put)
+    a = np.sort(a)
+    return a[np.concatenate(([True], a[1:] != a[:-1]))] if a.size else a
+
+def _users(act):
+    # act je sortiran po (uid, dan) → prvi/poslednji aktivni dan po korisniku bez sortiranja
+    codes, days = act // _DAY, act % _DAY
+    uniq, first_i, counts = np.unique(codes, return_index=True, return_counts=True)
+    return codes, days, uniq, days[first_i], days[first_i + counts - 1], counts
+
+def _active(codes, days, today, n):
+    return _uniq(codes[(days > today-n) & (days <= today)])
+
+def _streaks(code, day, today):
+    # uzastopni dani check-in-a: (kodovi, trenutni streak, najduži streak) po korisniku
+    keys = _uniq(code.astype(np.int64)*_DAY + day)
+    if not keys.size: return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64)
+    c, d = keys // _DAY, keys % _DAY
+    start = np.ones(keys.size, dtype=bool)
+    start[1:] = (c[1:] != c[:-1]) | (d[1:] != d[:-1] + 1)
+    run_len = np.bincount(np.cumsum(start) - 1)
+    starts = np.flatnonzero(start)
+    run_code, run_end = c[starts], d[np.append(starts[1:] - 1, keys.size - 1)]
+    uniq, inv = np.unique(run_code, return_inverse=True)
+    longest = np.zeros(uniq.size, np.int64); np.maximum.at(longest, inv, run_len)
+    last = np.append(run_code[1:] != run_code[:-1], True)          # poslednji niz svakog korisnika
+    current = np.zeros(uniq.size, np.int64)
+    live = last & (run_end >= today - 1)                           # streak traje ako je check-in danas ili juče
+    current[inv[live]] = run_len[live]
+    return uniq, current, longest
+
+def _summary(act, ck, today):
+    codes, days, uniq, first, last, _ = _users(act)
+    dau, wau, mau = (_active(codes, days, today, n).size for n in (1, 7, 30))
+    prev = _uniq(codes[(days > today-60) & (days <= today-30)])
+    kept = np.intersect1d(prev, _active(codes, days, today, 30), assume_unique=True).size
+    retention = {}
+    for n in RETENTION_DAYS:
+        # „unbounded” N-dnevna retencija: korisnici stari bar N dana koji su se vratili na dan N ili kasnije
+        eligible = first <= today - n
+        retention[n] = float((last[eligible] >= first[eligible] + n).mean()) if eligible.any() else None
+    recent = ck["day"] > today - 30
+    totals = ck["total"][recent]
+    _, current, longest = _streaks(ck["code"], ck["day"], today)
+    active = current[current > 0]
+    return {
+        "users": int(uniq.size), "dau": dau, "wau": wau, "mau": mau,
+        "stickiness": dau/mau if mau else None,
+        "mau_retention": kept/prev.size if prev.size else None,
+        "retention": retention,
+        "checkins_30d": int(totals.size),
+        "satisfaction": float((totals <= 3).mean()) if totals.size else None,
+        "score_hist": np.bincount(totals.clip(0, 12), minlength=13).tolist(),
+        "streak_users": int(active.size),
+        "streak_avg": float(active.mean()) if active.size else 0.0,
+        "streak_max": int(longest.max()) if longest.size else 0,
+        "streak_hist": np.bincount(np.searchsorted(STREAK_BUCKETS, active, side="right") - 1,
+                                   minlength=len(STREAK_BUCKETS)).tolist(),
+    }
+
+def _dau_series(act, ck, today, n):
+    days = act % _DAY
+    d = days[(days > today-n) & (days <= today)] - (today-n+1)
+    return [day_label(today-n+1+i) for i in range(n)], np.bincount(d, minlength=n).tolist()
+
+def _cohorts(act, ck, today, weeks):
+    # nedeljne kohorte po prvom aktivnom danu: udeo kohorte aktivan u nedelji 0..weeks-1 posle ulaska
+    codes, days, uniq, first, _, counts = _users(act)
+    start = today - weeks*7 + 1
+    cw = (first - start) // 7
+    first_each = np.repeat(first, counts)
+    cw_each = np.repeat(cw, counts)
+    off = (days - first_each) // 7
+    keep = (cw_each >= 0) & (off < weeks)
+    cells = _uniq((codes[keep]*weeks + cw_each[keep])*weeks + off[keep])   # jedan put po (korisnik, nedelja)
+    mat = np.zeros((weeks, weeks), np.int64)
+    np.add.at(mat, ((cells // weeks) % weeks, cells % weeks), 1)
+    sizes = np.bincount(cw[cw >= 0], minlength=weeks)[:weeks]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(sizes[:, None] > 0, mat / sizes[:, None], np.nan)
+    # nedelje koje još nisu nastupile za kohortu nisu 0% nego nepoznate
+    frac[np.arange(weeks)[:, None] + np.arange(weeks)[None, :] >= weeks] = np.nan
+    return [day_label(start + 7*i) for i in range(weeks)], sizes.tolist(), frac.tolist()
+
+class EngagementEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._codes = {}                                   # uid → celobrojni kod
+        self._act = np.empty(0, np.int64)                  # sortirani jedinstveni ključevi uid·dan
+        self._ck = {"code": np.empty(0, np.int64), "day": np.empty(0, np.int64), "total": np.empty(0, np.int64)}
+        self._buf = []                                     # (kod, "YYYY-MM-DD", skor | None)
+        self._cache = {}                                   # (upit, dan, argumenti) → (t, verzija, rezultat)
+        self.version = 0
+
+    @classmethod
+    def from_db(cls, db):
+        e = cls(); e.load(db)
+        return e
+
+    def load(self, db, batch=10000):
+        # jedan prolaz kroz bazu (u grupama, da upisi iz drugih niti ne čekaju ceo prolaz);
+        # spajanje i sve dalje je vektorski
+        for coll in ("checkins", "chat_events"):
+            rows = []
+            for r in db.iter_records(coll):
+                rows.append(r)
+                if len(rows) >= batch:
+                    with self._lock:
+                        self._buffer_many(coll, rows)
+                        if len(self._buf) >= 20*batch: self._merge()   # bafer tuple-ova ne raste sa bazom
+                    rows = []
+            with self._lock: self._buffer_many(coll, rows)
+        with self._lock: self._merge()
+        self._ready.set()
+
+    def _buffer_many(self, coll, rows):
+        for r in rows: self._buffer(coll, r)
+
+    def _buffer(self, coll, r):
+        # poziva se pod self._lock
+        uid = r.get("uid", "")
+        if not uid or (coll == "chat_events" and r.get("role") != "user") or coll not in ("checkins", "chat_events"): return
+        code = self._codes.setdefault(uid, len(self._codes))
+        day = (r.get("ts") or r.get("date") or "")[:10]
+        self._buf.append((code, day, checkin_total(r) if coll == "checkins" else None))
+
+    def observe(self, coll, r):
+        with self._lock:
+            self._buffer(coll, r)
+            self.version += 1
+
+    def _merge(self):
+        # poziva se pod self._lock; nizovi se zamenjuju (ne menjaju) → upiti van lock-a su bezbedni
+        if not self._buf: return
+        buf, self._buf = self._buf, []
+        code = np.fromiter((b[0] for b in buf), np.int64, len(buf))
+        day = _days([b[1] for b in buf])
+        ok = day >= 0
+        self._act = _uniq(np.concatenate([self._act, (code*_DAY + day)[ok]]))
+        is_ck = np.fromiter((b[2] is not None for b in buf), bool, len(buf)) & ok
+        if is_ck.any():
+            total = np.fromiter((b[2] or 0 for b in buf), np.int64, len(buf))
+            self._ck = {"code": np.concatenate([self._ck["code"], code[is_ck]]),
+                        "day": np.concatenate([self._ck["day"], day[is_ck]]),
+                        "total": np.concatenate([self._ck["total"], total[is_ck]])}
+
+    def _cached(self, name, fn, *args):
+        self._ready.wait()
+        today = _today()
+        key = (name, today) + args
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and (hit[1] == self.version or time.monotonic() - hit[0] < ENGAGEMENT_TTL_S): return hit[2]
+            self._merge()
+            version, act, ck = self.version, self._act, self._ck
+        val = fn(act, ck, today, *args)
+        with self._lock:
+            if any(k[1] != today for k in self._cache): self._cache.clear()   # prethodni dani
+            self._cache[key] = (time.monotonic(), version, val)
+        return val
+
+    # --- javni upiti ---
+    def summary(self): return self._cached("summary", _summary)
+
+    def dau_series(self, days=90): return self._cached("dau", _dau_series, days)
+
+    def cohorts(self, weeks=8): return self._cached("cohorts", _cohorts, weeks)
+
+    def user_streak(self, uid):
+        # (trenutni, najduži) streak check-in-a u danima; bez keša — odmah posle check-in-a mora biti tačan
+        self._ready.wait()
+        with self._lock:
+            self._merge()
+            code, ck = self._codes.get(uid), self._ck
+        if code is None: return 0, 0
+        m = ck["code"] == code
+        _, current, longest = _streaks(ck["code"][m], ck["day"][m], _today())
+        return (int(current[0]), int(longest[0])) if current.size else (0, 0)
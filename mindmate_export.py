@@ -0,0 +1,247 @@
+# mindmate_export.py — izvoz podataka jednog korisnika (GDPR) i uvoz velikih NDJSON dump-ova
+#   python mindmate_export.py export --email a@b.c --format csv --out moji_podaci.csv
+#   python mindmate_export.py export --all --out dump.ndjson          (migracija: svi zapisi, sa hash-evima lozinki)
+#   python mindmate_export.py import dump.ndjson --db journal://novi.json --batch 5000
+# Izvoz čita skladište direktno sa diska, bez učitavanja cele baze: JSON snapshot se parsira element po
+# element (u memoriji je jedan blok fajla + jedan zapis), žurnal i SQLite red po red, arhiva mesec po mesec.
+# Svaka linija izvoza je zapis + "_coll" (kolekcija); uvoz prihvata isti format. Uvoz piše u grupama:
+# jedan trajan upis po grupi (žurnal: jedan append + fsync; SQLite: jedna transakcija), ne po zapisu.
+import os, io, csv, sys, json, sqlite3, argparse
+from mindmate_store import (COLLECTIONS, SQLITE_FIELDS, StoreLock, SqliteDB, open_store, parse_db_url,
+                            normalize_db, _store_base, _sqlite_init, _sqlite_insert, _sqlite_row)
+from mindmate_archive import ChatArchive, archive_dir_for
+
+CHUNK = 1 << 16                      # znakova po čitanju snapshot-a
+IMPORT_BATCH = int(os.environ.get("MINDMATE_IMPORT_BATCH", "5000"))
+CSV_FIELDS = ("coll", "uid", "ts", "date", "role", "content", "notes", "phq1", "phq2", "gad1", "gad2",
+              "ttft_ms", "tps", "terms", "mode", "email", "created")
+
+# ---------- Čitanje skladišta u toku ----------
+def iter_json_object(f, gen_out=None):
+    # (kolekcija, zapis) iz {"kolekcija": [zapis, …], …, "_gen": N} bez učitavanja celog fajla;
+    # vrednosti koje nisu liste (npr. _gen) idu u gen_out
+    dec, buf, pos, eof = json.JSONDecoder(), "", 0, False
+    def fill():
+        nonlocal buf, pos, eof
+        data = f.read(CHUNK)
+        buf, pos, eof = buf[pos:] + data, 0, not data
+    def skip():
+        # do prvog znaka koji nije razmak; None na kraju fajla
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n": pos += 1
+            if pos < len(buf): return buf[pos]
+            if eof: return None
+            fill()
+    def value():
+        # jedna JSON vrednost; dopuna bafera dok nije cela (i broj ne sme da se završi na kraju bafera)
+        nonlocal pos
+        if skip() is None: raise ValueError("JSON snapshot: neočekivan kraj fajla")
+        while True:
+            try:
+                v, end = dec.raw_decode(buf, pos)
+                if end < len(buf) or eof: pos = end; return v
+            except ValueError:
+                if eof: raise
+            fill()
+    def expect(ch):
+        nonlocal pos
+        if skip() != ch: raise ValueError(f"JSON snapshot: očekivan '{ch}' (pozicija {pos})")
+        pos += 1
+
+    if skip() is None: return
+    expect("{")
+    if skip() == "}": return
+    while True:
+        key = value(); expect(":")
+        if skip() == "[":
+            pos += 1
+            if skip() == "]": pos += 1
+            else:
+                while True:
+                    yield key, value()
+                    if skip() == "]": pos += 1; break
+                    expect(",")
+        elif gen_out is not None: gen_out[key] = value()
+        else: value()
+        if skip() == "}": return
+        expect(",")
+
+def _journal_lines(f, size):
+    # kompletne linije do veličine fajla u trenutku otvaranja (nedovršen rep se preskače)
+    left = size
+    for line in f:
+        left -= len(line)
+        if left < 0 or not line.endswith(b"\n"): return
+        try: yield json.loads(line)
+        except ValueError: continue
+
+def iter_file_store(path, mode):
+    # json/journal sa diska: snapshot + žurnali (gen ≥ gen snapshot-a). Fajlovi se otvaraju pod
+    # <baza>.lock, pa je pogled konzistentan; kompakcija drugog procesa posle toga (os.replace +
+    # brisanje) ne menja već otvorene fajlove.
+    store = open_store(path, mode)
+    files = []
+    with StoreLock(_store_base(path) + ".lock"):
+        snap = open(path, encoding="utf-8") if os.path.exists(path) else None
+        if mode == "journal":
+            files = [(g, coll, open(p, "rb"), os.path.getsize(p)) for g, coll, p in store._journal_files()]
+    try:
+        meta = {}
+        if snap is not None:
+            for coll, rec in iter_json_object(snap, meta):
+                if coll in COLLECTIONS and isinstance(rec, dict): yield coll, rec
+        snap_gen = int(meta.get("_gen", 0) or 0)
+        for g, coll, f, size in files:
+            if g < snap_gen: continue         # ostatak prekinute kompakcije — već je u snapshot-u
+            for rec in _journal_lines(f, size): yield coll, rec
+    finally:
+        for _, _, f, _ in files: f.close()
+        if snap is not None: snap.close()
+
+def iter_sqlite(path, uid=None, colls=COLLECTIONS):
+    # samo čitanje (mode=ro), kursor red po red; jedna read transakcija → konzistentan pogled
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("BEGIN")
+        for coll in colls:
+            cols = SQLITE_FIELDS[coll]
+            sql, args = f"SELECT {','.join(cols)} FROM {coll}", ()
+            if uid is not None and "uid" in cols: sql, args = sql + " WHERE uid=?", (uid,)
+            for r in conn.execute(sql + " ORDER BY id", args): yield coll, {k: r[k] for k in cols}
+    finally:
+        conn.close()
+
+def iter_store(url, uid=None):
+    # (kolekcija, zapis) cele baze ili jednog uid-a (users se ne filtriraju — nemaju uid)
+    mode, path = parse_db_url(url)
+    if mode == "sqlite":
+        yield from iter_sqlite(path, uid)
+        return
+    for coll, rec in iter_file_store(path, mode):
+        if uid is None or coll == "users" or rec.get("uid") == uid: yield coll, rec
+
+def user_records(url, uid, email=None):
+    # izvoz za jednog korisnika: arhiva + vruća baza; nalog (bez lozinke) samo ako je poznat email
+    key, user = (email or "").strip().casefold(), None
+    for rec in ChatArchive(archive_dir_for(url)).iter_history(uid): yield "chat_events", rec
+    for coll, rec in iter_store(url, uid):
+        if coll != "users": yield coll, rec
+        elif key and (rec.get("email") or "").strip().casefold() == key: user = rec   # poslednja verzija naloga
+    if user: yield "users", {k: v for k, v in user.items() if k != "password"}
+
+def all_records(url):
+    # migracija: sve iz arhive i baze, uključujući hash-eve lozinki
+    for rec in ChatArchive(archive_dir_for(url)).iter_all(): yield "chat_events", rec
+    yield from iter_store(url)
+
+# ---------- Formati ----------
+def to_ndjson(records):
+    for coll, rec in records: yield json.dumps({"_coll": coll, **rec}, ensure_ascii=False) + "\n"
+
+def to_csv(records):
+    # fiksne kolone (unija polja svih kolekcija); lozinka se nikad ne piše
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, CSV_FIELDS, extrasaction="ignore")
+    w.writeheader()
+    for coll, rec in records:
+        w.writerow({"coll": coll, **rec})
+        yield buf.getvalue(); buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+FORMATS = {"ndjson": to_ndjson, "csv": to_csv}
+
+# ---------- Uvoz ----------
+def read_ndjson(f, default_coll=None):
+    # (kolekcija, zapis) iz NDJSON-a; "_coll" u zapisu ili default_coll; prazne/neispravne linije se preskaču
+    for line in f:
+        line = line.strip()
+        if not line: continue
+        try: rec = json.loads(line)
+        except ValueError: continue
+        if not isinstance(rec, dict): continue
+        coll = rec.pop("_coll", None) or default_coll
+        if coll in COLLECTIONS: yield coll, rec
+
+def batches(items, n):
+    batch = []
+    for x in items:
+        batch.append(x)
+        if len(batch) >= n: yield batch; batch = []
+    if batch: yield batch
+
+def import_records(url, records, batch=IMPORT_BATCH):
+    # → {kolekcija: broj}; procesi aplikacije nad istom bazom preuzimaju zapise kroz uobičajeni sync
+    mode, path = parse_db_url(url)
+    counts = {}
+    def count(b):
+        for coll, _ in b: counts[coll] = counts.get(coll, 0) + 1
+    if mode == "sqlite":
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        _sqlite_init(conn)
+        try:
+            for b in batches(records, batch):
+                groups = {}
+                for coll, rec in b: groups.setdefault(coll, []).append(_sqlite_row(coll, rec))
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for coll, rows in groups.items(): conn.executemany(_sqlite_insert(coll), rows)
+                    SqliteDB._bump(conn)
+                count(b)
+        finally:
+            conn.close()
+        return counts
+    store = open_store(path, mode)
+    if mode == "journal":
+        # žurnal ne treba stanje baze; kompakcija (učitava celu bazu) se odlaže do sledeće u aplikaciji
+        limit, store.compact_min_bytes = store.compact_min_bytes, float("inf")
+        try:
+            for b in batches(records, batch):
+                store.append_many(None, b); count(b)
+                store._inbox.clear()          # tuđi upisi tokom uvoza — ovaj proces ih ne drži u memoriji
+        finally:
+            store.compact_min_bytes = limit
+        return counts
+    # legacy JSON nema append: baza je u memoriji, a fajl se prepisuje jednom po grupi
+    db = normalize_db(store.load())
+    for b in batches(records, batch):
+        for coll, rec in b: db[coll].append(rec)
+        store.append_many(db, b); count(b)
+    return counts
+
+def main(argv=None):
+    import mindmate_core as core
+    ap = argparse.ArgumentParser(description="MindMate izvoz/uvoz podataka")
+    ap.add_argument("--db", default=None, help="URL baze (podrazumevano MINDMATE_DB)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("export", help="podaci jednog korisnika (ili cele baze) kao NDJSON/CSV")
+    who = e.add_mutually_exclusive_group(required=True)
+    who.add_argument("--uid"); who.add_argument("--email"); who.add_argument("--all", action="store_true")
+    e.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    e.add_argument("--out", default="-", help="fajl (podrazumevano stdout)")
+    i = sub.add_parser("import", help="NDJSON dump u bazu, u grupama")
+    i.add_argument("file", help="NDJSON (- = stdin)")
+    i.add_argument("--batch", type=int, default=IMPORT_BATCH)
+    i.add_argument("--coll", choices=COLLECTIONS, help="kolekcija za linije bez _coll")
+    a = ap.parse_args(argv)
+
+    url = a.db or core.DB_PATH
+    if a.cmd == "export":
+        if a.all and a.format == "csv": ap.error("--all ide samo kao ndjson (čuva sva polja)")
+        records = all_records(url) if a.all else user_records(url, a.uid or core.uid_for_email(a.email), a.email)
+        out = sys.stdout if a.out == "-" else open(a.out, "w", encoding="utf-8", newline="")
+        try: out.writelines(FORMATS[a.format](records))
+        finally:
+            if out is not sys.stdout: out.close()
+    elif a.cmd == "import":
+        f = sys.stdin if a.file == "-" else open(a.file, encoding="utf-8")
+        try: counts = import_records(url, read_ndjson(f, a.coll), max(a.batch, 1))
+        finally:
+            if f is not sys.stdin: f.close()
+        for coll, n in counts.items(): print(f"{coll}: {n}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+# mindmate_llm.py — MindMate chat backend-i (Ollama / OpenAI) sa streaming odgovorima
+# chat_stream ide kroz ruter (mindmate_router): više Ollama hostova (OLLAMA_HOSTS=a,b,…) i opciono
+# drugi provajder kao rezerva (MINDMATE_LLM_FALLBACK=openai|ollama)
+import os, json, time, threading
+from collections import OrderedDict
+from mindmate_telemetry import observe, inc
+
+CHAT_PROVIDER = os.environ.get("CHAT_PROVIDER", "ollama").lower().strip()
+OLLAMA_HOST   = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_HOSTS  = [h.strip().rstrip("/") for h in os.environ.get("OLLAMA_HOSTS", "").split(",") if h.strip()] or [OLLAMA_HOST.rstrip("/")]
+LLM_FALLBACK  = os.environ.get("MINDMATE_LLM_FALLBACK", "").lower().strip()
+OLLAMA_MODEL  = os.environ.get("OLLAMA_MODEL", "llama3.1")
+OPENAI_API_KEY= os.environ.get("OPENAI_API_KEY", "")
+OPENAI_MODEL  = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+OPENAI_URL    = f"{OPENAI_BASE_URL}/chat/completions"
+
+OLLAMA_KEEP_ALIVE     = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# KV kontekst preko /api/generate: auto (samo gde /api/chat ne postoji) | 1 (uvek) | 0 (nikad)
+OLLAMA_CONTEXT_MODE   = os.environ.get("MINDMATE_OLLAMA_CONTEXT", "auto").lower().strip()
+OLLAMA_CONTEXT_CACHE  = int(os.environ.get("MINDMATE_OLLAMA_CONTEXT_CACHE", "64"))
+
+HTTP_POOL_SIZE       = int(os.environ.get("MINDMATE_HTTP_POOL", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("MINDMATE_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT    = float(os.environ.get("MINDMATE_HTTP_READ_TIMEOUT", "120"))
+HTTP_RETRIES         = int(os.environ.get("MINDMATE_HTTP_RETRIES", "2"))
+HTTP_BACKOFF         = float(os.environ.get("MINDMATE_HTTP_BACKOFF", "0.5"))
+HEALTH_TIMEOUT       = float(os.environ.get("MINDMATE_LLM_HEALTH_TIMEOUT", "3"))
+
+# ---------- HTTP: jedna pooled sesija po provajderu (keep-alive) ----------
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+_ATTEMPT = threading.local()   # .attempt: pokušaj rutera koji trenutno šalje zahtev iz ove niti
+
+def _abortable(adapter):
+    # konekcija se pri slanju zahteva prijavi pokušaju rutera (attempt.attach), pa poraženi hedge može
+    # da je ugasi i dok još čeka zaglavlja: shutdown budi nit blokiranu u recv, close to ne garantuje
+    import socket
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    def conn_cls(base):
+        class Conn(base):
+            def request(self, *a, **kw):
+                attempt = getattr(_ATTEMPT, "attempt", None)
+                if attempt is not None:
+                    def close(conn=self):
+                        if conn.sock is not None: conn.sock.shutdown(socket.SHUT_RDWR)
+                    attempt.attach(close)
+                return super().request(*a, **kw)
+        return Conn
+    Pool = type("Pool", (HTTPConnectionPool,), {"ConnectionCls": conn_cls(HTTPConnection)})
+    SPool = type("SPool", (HTTPSConnectionPool,), {"ConnectionCls": conn_cls(HTTPSConnection)})
+    adapter.poolmanager.pool_classes_by_scheme = {"http": Pool, "https": SPool}
+    return adapter
+
+def _timeout(): return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+def http_session(provider, retries=None):
+    # retries=None → HTTP_RETRIES; sa više hostova ruter sam prelazi na drugi, pa se isti host ne ponavlja
+    if retries is None: retries = HTTP_RETRIES if len(OLLAMA_HOSTS) < 2 or provider != "ollama" else 0
+    with _SESSIONS_LOCK:
+        s = _SESSIONS.get(provider)
+        if s is None:
+            # requests/urllib3 se uvoze tek sa prvim zahtevom (app ljuska čita samo konfiguraciju odavde)
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            # retry samo dok odgovor nije počeo: greške konekcije i 429/502/503/504;
+            # read=0 jer ponovljena generacija posle isteka čitanja samo udvostruči čekanje
+            retry = Retry(total=retries, connect=retries, read=0, status=retries,
+                          status_forcelist=(429, 502, 503, 504), allowed_methods=None,
+                          backoff_factor=HTTP_BACKOFF, respect_retry_after_header=True, raise_on_status=False)
+            adapter = _abortable(HTTPAdapter(pool_connections=max(4, len(OLLAMA_HOSTS)), pool_maxsize=HTTP_POOL_SIZE, max_retries=retry))
+            s = _SESSIONS[provider] = requests.Session()
+            s.mount("http://", adapter); s.mount("https://", adapter)
+        return s
+
+# ---------- Ollama: koji endpoint host podržava (otkriva se jednom po procesu) ----------
+# "chat" → /api/chat, "generate" → /api/generate (stariji Ollama bez /api/chat)
+_OLLAMA_CAPS = {}
+
+def ollama_endpoint(host): return _OLLAMA_CAPS.get(host)
+
+# ---------- Ollama: KV kontekst po sesiji ----------
+# /api/generate vraća "context" (tokeni celog dosadašnjeg razgovora). Ako je nova lista poruka
+# produžetak prethodne, šalje se samo razlika + context, pa model ne prefiluje istoriju ponovo.
+# Svako odstupanje (izmenjen/izbačen raniji deo, novi sažetak) poništava unos.
+class OllamaContextCache:
+    def __init__(self, size=OLLAMA_CONTEXT_CACHE):
+        self.size = max(size, 0)
+        self._d = OrderedDict()   # key → (poruke uključujući odgovor, context)
+        self._lock = threading.Lock()
+
+    def lookup(self, key, messages):
+        with self._lock:
+            hit = self._d.get(key)
+            if hit is None: return None, messages
+            prefix, ctx = hit
+            if len(prefix) < len(messages) and messages[:len(prefix)] == prefix:
+                self._d.move_to_end(key)
+                return ctx, messages[len(prefix):]
+            del self._d[key]
+            return None, messages
+
+    def store(self, key, messages, context):
+        if not self.size or not context: return
+        with self._lock:
+            self._d[key] = (list(messages), context)
+            self._d.move_to_end(key)
+            while len(self._d) > self.size: self._d.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock: self._d.pop(key, None)
+
+OLLAMA_CONTEXTS = OllamaContextCache()
+
+def _use_context(session, host):
+    if not session or OLLAMA_CONTEXT_MODE in ("0", "false", "no"): return False
+    return OLLAMA_CONTEXT_MODE in ("1", "true", "yes") or ollama_endpoint(host)=="generate"
+
+def ollama_warmup(host=None):
+    # učitava model unapred (prazan prompt) i drži ga OLLAMA_KEEP_ALIVE; usput otkriva endpoint.
+    # Bez host-a: svi OLLAMA_HOSTS; True ako je bar jedan odgovorio
+    if host is None: return any([ollama_warmup(h) for h in OLLAMA_HOSTS])
+    http = http_session("ollama")
+    try:
+        http.post(f"{host}/api/generate", json={"model":OLLAMA_MODEL,"keep_alive":OLLAMA_KEEP_ALIVE},
+                  timeout=_timeout()).close()
+        r = http.post(f"{host}/api/chat", json={"model":OLLAMA_MODEL,"messages":[],"keep_alive":OLLAMA_KEEP_ALIVE},
+                      timeout=_timeout())
+        r.close()
+        if r.status_code==404: _OLLAMA_CAPS[host] = "generate"
+        elif r.ok: _OLLAMA_CAPS[host] = "chat"
+        return True
+    except Exception:
+        return False
+
+def ollama_ping(host):
+    # provera zdravlja (pozadinska nit rutera): kratak timeout, bez ponavljanja; živ je host koji odgovori
+    # bilo čime osim 502/503/504 (proksiji i kompatibilni serveri ne moraju imati /api/tags)
+    r = http_session("health", retries=0).get(f"{host}/api/tags", timeout=(HTTP_CONNECT_TIMEOUT, HEALTH_TIMEOUT))
+    r.close()
+    if r.status_code in (502, 503, 504): raise RuntimeError(f"{host}: HTTP {r.status_code}")
+
+# ---------- Merenje odgovora ----------
+# stats (dict) popunjava generator: ttft_ms, tokens, tps, elapsed_ms; isto ide i u telemetriju po backend-u
+class _Meter:
+    def __init__(self, stats, backend, messages=()):
+        self.stats = stats if stats is not None else {}
+        self.backend = backend
+        self.t0 = time.perf_counter()
+        self.first = None
+        self.chunks = 0
+        self.chars = 0
+        observe("mindmate_llm_prompt_chars", sum(len(m.get("content") or "") for m in messages), backend=backend)
+
+    def chunk(self, text):
+        if text and self.first is None: self.first = time.perf_counter()
+        if text: self.chunks += 1; self.chars += len(text)
+
+    def done(self, tokens=None, gen_seconds=None, error=None):
+        end = time.perf_counter()
+        tokens = tokens or self.chunks
+        if not gen_seconds:
+            gen_seconds = end-(self.first or end)
+        self.stats.update({
+            "ttft_ms": round(1000*((self.first or end)-self.t0), 1),
+            "elapsed_ms": round(1000*(end-self.t0), 1),
+            "tokens": tokens,
+            "tps": round(tokens/gen_seconds, 1) if gen_seconds > 0 else 0.0,
+        })
+        if error is not None:
+            inc("mindmate_llm_errors_total", backend=self.backend, error=error if isinstance(error, str) else type(error).__name__)
+            return
+        observe("mindmate_llm_seconds", end-self.t0, backend=self.backend)
+        if self.first: observe("mindmate_llm_ttft_seconds", self.first-self.t0, backend=self.backend)
+        observe("mindmate_llm_response_chars", self.chars, backend=self.backend)
+
+def _ndjson(r):
+    for line in r.iter_lines():
+        if not line: continue
+        try: yield json.loads(line)
+        except ValueError: continue
+
+def _flatten_prompt(messages):
+    prompt=""
+    for m in messages:
+        role=m.get("role","user")
+        tag="SISTEM" if role=="system" else ("KORISNIK" if role=="user" else "ASISTENT")
+        prompt+=f"[{tag}]: {m.get('content','')}\n"
+    return prompt
+
+# ---------- Ollama: NDJSON stream sa /api/chat, fallback /api/generate ----------
+def _ollama_generate(http, host, messages, context=None):
+    body = {"model":OLLAMA_MODEL,"prompt":_flatten_prompt(messages),"stream":True,"keep_alive":OLLAMA_KEEP_ALIVE}
+    if context: body["context"] = context
+    return http.post(f"{host}/api/generate", json=body, timeout=_timeout(), stream=True)
+
+def _ollama_tokens(host, messages, meter, session=None, attempt=None):
+    # tokeni sa jednog hosta; greška se propušta (ruter prelazi na drugi host, stream_ollama je ispisuje)
+    ckey = f"{host}|{OLLAMA_MODEL}|{session}"
+    ctx_out, parts = None, []
+    _ATTEMPT.attempt = attempt
+    try:
+        http = http_session("ollama")
+        if _use_context(session, host):
+            ctx, delta = OLLAMA_CONTEXTS.lookup(ckey, messages)
+            r = _ollama_generate(http, host, delta, ctx)
+        elif ollama_endpoint(host)=="generate":
+            # host bez /api/chat (otkriveno ranije): pravo na /api/generate, bez 404 po zahtevu
+            r = _ollama_generate(http, host, messages)
+        else:
+            r = http.post(f"{host}/api/chat",
+                          json={"model":OLLAMA_MODEL,"messages":messages,"stream":True,"keep_alive":OLLAMA_KEEP_ALIVE},
+                          timeout=_timeout(), stream=True)
+            if r.status_code==404:
+                r.close()
+                _OLLAMA_CAPS[host] = "generate"
+                r = _ollama_generate(http, host, messages)
+            elif r.ok:
+                _OLLAMA_CAPS[host] = "chat"
+        r.raise_for_status()
+        tokens = gen_s = None
+        with r:  # čita se do kraja → konekcija se vraća u pool
+            for d in _ndjson(r):
+                if d.get("error"): raise RuntimeError(d["error"])
+                text = (d.get("message",{}) or {}).get("content") or d.get("response") or ""
+                if text:
+                    meter.chunk(text); parts.append(text); yield text
+                if d.get("done"):
+                    tokens = d.get("eval_count")
+                    gen_s = (d.get("eval_duration") or 0)/1e9
+                    ctx_out = d.get("context")
+        meter.done(tokens, gen_s)
+        if session and ctx_out:
+            # sledeći poziv je produžetak ako poruke počinju sa ovim + odgovorom
+            OLLAMA_CONTEXTS.store(ckey, list(messages)+[{"role":"assistant","content":"".join(parts).strip()}], ctx_out)
+    except Exception as e:
+        if session: OLLAMA_CONTEXTS.invalidate(ckey)
+        if not (attempt and attempt.cancel.is_set()): meter.done(error=e)   # prekinut hedge nije greška hosta
+        raise
+    finally:
+        _ATTEMPT.attempt = None
+
+def stream_ollama(messages, stats=None, session=None, host=None):
+    meter = _Meter(stats, "ollama", messages)
+    try: yield from _ollama_tokens(host or OLLAMA_HOSTS[0], messages, meter, session)
+    except Exception as e: yield f"[Greška Ollama: {e}]"
+
+# ---------- OpenAI: SSE stream ----------
+class NoApiKey(Exception):
+    pass
+
+def _openai_tokens(messages, meter, attempt=None):
+    if not OPENAI_API_KEY:
+        meter.done(error="no_api_key"); raise NoApiKey("OPENAI_API_KEY nije postavljen")
+    _ATTEMPT.attempt = attempt
+    try:
+        r=http_session("openai").post(OPENAI_URL,
+                        headers={"Authorization":f"Bearer {OPENAI_API_KEY}","Content-Type":"application/json"},
+                        json={"model":OPENAI_MODEL,"messages":messages,"stream":True,
+                              "stream_options":{"include_usage":True}}, timeout=_timeout(), stream=True)
+        r.raise_for_status()
+        tokens, lead = None, True
+        with r:
+            for line in r.iter_lines():
+                if not line or not line.startswith(b"data:"): continue
+                data = line[5:].strip()
+                if data==b"[DONE]": continue
+                try: j = json.loads(data)
+                except ValueError: continue
+                if j.get("usage"): tokens = j["usage"].get("completion_tokens")
+                for ch in j.get("choices") or []:
+                    text = (ch.get("delta") or {}).get("content") or ""
+                    if lead: text = text.lstrip()  # kao ranije .strip() na početku odgovora
+                    if text:
+                        lead = False; meter.chunk(text); yield text
+        meter.done(tokens)
+    except Exception as e:
+        if not (attempt and attempt.cancel.is_set()): meter.done(error=e)
+        raise
+    finally:
+        _ATTEMPT.attempt = None
+
+def stream_openai(messages, stats=None):
+    meter = _Meter(stats, "openai", messages)
+    try: yield from _openai_tokens(messages, meter)
+    except NoApiKey as e: yield f"[{e}]"
+    except Exception as e: yield f"[Greška OpenAI: {e}]"
+
+# ---------- Ruter: primarni provajder (svi OLLAMA_HOSTS ili OpenAI) + opciona rezerva ----------
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()
+
+def _backends(provider, priority):
+    from mindmate_router import Backend
+    if provider == "openai":
+        return [Backend("openai", "openai", lambda m, st, s, a: _openai_tokens(m, _Meter(st, "openai", m), a), priority=priority)]
+    return [Backend(h, "ollama", lambda m, st, s, a, h=h: _ollama_tokens(h, m, _Meter(st, "ollama", m), s, a),
+                    ping=lambda h=h: ollama_ping(h), priority=priority) for h in OLLAMA_HOSTS]
+
+def router():
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            from mindmate_router import LLMRouter
+            primary = "openai" if CHAT_PROVIDER=="openai" else "ollama"
+            fallback = _backends(LLM_FALLBACK, 1) if LLM_FALLBACK in ("openai", "ollama") and LLM_FALLBACK != primary else []
+            _ROUTER = LLMRouter(_backends(primary, 0) + fallback)
+        return _ROUTER
+
+def chat_stream(messages, stats=None, session=None):
+    # session: ključ razgovora (npr. uid:sid) — omogućava Ollama KV kontekst između poruka (po hostu)
+    from mindmate_router import NoBackend
+    try: yield from router().stream(messages, stats, session)
+    except NoBackend as e: yield f"[{e}]"
+    except NoApiKey as e: yield f"[{e}]"
+    except Exception as e: yield f"[Greška LLM: {e}]"
+
+# Ne-streaming varijante (isti potpis kao ranije)
+def chat_ollama(messages): return "".join(stream_ollama(messages)).strip()
+def chat_openai(messages): return "".join(stream_openai(messages)).strip()
+def chat_complete(messages): return "".join(chat_stream(messages)).strip()
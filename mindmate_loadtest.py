@@ -0,0 +1,254 @@
+# mindmate_loadtest.py — N simuliranih sesija (registracija → login → check-in → chat → analitika) protiv pokrenute app
+#   python mindmate_loadtest.py --spawn --users 20 --chats 3                  # app + mock LLM se pokreću lokalno
+#   python mindmate_loadtest.py --url http://127.0.0.1:8501 --users 50 --ramp-s 10 --out lt.json
+# Sesija priča Streamlit websocket protokol (/_stcore/stream) kao browser: svaki korak = jedan rerun skripte.
+import os, sys, json, time, uuid, random, socket, argparse, tempfile, threading, subprocess, statistics
+from contextlib import ExitStack
+import requests
+from websockets.sync.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+import mindmate_mockllm
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mindmate_app_v41.py")
+FINISHED_EARLY_FOR_RERUN = 2
+ALERT_ERROR, ALERT_WARNING = 1, 2
+MESSAGES = ("Danas sam baš nervozan zbog posla.", "Loše spavam već nedelju dana.",
+            "Kako da se smirim pre ispita?", "Osećam se bolje nego juče.", "Ne mogu da se fokusiram.")
+
+class StepError(Exception):
+    pass
+
+# ---------- Klijent jedne sesije ----------
+class AppSession:
+    def __init__(self, url, timeout=120):
+        ws_url = url.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + "/_stcore/stream"
+        self._stack = ExitStack()
+        self.ws = self._stack.enter_context(connect(ws_url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout))
+        self.timeout = timeout
+        self.elements = []
+
+    def close(self):
+        try: self._stack.close()
+        except Exception: pass
+
+    def run(self, query, widgets=()):
+        # → (trajanje_s, elementi); element = (t_s, vrsta, proto, delta_path)
+        m = BackMsg(); m.rerun_script.query_string = query
+        m.rerun_script.widget_states.widgets.extend(widgets)
+        t0 = time.perf_counter(); self.ws.send(m.SerializeToString())
+        els = []
+        while True:
+            f = ForwardMsg(); f.ParseFromString(self.ws.recv(timeout=self.timeout))
+            kind = f.WhichOneof("type")
+            if kind == "delta":
+                d = f.delta; path = tuple(f.metadata.delta_path)
+                if d.WhichOneof("type") == "new_element":
+                    e = d.new_element; ek = e.WhichOneof("type")
+                    els.append((time.perf_counter()-t0, ek, getattr(e, ek), path))
+                elif d.WhichOneof("type") == "add_block":
+                    els.append((time.perf_counter()-t0, "block:" + str(d.add_block.WhichOneof("type")), d.add_block, path))
+            elif kind == "script_finished" and f.script_finished != FINISHED_EARLY_FOR_RERUN:
+                self.elements = els
+                self._check(els)
+                return time.perf_counter()-t0, els
+
+    @staticmethod
+    def _check(els):
+        for _, ek, e, _ in els:
+            if ek == "exception": raise StepError(f"exception: {e.message[:120]}")
+            if ek == "alert" and e.format in (ALERT_ERROR, ALERT_WARNING): raise StepError(f"alert: {e.body[:120]}")
+
+    def widget(self, label=None, kind=None):
+        for _, ek, e, _ in self.elements:
+            if (kind is None or ek == kind) and (label is None or getattr(e, "label", None) == label):
+                return e.id
+        raise StepError(f"nema widget-a {kind or ''} {label or ''}".strip())
+
+def text(wid, v):
+    w = WidgetState(id=wid); w.string_value = v; return w
+
+def trigger(wid):
+    w = WidgetState(id=wid); w.trigger_value = True; return w
+
+def slider(wid, v):
+    w = WidgetState(id=wid); w.double_array_value.data[:] = [v]; return w
+
+def chat_input(wid, v):
+    w = WidgetState(id=wid)
+    if "chat_input_value" in WidgetState.DESCRIPTOR.fields_by_name: w.chat_input_value.data = v
+    else: w.string_trigger_value.data = v   # stariji Streamlit
+    return w
+
+def chat_ttft(els):
+    # prvi sadržaj u poslednjem chat_message bloku = odgovor asistenta
+    blocks = [p for _, ek, _, p in els if ek == "block:chat_message"]
+    if not blocks: return None
+    last = blocks[-1]
+    for t, ek, e, p in els:
+        if ek == "markdown" and p[:len(last)] == last and len(p) > len(last) and e.body.strip():
+            return t
+    return None
+
+# ---------- Scenario ----------
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lat, self.err, self.samples = {}, {}, []
+
+    def ok(self, step, seconds):
+        with self.lock: self.lat.setdefault(step, []).append(seconds*1000)
+
+    def fail(self, step, msg):
+        with self.lock:
+            self.err[step] = self.err.get(step, 0) + 1
+            if len(self.samples) < 20: self.samples.append(f"{step}: {msg}")
+
+def _step(res, name, fn):
+    try:
+        t, els = fn()
+    except Exception as e:
+        res.fail(name, e); return None
+    res.ok(name, t)
+    return els
+
+def session(url, res, i, a, rng):
+    s = None
+    think = lambda: time.sleep(rng.uniform(0, a.think_ms/1000)) if a.think_ms else None
+    email, pw = f"lt{i}-{uuid.uuid4().hex[:8]}@example.com", "loadtest-pw"
+    try:
+        s = AppSession(url, a.timeout)
+        if _step(res, "landing", lambda: s.run("landing")) is None: return
+        s.run("register")
+        if _step(res, "register", lambda: s.run("register", [text(s.widget("Email"), email), text(s.widget("Lozinka"), pw),
+                                                              trigger(s.widget("Registruj se"))])) is None: return
+        think(); s.run("login")
+        if _step(res, "login", lambda: s.run("login", [text(s.widget("Email"), email), text(s.widget("Lozinka"), pw),
+                                                        trigger(s.widget("Prijavi se"))])) is None: return
+        for _ in range(a.iterations):
+            think(); _step(res, "home", lambda: s.run("home"))
+            think()
+            if _step(res, "checkin_page", lambda: s.run("checkin")) is not None:
+                labels = [e.label for _, ek, e, _ in s.elements if ek == "slider"]
+                widgets = [slider(s.widget(l, "slider"), rng.randint(0, 3)) for l in labels]
+                _step(res, "checkin_save", lambda: s.run("checkin", widgets + [trigger(s.widget("Sačuvaj današnji check-in"))]))
+            think()
+            if _step(res, "chat_page", lambda: s.run("chat")) is not None:
+                for _ in range(a.chats):
+                    els = _step(res, "chat", lambda: s.run("chat", [chat_input(s.widget(kind="chat_input"), rng.choice(MESSAGES))]))
+                    if els is not None:
+                        t = chat_ttft(els)
+                        if t is None: res.fail("chat_ttft", "bez odgovora")
+                        else:
+                            reply = next((e.body for _, ek, e, p in reversed(els) if ek == "markdown" and e.body.startswith("[Greška")), None)
+                            if reply: res.fail("chat_ttft", reply[:120])
+                            else: res.ok("chat_ttft", t)
+                    think()
+            _step(res, "analytics", lambda: s.run("analytics"))
+    except Exception as e:
+        res.fail("session", e)
+    finally:
+        if s: s.close()
+
+# ---------- Izveštaj ----------
+def pct(xs, p):
+    xs = sorted(xs)
+    if not xs: return 0.0
+    k = (len(xs)-1)*p/100; lo = int(k); hi = min(lo+1, len(xs)-1)
+    return xs[lo] + (xs[hi]-xs[lo])*(k-lo)
+
+def report(res, wall_s, a, mock_stats=None):
+    steps = {}
+    for name in sorted(set(res.lat) | set(res.err)):
+        xs, errs = res.lat.get(name, []), res.err.get(name, 0)
+        n = len(xs) + errs
+        steps[name] = {"count": n, "errors": errs, "error_rate": round(errs/n, 4) if n else 0.0,
+                       "p50_ms": round(pct(xs, 50), 1), "p95_ms": round(pct(xs, 95), 1), "p99_ms": round(pct(xs, 99), 1),
+                       "mean_ms": round(statistics.fmean(xs), 1) if xs else 0.0, "per_s": round(len(xs)/wall_s, 3)}
+    total = sum(len(v) for v in res.lat.values())
+    return {"meta": {"users": a.users, "iterations": a.iterations, "chats": a.chats, "ramp_s": a.ramp_s,
+                     "think_ms": a.think_ms, "wall_s": round(wall_s, 2), "throughput_per_s": round(total/wall_s, 2)},
+            "steps": steps, "error_samples": res.samples, "mock": mock_stats}
+
+def print_report(doc, out=sys.stderr):
+    m = doc["meta"]
+    print(f"\n{m['users']} korisnika · {m['wall_s']} s · {m['throughput_per_s']} koraka/s", file=out)
+    print(f"{'korak':<14}{'n':>7}{'greške':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'/s':>8}", file=out)
+    for k, s in doc["steps"].items():
+        print(f"{k:<14}{s['count']:>7}{s['errors']:>8}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['per_s']:>8.2f}", file=out)
+    if doc.get("mock"): print(f"mock LLM: {doc['mock']}", file=out)
+    for e in doc["error_samples"][:5]: print(f"  ! {e}", file=out)
+
+# ---------- Lokalno pokretanje app + mock ----------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def spawn_app(llm_url, provider, workdir):
+    port = _free_port()
+    env = dict(os.environ, MINDMATE_DB=os.path.join(workdir, "mindmate_db.json"), CHAT_PROVIDER=provider,
+               OLLAMA_HOST=llm_url, OPENAI_BASE_URL=llm_url + "/v1", OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY") or "mock")
+    log = open(os.path.join(workdir, "streamlit.log"), "wb")
+    p = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+                          "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                         env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(120):
+        if p.poll() is not None: raise RuntimeError(f"streamlit se ugasio (log: {log.name})")
+        try:
+            if requests.get(url + "/_stcore/health", timeout=1).ok: return p, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    p.terminate(); raise RuntimeError("streamlit nije odgovorio na /_stcore/health")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="MindMate load test")
+    ap.add_argument("--url", default="http://127.0.0.1:8501", help="pokrenuta app (ignoriše se uz --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="pokreni app (privremena baza) i mock LLM lokalno")
+    ap.add_argument("--provider", choices=("ollama", "openai"), default="ollama", help="backend za --spawn")
+    ap.add_argument("--mock-port", type=int, default=None, help="pokreni samo mock LLM na ovom portu (bez --spawn)")
+    ap.add_argument("--users", type=int, default=10)
+    ap.add_argument("--iterations", type=int, default=1, help="ponavljanja check-in → chat → analitika po sesiji")
+    ap.add_argument("--chats", type=int, default=3, help="poruka po iteraciji")
+    ap.add_argument("--ramp-s", type=float, default=5.0, help="sesije se pokreću ravnomerno u ovom prozoru")
+    ap.add_argument("--think-ms", type=float, default=500, help="max slučajna pauza između koraka")
+    ap.add_argument("--timeout", type=float, default=300, help="max trajanje jednog koraka")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--out", default=None, help="JSON izveštaj")
+    mindmate_mockllm.add_args(ap)
+    a = ap.parse_args(argv)
+
+    mock = app = None
+    url = a.url
+    if a.spawn or a.mock_port is not None:
+        mock = mindmate_mockllm.start(port=a.mock_port or 0, cfg=mindmate_mockllm.config_from_args(a))
+        print(f"mock LLM: http://127.0.0.1:{mock.server_port}", file=sys.stderr)
+    workdir = tempfile.mkdtemp(prefix="mindmate-lt-")
+    try:
+        if a.spawn:
+            app, url = spawn_app(f"http://127.0.0.1:{mock.server_port}", a.provider, workdir)
+            print(f"app: {url} (baza i log u {workdir})", file=sys.stderr)
+        res, rng = Results(), random.Random(a.seed)
+        threads = [threading.Thread(target=session, args=(url, res, i, a, random.Random(rng.random())),
+                                    name=f"lt-{i}", daemon=True) for i in range(a.users)]
+        t0 = time.perf_counter()
+        for i, t in enumerate(threads):
+            t.start()
+            if a.users > 1 and a.ramp_s: time.sleep(a.ramp_s/(a.users-1) if i < a.users-1 else 0)
+        for t in threads: t.join()
+        doc = report(res, time.perf_counter()-t0, a, mock.cfg.stats() if mock else None)
+    finally:
+        if app:
+            app.terminate()
+            try: app.wait(10)
+            except subprocess.TimeoutExpired: app.kill()
+        if mock: mock.shutdown()
+    print_report(doc)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f: json.dump(doc, f, indent=2, ensure_ascii=False)
+    return 1 if any(s["errors"] for s in doc["steps"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
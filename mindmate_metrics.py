@@ -0,0 +1,104 @@
+# mindmate_metrics.py — inkrementalni agregat za landing metrike (bez ponovnog skeniranja istorije)
+import heapq, bisect, itertools, threading
+from collections import deque
+from datetime import datetime, timedelta
+
+WINDOW_DAYS = 30
+RECENT_N    = 12
+_EPOCHS     = itertools.count(1)   # svaki agregat dobija nov broj; id() se posle GC-a može ponoviti
+
+def checkin_total(r):
+    return int(r.get("phq1",0))+int(r.get("phq2",0))+int(r.get("gad1",0))+int(r.get("gad2",0))
+
+def _ts(r):
+    try: return datetime.fromisoformat((r.get("ts") or "").split("+")[0])
+    except Exception: return None
+
+class MetricsAggregator:
+    def __init__(self, window_days=WINDOW_DAYS, recent_n=RECENT_N):
+        self.window = timedelta(days=window_days)
+        self.recent_n = recent_n
+        self.uids = set()
+        self.user_messages = 0
+        self._win = deque()          # (ts, good) sortirano po ts
+        self._win_good = 0
+        self._undated = 0            # check-in bez ispravnog ts — uvek „u prozoru” (kao ranije)
+        self._undated_good = 0
+        self._top = []               # min-heap ((date, ts), seq, rec), najviše recent_n
+        self._seq = 0
+        self.epoch = next(_EPOCHS)   # verzije ispod važe samo uz epohu: nov agregat (reload baze) kreće od 0
+        self._versions = {}          # uid → verzija check-in podataka (ključ za keš analitike)
+        self.version = 0             # raste sa svakim check-in/chat upisom (ključ za keš landing HTML-a)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db, archive=None):
+        m = cls()
+        cutoff = datetime.utcnow()-m.window
+        dated = []
+        for r in db.iter_records("checkins"):
+            m._add_uid(r); m._push_recent(r)
+            t, good = _ts(r), checkin_total(r)<=3
+            if t is None: m._undated += 1; m._undated_good += good
+            elif t >= cutoff: dated.append((t, good))
+        # prozor se sortira jednom; dalje se samo dopunjuje sa desne strane
+        dated.sort(key=lambda x: x[0])
+        m._win.extend(dated); m._win_good = sum(g for _, g in dated)
+        for r in db.iter_records("chat_events"):
+            m._add_uid(r)
+            if r.get("role")=="user": m.user_messages += 1
+        if archive is not None:   # arhivirani chat_events se ne skeniraju — zbirovi su u indeksima segmenata
+            uids, roles = archive.totals()
+            m.uids |= uids; m.user_messages += roles.get("user", 0)
+        return m
+
+    def _add_uid(self, r):
+        uid = r.get("uid","")
+        if uid: self.uids.add(uid)
+
+    def _push_recent(self, r):
+        self._seq += 1
+        item = ((r.get("date",""), r.get("ts","")), self._seq, r)
+        if len(self._top) < self.recent_n: heapq.heappush(self._top, item)
+        elif item[0] >= self._top[0][0]: heapq.heapreplace(self._top, item)
+
+    def observe(self, coll, r):
+        with self._lock:
+            if coll in ("checkins", "chat_events"): self.version += 1
+            if coll == "checkins":
+                self._add_uid(r); self._push_recent(r)
+                uid = r.get("uid","")
+                self._versions[uid] = self._versions.get(uid, 0) + 1
+                good = checkin_total(r)<=3
+                t = _ts(r)
+                if t is None:
+                    self._undated += 1; self._undated_good += good
+                elif not self._win or t >= self._win[-1][0]:
+                    self._win.append((t, good)); self._win_good += good
+                elif t >= datetime.utcnow()-self.window:
+                    # retko: zakasneli upis — ubaci na mesto
+                    lst = list(self._win); bisect.insort(lst, (t, good), key=lambda x: x[0])
+                    self._win = deque(lst); self._win_good += good
+            elif coll == "chat_events":
+                self._add_uid(r)
+                if r.get("role")=="user": self.user_messages += 1
+
+    def _evict(self):
+        cutoff = datetime.utcnow()-self.window
+        while self._win and self._win[0][0] < cutoff:
+            _, good = self._win.popleft(); self._win_good -= good
+
+    def snapshot(self):
+        # (broj korisnika, broj korisničkih poruka, check-in-a u prozoru, od toga „dobrih”)
+        with self._lock:
+            self._evict()
+            return (len(self.uids), self.user_messages,
+                    len(self._win)+self._undated, self._win_good+self._undated_good)
+
+    def checkin_version(self, uid):
+        # (epoha, broj check-in-a uid-a viđenih od izgradnje agregata) — monotono za ceo proces
+        return self.epoch, self._versions.get(uid, 0)
+
+    def latest_checkins(self):
+        with self._lock:
+            return [r for _, _, r in sorted(self._top)]
@@ -0,0 +1,162 @@
+# mindmate_mockllm.py — lokalna zamena za Ollama (/api/chat, /api/generate) i OpenAI (/v1/chat/completions)
+#   python mindmate_mockllm.py --port 11434 --ttft-ms 400 --tps 25 --tokens 120
+#   OLLAMA_HOST=http://127.0.0.1:11434 streamlit run mindmate_app_v41.py
+#   CHAT_PROVIDER=openai OPENAI_API_KEY=x OPENAI_BASE_URL=http://127.0.0.1:11434/v1 streamlit run …
+import json, time, random, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+WORDS = ("pokušaj da tri puta duboko udahneš i primetiš šta osećaš sada mali korak danas je dovoljan "
+         "zapiši jednu misao koja te brine pa je pogledaj sa strane kao prijatelj").split()
+
+class MockConfig:
+    def __init__(self, ttft_ms=300, tps=30.0, tokens=80, jitter=0.2, error_rate=0.0, seed=None, generate_only=False):
+        self.ttft_ms, self.tps, self.tokens = ttft_ms, tps, tokens
+        self.jitter, self.error_rate = jitter, error_rate
+        self.generate_only = generate_only     # stariji Ollama: /api/chat → 404
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests, self.errors, self.inflight, self.max_inflight = {}, 0, 0, 0
+
+    def _j(self, v):
+        with self.lock: return max(0.0, v*(1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    def fail(self):
+        with self.lock: return self.rng.random() < self.error_rate
+
+    def enter(self, path):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.inflight += 1; self.max_inflight = max(self.max_inflight, self.inflight)
+
+    def leave(self):
+        with self.lock: self.inflight -= 1
+
+    def stats(self):
+        with self.lock:
+            return {"requests": dict(self.requests), "errors": self.errors,
+                    "inflight": self.inflight, "max_inflight": self.max_inflight}
+
+    def tokens_stream(self):
+        # (pauza_pre_tokena_s, token); prvi token posle TTFT-a, ostali po tps
+        n = max(1, int(self._j(self.tokens)))
+        gap = 1.0/self.tps if self.tps > 0 else 0.0
+        for i in range(n):
+            with self.lock: w = self.rng.choice(WORDS)
+            yield (self._j(self.ttft_ms/1000) if i == 0 else self._j(gap)), w + ("" if i == n-1 else " ")
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def log_message(self, *a): pass
+
+    @property
+    def cfg(self): return self.server.cfg
+
+    def _json(self, code, obj):
+        b = json.dumps(obj).encode()
+        self.send_response(code); self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(b))); self.end_headers(); self.wfile.write(b)
+
+    def _chunk(self, b):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(b), b)); self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags": return self._json(200, {"models": [{"name": "mock"}]})
+        if self.path == "/_mock/stats": return self._json(200, self.cfg.stats())
+        self._json(200, {"status": "Ollama is running"})
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length", 0))
+        try: body = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError: return self._json(400, {"error": "bad json"})
+        path = self.path.split("?")[0]
+        if self.cfg.generate_only and path == "/api/chat":
+            with self.cfg.lock: self.cfg.requests[path] = self.cfg.requests.get(path, 0) + 1
+            return self._json(404, {"error": "not found"})
+        if path not in ("/api/chat", "/api/generate", "/v1/chat/completions"):
+            return self._json(404, {"error": "not found"})
+        # warm-up/učitavanje modela: prazan prompt ili bez poruka → odmah done
+        if (path == "/api/chat" and not body.get("messages")) or (path == "/api/generate" and not body.get("prompt")):
+            return self._json(200, {"model": body.get("model"), "done": True})
+        self.cfg.enter(path)
+        try:
+            if self.cfg.fail():
+                with self.cfg.lock: self.cfg.errors += 1
+                return self._json(500, {"error": "mock: simulirana greška"})
+            if path == "/v1/chat/completions": self._openai(body)
+            else: self._ollama(path, body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.cfg.leave()
+
+    def _ollama(self, path, body):
+        t0, out = time.perf_counter(), []
+        stream = body.get("stream", True)
+        for pause, tok in self.cfg.tokens_stream():
+            time.sleep(pause); out.append(tok)
+            if not stream: continue
+            if len(out) == 1:
+                self.send_response(200); self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked"); self.end_headers()
+            d = {"message": {"role": "assistant", "content": tok}} if path == "/api/chat" else {"response": tok}
+            self._chunk((json.dumps({**d, "done": False}) + "\n").encode())
+        final = {"done": True, "eval_count": len(out), "eval_duration": int((time.perf_counter()-t0)*1e9)}
+        if path == "/api/generate": final["context"] = list(range(len(out)))
+        if not stream:
+            text = "".join(out)
+            final.update({"message": {"role": "assistant", "content": text}} if path == "/api/chat" else {"response": text})
+            return self._json(200, final)
+        self._chunk((json.dumps(final) + "\n").encode()); self._chunk(b"")
+
+    def _openai(self, body):
+        out = []
+        stream = body.get("stream", False)
+        for pause, tok in self.cfg.tokens_stream():
+            time.sleep(pause); out.append(tok)
+            if not stream: continue
+            if len(out) == 1:
+                self.send_response(200); self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked"); self.end_headers()
+            self._chunk(("data: " + json.dumps({"choices": [{"index": 0, "delta": {"content": tok}}]}) + "\n\n").encode())
+        usage = {"prompt_tokens": 0, "completion_tokens": len(out), "total_tokens": len(out)}
+        if not stream:
+            return self._json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(out)},
+                                                 "finish_reason": "stop"}], "usage": usage})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._chunk(("data: " + json.dumps({"choices": [], "usage": usage}) + "\n\n").encode())
+        self._chunk(b"data: [DONE]\n\n"); self._chunk(b"")
+
+def start(host="127.0.0.1", port=0, cfg=None):
+    # pokreće server u pozadinskoj niti; port=0 → slobodan port (server.server_port)
+    srv = ThreadingHTTPServer((host, port), MockHandler)
+    srv.daemon_threads = True
+    srv.cfg = cfg or MockConfig()
+    threading.Thread(target=srv.serve_forever, name="mindmate-mockllm", daemon=True).start()
+    return srv
+
+def add_args(ap):
+    ap.add_argument("--ttft-ms", type=float, default=300, help="kašnjenje do prvog tokena")
+    ap.add_argument("--tps", type=float, default=30, help="tokena u sekundi")
+    ap.add_argument("--tokens", type=int, default=80, help="dužina odgovora u tokenima")
+    ap.add_argument("--jitter", type=float, default=0.2, help="± udeo slučajnog odstupanja")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="udeo zahteva koji vraćaju 500")
+    ap.add_argument("--generate-only", action="store_true", help="bez /api/chat (404), kao stariji Ollama")
+
+def config_from_args(a):
+    return MockConfig(a.ttft_ms, a.tps, a.tokens, a.jitter, a.error_rate, generate_only=a.generate_only)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="MindMate mock LLM server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    add_args(ap)
+    a = ap.parse_args(argv)
+    srv = ThreadingHTTPServer((a.host, a.port), MockHandler)
+    srv.daemon_threads = True
+    srv.cfg = config_from_args(a)
+    print(f"mock LLM na http://{a.host}:{srv.server_port} (ttft {a.ttft_ms} ms, {a.tps} tok/s, {a.tokens} tokena)")
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
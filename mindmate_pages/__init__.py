@@ -0,0 +1,40 @@
+# mindmate_pages — stranice iza router-a; modul stranice (sa teškim zavisnostima: pandas/plotly, requests)
+# se uvozi tek pri prvoj poseti i ostaje u sys.modules do kraja procesa.
+#   python -m mindmate_pages      — izveštaj: cena uvoza po stranici (svaka u svežem procesu)
+import sys, time, threading, importlib
+from mindmate_telemetry import observe
+
+# stranica → (modul, funkcija)
+PAGES = {
+    "landing":   ("landing",   "render_landing"),
+    "login":     ("auth",      "render_login"),
+    "register":  ("auth",      "render_register"),
+    "home":      ("home",      "render_home"),
+    "chat":      ("chat",      "render_chat"),
+    "checkin":   ("checkin",   "render_checkin"),
+    "analytics": ("analytics", "render_analytics"),
+    "search":    ("search",    "render_search"),
+    "admin":     ("admin",     "render_admin"),
+}
+PROTECTED = {"home","chat","checkin","analytics","search","admin"}
+
+IMPORT_COST = {}   # modul → (ms, broj novih modula) pri prvom uvozu u ovom procesu
+_RENDERERS = {}
+_LOCK = threading.Lock()
+
+def renderer(page):
+    fn = _RENDERERS.get(page)
+    if fn is None:
+        # pod lock-om: druga sesija ne sme da dobije napola inicijalizovan modul iz sys.modules
+        with _LOCK:
+            fn = _RENDERERS.get(page)
+            if fn is None:
+                mod, name = PAGES[page]
+                n, t0 = len(sys.modules), time.perf_counter()
+                m = importlib.import_module(f"{__name__}.{mod}")
+                if mod not in IMPORT_COST:
+                    dt = time.perf_counter()-t0
+                    IMPORT_COST[mod] = (round(dt*1000, 1), len(sys.modules)-n)
+                    observe("mindmate_page_import_seconds", dt, page=mod)
+                fn = _RENDERERS[page] = getattr(m, name)
+    return fn
@@ -0,0 +1,40 @@
+# python -m mindmate_pages — cena uvoza po stranici, svaka u svežem interpreteru (posle `import streamlit`);
+# „teške zavisnosti” su one koje uvoz stranice tek učitava
+import sys, json, subprocess
+from mindmate_pages import PAGES
+
+HEAVY = ("pandas", "numpy", "plotly", "requests")
+
+PROBE = """
+import sys, time, json
+import streamlit
+{pre}
+before = set(sys.modules)
+t0 = time.perf_counter()
+import {target}
+ms, new = (time.perf_counter()-t0)*1000, set(sys.modules)-before
+print(json.dumps({{"ms": ms, "modules": len(new), "heavy": [h for h in {heavy!r} if h in new]}}))
+"""
+
+SHELL = "mindmate_core, mindmate_llm, mindmate_scheduler, mindmate_telemetry, mindmate_pages.common, mindmate_pages.navbar"
+
+def measure(target, pre="", runs=3):
+    best = None
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(target=target, pre=pre, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+        r = json.loads(out)
+        if best is None or r["ms"] < best["ms"]: best = r
+    return best
+
+def main():
+    # ljuska se meri posle `import streamlit`, stranice posle ljuske (dodatna cena prve posete)
+    rows = [("app shell", SHELL, "")]
+    rows += [(page, f"mindmate_pages.{mod}", f"import {SHELL}") for page, (mod, _) in PAGES.items()]
+    print(f"{'stranica':<11}{'ms':>9}{'modula':>8}  teške zavisnosti")
+    for page, target, pre in rows:
+        r = measure(target, pre)
+        print(f"{page:<11}{r['ms']:>9.1f}{r['modules']:>8}  {', '.join(r['heavy']) or '—'}")
+
+if __name__ == "__main__":
+    main()
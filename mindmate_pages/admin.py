@@ -0,0 +1,32 @@
+# mindmate_pages/admin.py — angažovanje svih korisnika (samo MINDMATE_ADMINS); brojevi iz mindmate_engagement
+import streamlit as st
+from mindmate_core import engagement, crisis_events
+from mindmate_analytics import engagement_figures
+from mindmate_pages.common import is_admin
+
+def _pct(x): return "—" if x is None else f"{100*x:.0f}%"
+
+def render_admin():
+    st.subheader("🛠️ Angažovanje")
+    if not is_admin():
+        st.error("Ova stranica je dostupna samo administratorima."); return
+    e = engagement()
+    s = e.summary()
+    c = st.columns(4)
+    c[0].metric("DAU", s["dau"]); c[1].metric("WAU", s["wau"]); c[2].metric("MAU", s["mau"])
+    c[3].metric("DAU/MAU", _pct(s["stickiness"]))
+    c = st.columns(4)
+    c[0].metric("Retencija D1", _pct(s["retention"][1])); c[1].metric("Retencija D7", _pct(s["retention"][7]))
+    c[2].metric("Retencija D30", _pct(s["retention"][30])); c[3].metric("MAU → MAU", _pct(s["mau_retention"]))
+    c = st.columns(4)
+    c[0].metric("Check-in (30 d)", s["checkins_30d"]); c[1].metric("Skor ≤ 3", _pct(s["satisfaction"]))
+    c[2].metric("Aktivni streak-ovi", s["streak_users"]); c[3].metric("Najduži streak", f"{s['streak_max']} d")
+    for fig in engagement_figures(e.dau_series(90), e.cohorts(8), s):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption("Retencija DN: korisnici stari bar N dana koji su bili aktivni N ili više dana posle prve aktivnosti. "
+               "Aktivnost = check-in ili poruka u chatu (UTC dani).")
+    st.markdown("#### 🆘 Krizni signali")
+    hits = crisis_events(50)
+    if hits: st.dataframe([{"vreme (UTC)": r.get("ts","")[:16].replace("T"," "), "uid": r.get("uid"), "izrazi": r.get("terms"), "režim": r.get("mode")} for r in hits],
+                          use_container_width=True, hide_index=True)
+    else: st.caption("Nema pogodaka kriznog filtera.")
@@ -0,0 +1,27 @@
+# mindmate_pages/analytics.py — trendovi po korisniku; jedina stranica koja vuče numpy/plotly (mindmate_analytics)
+from datetime import date
+import streamlit as st
+from mindmate_core import checkin_rollup, metrics
+from mindmate_analytics import rollup_figures
+from mindmate_pages.common import get_or_create_uid
+
+# opseg → broj dana (None = sve); granulaciju bira checkin_rollup (najkrupniji zbir sa dovoljno tačaka)
+RANGES = {"30 dana": 30, "90 dana": 90, "6 meseci": 182, "Godina": 365, "Sve": None}
+
+# Figure se grade jednom po (uid, verzija, opseg, dan); verzija = (epoha agregata, check-in-a tog korisnika),
+# pa ni reload baze (nov agregat, brojači od nule) ne vraća stare figure
+@st.cache_resource(max_entries=256)
+def _analytics_figures(uid, version, days, today):
+    grain, rows, hours = checkin_rollup(uid, days)
+    return rollup_figures(grain, rows, hours) if rows else []
+
+def render_analytics():
+    st.subheader("📈 Analitika")
+    uid=get_or_create_uid()
+    label=st.radio("Period", list(RANGES), index=len(RANGES)-1, horizontal=True, key="analytics_range")
+    figs=_analytics_figures(uid, metrics().checkin_version(uid), RANGES[label], date.today().isoformat())
+    if not figs:
+        st.info("Još nema podataka. Uradi prvi check-in." if label == "Sve" else "Nema check-in-a u ovom periodu.")
+        return
+    for fig in figs:
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,62 @@
+# mindmate_pages/assets.py — HTML šabloni sa slotovima + statički CSS/JS
+# Šablon se jednom po procesu podeli na delove između slotova (__IME__), pa je render jedan join umesto
+# niza str.replace prolaza; gotov HTML se kešira po ključu (verzija metrika, prijava…).
+# CSS/JS iz static/ (pored app fajla) ide kao <link>/<script src> sa ?v=<hash sadržaja>: uz
+# server.enableStaticServing (.streamlit/config.toml) pregledač ga preuzme jednom i dalje proverava ETag,
+# a rerun šalje samo tag. Bez static serving-a sadržaj se umeće inline, kao ranije.
+import os, re, html, hashlib, threading
+from collections import OrderedDict
+import streamlit as st
+
+STATIC_DIR   = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_URL   = "app/static/"
+RENDER_CACHE = int(os.environ.get("MINDMATE_RENDER_CACHE", "16"))   # renderovanih varijanti po šablonu
+
+class Template:
+    def __init__(self, text, slots):
+        # delovi teksta između slotova; nepoznati __X__ ostaju tekst
+        rx = re.compile("__(" + "|".join(map(re.escape, slots)) + ")__")
+        self.parts, self.slots, pos = [], [], 0
+        for m in rx.finditer(text):
+            self.parts.append(text[pos:m.start()]); self.slots.append(m.group(1)); pos = m.end()
+        self.parts.append(text[pos:])
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, values):
+        out = [self.parts[0]]
+        for name, part in zip(self.slots, self.parts[1:]): out += (values[name], part)
+        return "".join(out)
+
+    def cached(self, key, make):
+        # make() → {slot: str}; poziva se samo kad ključ nije u kešu
+        with self._lock:
+            out = self._cache.get(key)
+            if out is not None: self._cache.move_to_end(key); return out
+        out = self.render(make())
+        with self._lock:
+            self._cache[key] = out
+            while len(self._cache) > RENDER_CACHE: self._cache.popitem(last=False)
+        return out
+
+_ASSETS = {}   # ime → (sadržaj, verzija)
+
+def asset(name):
+    a = _ASSETS.get(name)
+    if a is None:
+        with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f: text = f.read()
+        a = _ASSETS[name] = (text, hashlib.sha1(text.encode("utf-8")).hexdigest()[:12])
+    return a
+
+def _static_serving():
+    try: return bool(st.get_option("server.enableStaticServing"))
+    except Exception: return False
+
+def asset_tag(name):
+    # <link>/<script> za fajl iz static/; inline <style>/<script> kad server ne servira static/
+    text, ver = asset(name)
+    js = name.endswith(".js")
+    if _static_serving():
+        url = html.escape(f"{STATIC_URL}{name}?v={ver}")
+        return f'<script src="{url}" defer></script>' if js else f'<link rel="stylesheet" href="{url}">'
+    return f"<script>\n{text}</script>" if js else f"<style>\n{text}</style>"
@@ -0,0 +1,143 @@
+# mindmate_pages/auth.py — LOGIN / REGISTER — Apple/Kendo style (LOGIN_CSS se gradi jednom po procesu)
+import streamlit as st
+from mindmate_core import register_user, authenticate
+from mindmate_pages.common import safe_rerun
+
+LOGIN_CSS = """
+<style>
+/* full-page gradient + grain */
+.mm-auth-bg{
+  position:fixed; inset:0; z-index:-1;
+  background:
+    radial-gradient(1200px 600px at 20% -10%, #7C5CFF10, transparent 55%),
+    radial-gradient(1200px 600px at 80% 110%, #4EA3FF10, transparent 55%),
+    linear-gradient(180deg, #0B0D12 0%, #0C1016 100%);
+}
+.mm-auth-bg:after{
+  content:""; position:absolute; inset:0;
+  background-image:url('data:image/svg+xml;utf8,\
+  <svg xmlns="http://www.w3.org/2000/svg" width="160" height="160" viewBox="0 0 160 160">\
+  <filter id="n"><feTurbulence type="fractalNoise" baseFrequency="0.8" numOctaves="4" stitchTiles="stitch"/></filter>\
+  <rect width="160" height="160" filter="url(%23n)" opacity="0.04"/></svg>');
+  background-size:160px 160px; mix-blend-mode:overlay; pointer-events:none;
+}
+/* center wrapper */
+.mm-auth-wrap{max-width:960px;margin:6vh auto 4vh;}
+.mm-auth-card{
+  display:grid; grid-template-columns:1fr 1fr; gap:0; overflow:hidden;
+  border-radius:20px; border:1px solid var(--ring); background:#0F1219; box-shadow:0 30px 80px rgba(0,0,0,.45);
+}
+.mm-auth-left{padding:28px 28px 24px}
+.mm-auth-right{
+  position:relative; min-height:520px; display:flex; align-items:flex-end; color:#C7CEDA;
+  background:
+    linear-gradient(0deg, rgba(11,13,18,.55), rgba(11,13,18,.55)),
+    url('https://images.unsplash.com/photo-1520975892533-01adf8d46a49?q=80&w=1200&auto=format&fit=crop') center/cover no-repeat;
+}
+.mm-auth-right .inner{padding:22px}
+.mm-logo{display:flex;align-items:center;gap:10px;font-weight:900}
+.mm-dot{width:12px;height:12px;border-radius:50%;background:linear-gradient(90deg,var(--g1),var(--g2));box-shadow:0 0 16px #7C5CFF66}
+.mm-title{font-size:22px;font-weight:900;margin:8px 0 2px}
+.mm-sub{color:#A7B0BE;margin-bottom:14px}
+.mm-sep{height:1px;background:rgba(255,255,255,.08);margin:14px 0}
+
+/* streamlit controls restyle */
+.mm-auth-left .stTextInput>div>div>input{
+  background:#0E131A; border:1px solid var(--ring); color:var(--ink);
+  height:44px; border-radius:12px;
+}
+.mm-auth-left .stTextInput>label{font-weight:700;color:#D5DAE4}
+.mm-auth-left .stButton>button{
+  width:100%; height:46px; border-radius:12px; font-weight:800;
+  background:linear-gradient(90deg,var(--g1),var(--g2))!important; color:#0B0D12!important; border:none!important;
+}
+.mm-foot{color:#9AA3B2;text-align:center;margin-top:14px}
+@media (max-width:900px){
+  .mm-auth-card{grid-template-columns:1fr}
+  .mm-auth-right{min-height:220px}
+}
+</style>
+<div class="mm-auth-bg"></div>
+"""
+
+def render_login():
+    st.markdown(LOGIN_CSS, unsafe_allow_html=True)
+    st.markdown('<div class="mm-auth-wrap">', unsafe_allow_html=True)
+    st.markdown('<div class="mm-auth-card">', unsafe_allow_html=True)
+
+    # LEFT: form
+    st.markdown('<div class="mm-auth-left">', unsafe_allow_html=True)
+    st.markdown('<div class="mm-logo"><div class="mm-dot"></div><div>MindMate</div></div>', unsafe_allow_html=True)
+    st.markdown('<div class="mm-title">Prijava u nalog</div>', unsafe_allow_html=True)
+    st.markdown('<div class="mm-sub">Prijavi se da nastaviš ka svojoj kontrolnoj tabli.</div>', unsafe_allow_html=True)
+    with st.form("login_form"):
+        email = st.text_input("Email", key="login_email")
+        pw    = st.text_input("Lozinka", type="password", key="login_pw")
+        st.markdown('<div class="mm-sep"></div>', unsafe_allow_html=True)
+        ok = st.form_submit_button("Prijavi se")
+    st.markdown('Nemaš nalog? 👉 [Registracija](?register)', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)  # close left
+
+    # RIGHT: image + quote
+    st.markdown('<div class="mm-auth-right"><div class="inner">', unsafe_allow_html=True)
+    st.write("**„Mikro-navike su nam porasle, a tim je samouvereniji.** MindMate nam je pomogao da izgradimo ritam i lakše prepoznamo obrasce.”")
+    st.caption("— Kody, korisnik MindMate-a")
+    st.markdown('</div></div>', unsafe_allow_html=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)   # card
+    st.markdown('<div class="mm-foot">© 2025 MindMate. Nije medicinski alat. Za hitne slučajeve — 112.</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)   # wrap
+
+    if ok:
+        if authenticate(email.strip(), pw):
+            st.session_state.auth_ok = True
+            st.session_state.auth_email = email.strip()
+            st.session_state.pop("uid", None)
+            st.session_state.page = "home"
+            st.query_params.clear(); st.query_params["home"] = ""
+            st.success("Dobrodošao/la! Preusmeravam…")
+            safe_rerun()
+        else:
+            st.error("Pogrešan email ili lozinka.")
+
+def render_register():
+    st.markdown(LOGIN_CSS, unsafe_allow_html=True)
+    st.markdown('<div class="mm-auth-wrap">', unsafe_allow_html=True)
+    st.markdown('<div class="mm-auth-card">', unsafe_allow_html=True)
+
+    # LEFT: form
+    st.markdown('<div class="mm-auth-left">', unsafe_allow_html=True)
+    st.markdown('<div class="mm-logo"><div class="mm-dot"></div><div>MindMate</div></div>', unsafe_allow_html=True)
+    st.markdown('<div class="mm-title">Kreiraj nalog</div>', unsafe_allow_html=True)
+    st.markdown('<div class="mm-sub">Potreban je samo email i lozinka.</div>', unsafe_allow_html=True)
+    with st.form("register_form"):
+        email = st.text_input("Email", key="reg_email")
+        pw    = st.text_input("Lozinka", type="password", key="reg_pw")
+        st.markdown('<div class="mm-sep"></div>', unsafe_allow_html=True)
+        ok = st.form_submit_button("Registruj se")
+    st.markdown('Već imaš nalog? 👉 [Prijava](?login)', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)  # close left
+
+    # RIGHT: image + quote
+    st.markdown('<div class="mm-auth-right"><div class="inner">', unsafe_allow_html=True)
+    st.write("**„Od kako sam dodala 5-min check-in, jasno vidim kada posustanem.”** Grafovi i male akcije prave razliku.")
+    st.caption("— Mila, korisnica MindMate-a")
+    st.markdown('</div></div>', unsafe_allow_html=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)   # card
+    st.markdown('<div class="mm-foot">© 2025 MindMate. Nije medicinski alat. Za hitne slučajeve — 112.</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)   # wrap
+
+    if ok:
+        if not email or not pw:
+            st.error("Unesi email i lozinku.")
+        else:
+            ok2, msg = register_user(email.strip(), pw)
+            if ok2:
+                st.success("Registracija uspešna. Uloguj se.")
+                st.session_state.page = "login"
+                st.query_params.clear(); st.query_params["login"] = ""
+                safe_rerun()
+            else:
+                st.error(msg)
+
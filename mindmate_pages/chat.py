@@ -0,0 +1,132 @@
+# mindmate_pages/chat.py — chat sa streaming odgovorom; LLM backend (requests) se uvozi tek sa ovom stranicom
+import os, uuid
+import streamlit as st
+from datetime import datetime
+from mindmate_core import _get_db, save_chat_event, chat_page, log_crisis_hit
+from mindmate_llm import CHAT_PROVIDER, OLLAMA_MODEL, OPENAI_MODEL, chat_stream, router
+from mindmate_context import ContextManager
+from mindmate_crisis import CRISIS_MODE, CRISIS_RESPONSE, scan as crisis_scan
+from mindmate_scheduler import get_scheduler, QueueFull, QueueTimeout
+from mindmate_store import StoreError
+from mindmate_pages.common import SYSTEM_PROMPT, get_or_create_uid
+
+# Istorija: učitava se po stranicama (najnovija prva); kao balončići se crtaju samo poslednjih CHAT_WINDOW
+# poruka, starije idu u sklopive grupe po danu sa jednim (keširanim) markdown blokom po grupi
+CHAT_PAGE   = int(os.environ.get("MINDMATE_CHAT_PAGE", "30"))
+CHAT_WINDOW = int(os.environ.get("MINDMATE_CHAT_WINDOW", "20"))
+
+# Budžet tokena po promptu: najnovije poruke + rolling sažetak starijih (po uid-u, trajno u "summaries")
+@st.cache_resource
+def _context():
+    def load(uid): return (_get_db().latest_summary(uid) or {}).get("content")
+    def persist(uid, text): _get_db().append("summaries", {"uid":uid, "ts":datetime.utcnow().isoformat(), "content":text})
+    def summarize(msgs):
+        # sažimanje ide kroz isti red kao chat (poseban „uid”, fer deljenje), ali direktno kroz ruter:
+        # greška backend-a je izuzetak (sažetak ostaje stari), ne tekst poruke koji bi postao sažetak
+        return "".join(get_scheduler(CHAT_PROVIDER).run("__summary__", lambda: router().stream(msgs))).strip()
+    return ContextManager(summarize, load, persist)
+
+CONTEXT = _context()
+
+def _ctx_sid(): return st.session_state.setdefault("ctx_sid", uuid.uuid4().hex)
+
+def _save(uid, role, text, stats=None):
+    # razgovor ide dalje i kad disk ne prima upise; korisnik vidi upozorenje
+    try: save_chat_event(uid, role, text, stats)
+    except StoreError: st.warning("Poruka trenutno ne može da se sačuva — pokušavamo ponovo u pozadini.")
+
+def chat_reply_stream(sys, log, stats=None, uid=None, on_wait=None):
+    if uid: msgs=CONTEXT.build(uid, sys, log, _ctx_sid())
+    else: msgs=[{"role":"system","content":sys}] + [{"role":r,"content":m} for r,m in log]
+    session = f"{uid}:{_ctx_sid()}" if uid else None
+    # max N generacija istovremeno po provajderu; ostali čekaju u fer redu (QueueFull kad je pun)
+    return get_scheduler(CHAT_PROVIDER).run(uid or "anon", lambda: chat_stream(msgs, stats, session), on_wait)
+
+def chat_reply(sys, log, uid=None):
+    return "".join(chat_reply_stream(sys, log, uid=uid)).strip()
+
+def write_stream(gen):
+    if hasattr(st, "write_stream"):
+        out = st.write_stream(gen)
+        return out if isinstance(out, str) else "".join(map(str, out))
+    ph, out = st.empty(), ""
+    for chunk in gen:
+        out += chunk; ph.markdown(out + "▌")
+    ph.markdown(out)
+    return out
+
+def _history(uid):
+    # {"msgs": [(uloga, tekst, ts)], "before": ts najstarije učitane, "done": nema starijih, "md": keš grupa}
+    h = st.session_state.get("chat_hist")
+    if h is None or h["uid"] != uid:
+        rows = chat_page(uid, None, CHAT_PAGE)
+        h = st.session_state.chat_hist = {"uid": uid, "msgs": [(r.get("role"), r.get("content",""), r.get("ts","")) for r in rows],
+                                          "before": rows[0]["ts"] if rows else None, "done": len(rows) < CHAT_PAGE, "md": {}}
+    return h
+
+def _load_older(h):
+    rows = chat_page(h["uid"], h["before"], CHAT_PAGE)
+    h["msgs"][:0] = [(r.get("role"), r.get("content",""), r.get("ts","")) for r in rows]
+    if rows: h["before"] = rows[0]["ts"]
+    h["done"] = len(rows) < CHAT_PAGE
+
+def _day_md(h, day, msgs):
+    # keš po danu, ključ (broj, poslednji ts): grupa se ponovo spaja samo kad joj stignu nove poruke
+    key = (len(msgs), msgs[-1][2])
+    hit = h["md"].get(day)
+    if hit is None or hit[0] != key:
+        hit = h["md"][day] = (key, "\n\n".join(f"**{'Ti' if r=='user' else 'MindMate'}** · {ts[11:16]}  \n{m}" for r, m, ts in msgs))
+    return hit[1]
+
+def _remember(h, role, text):
+    h["msgs"].append((role, text, datetime.utcnow().isoformat()))
+
+def _crisis(uid, hits):
+    # resursi se prikazuju odmah (pre LLM-a) i ostaju na vrhu chata do kraja sesije
+    st.session_state.crisis = True
+    st.error(CRISIS_RESPONSE, icon="🆘")
+    try: log_crisis_hit(uid, hits, CRISIS_MODE)
+    except StoreError: pass
+
+def render_history(h):
+    if not h["done"]: st.button("⬆️ Učitaj starije poruke", key="chat_older", on_click=_load_older, args=(h,))
+    msgs = h["msgs"]
+    cut = max(0, len(msgs) - CHAT_WINDOW)
+    days = {}
+    for m in msgs[:cut]: days.setdefault(m[2][:10], []).append(m)
+    for day, group in days.items():
+        with st.expander(f"🗓️ {day} · {len(group)} poruka"): st.markdown(_day_md(h, day, group))
+    for role, msg, _ in msgs[cut:]:
+        with st.chat_message(role): st.markdown(msg)
+
+def render_chat():
+    st.subheader("💬 Chat")
+    st.caption(f"Backend: {CHAT_PROVIDER.upper()} | Model: {OLLAMA_MODEL if CHAT_PROVIDER=='ollama' else OPENAI_MODEL}")
+    uid=get_or_create_uid()
+    h=_history(uid)
+    if st.session_state.get("crisis"): st.error(CRISIS_RESPONSE, icon="🆘")
+    render_history(h)
+    user=st.chat_input("Upiši poruku…")
+    if user:
+        hits=crisis_scan(user)
+        st.session_state.chat_log.append(("user",user)); _save(uid,"user",user); _remember(h,"user",user)
+        with st.chat_message("user"): st.markdown(user)
+        if hits:
+            _crisis(uid, hits)
+            if CRISIS_MODE=="skip":   # bez LLM-a: resursi su odgovor
+                st.session_state.chat_log.append(("assistant",CRISIS_RESPONSE)); _save(uid,"assistant",CRISIS_RESPONSE); _remember(h,"assistant",CRISIS_RESPONSE)
+                return
+        with st.chat_message("assistant"):
+            stats={}; wait_ph=st.empty()
+            def on_wait(pos, eta):
+                if pos: wait_ph.info(f"⏳ U redu si: {pos}. mesto · procena ~{eta:.0f} s")
+                else: wait_ph.empty()
+            try:
+                reply=write_stream(chat_reply_stream(SYSTEM_PROMPT, st.session_state.chat_log, stats, uid, on_wait)).strip()
+            except (QueueFull, QueueTimeout):
+                wait_ph.empty()
+                st.warning("MindMate je trenutno preopterećen. Pokušaj ponovo za minut — tvoja poruka je sačuvana.")
+                return
+            st.session_state.chat_log.append(("assistant",reply)); _save(uid,"assistant",reply,stats); _remember(h,"assistant",reply)
+            CONTEXT.maintain(uid, SYSTEM_PROMPT, st.session_state.chat_log, _ctx_sid())
+            if stats.get("tokens"): st.caption(f"TTFT {stats['ttft_ms']:.0f} ms · {stats['tps']:.1f} tok/s · {stats.get('backend','')}")
@@ -0,0 +1,24 @@
+# mindmate_pages/checkin.py — dnevni check-in (PHQ-2/GAD-2)
+import streamlit as st
+from mindmate_core import save_checkin, engagement
+from mindmate_store import StoreError
+from mindmate_pages.common import get_or_create_uid
+
+def render_checkin():
+    st.subheader("🗓️ Daily Check-in"); st.caption("PHQ-2/GAD-2 inspirisano, nije dijagnoza.")
+    c1,c2=st.columns(2)
+    with c1:
+        phq1=st.slider("Gubitak interesovanja / zadovoljstva",0,3,0)
+        phq2=st.slider("Potištenost / tuga / beznađe",0,3,0)
+    with c2:
+        gad1=st.slider("Nervoza / anksioznost / napetost",0,3,0)
+        gad2=st.slider("Teško prestajem da brinem",0,3,0)
+    notes=st.text_area("Napomene (opciono)")
+    if st.button("Sačuvaj današnji check-in", use_container_width=True):
+        try:
+            save_checkin(get_or_create_uid(), phq1,phq2,gad1,gad2, notes); st.success("✅ Zabeleženo!")
+        except StoreError:
+            st.error("Check-in je primljen, ali upis u bazu trenutno ne uspeva — pokušavamo ponovo u pozadini.")
+    current, longest = engagement().user_streak(get_or_create_uid())
+    if current: st.caption(f"🔥 Streak: {current} {'dan' if current % 10 == 1 and current % 100 != 11 else 'dana'} zaredom · najduži {longest}")
+
@@ -0,0 +1,35 @@
+# mindmate_pages/common.py — zajednički UI helperi (rerun, navigacija, auth guard, uid) za sve stranice
+import os
+import streamlit as st
+from mindmate_core import uid_for_email
+
+# email-ovi sa pristupom admin stranici (zarezom odvojeni)
+ADMINS = {e.strip().casefold() for e in os.environ.get("MINDMATE_ADMINS", "").split(",") if e.strip()}
+
+SYSTEM_PROMPT = (
+    "Ti si MindMate — AI mentalni wellness asistent na srpskom. "
+    "Empatičan, jasan i praktičan (CBT/ACT/mindfulness). "
+    "Nema dijagnostike/preskripcije. Rizik → 112 i stručna pomoć. "
+    "Daj mikro-korake (5–10min) i traži kratke update-e."
+)
+
+def safe_rerun():
+    if hasattr(st, "rerun"): st.rerun()
+    else: st.experimental_rerun()
+
+def goto(p): st.session_state.page=p; safe_rerun()
+
+def require_auth_guard(target_page_key:str):
+    if not st.session_state.get("auth_ok", False):
+        st.session_state.page = "login"
+        safe_rerun()
+        return False
+    return True
+
+def get_or_create_uid():
+    if "uid" not in st.session_state:
+        st.session_state.uid = uid_for_email(st.session_state.get("auth_email",""))
+    return st.session_state.uid
+
+def is_admin():
+    return st.session_state.get("auth_ok", False) and st.session_state.get("auth_email","").strip().casefold() in ADMINS
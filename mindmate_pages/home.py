@@ -0,0 +1,28 @@
+# mindmate_pages/home.py — kontrolna tabla
+import streamlit as st
+from mindmate_core import export_user
+from mindmate_pages.common import goto, is_admin, get_or_create_uid
+
+EXPORT_MIME = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def render_home():
+    st.markdown("### Tvoja kontrolna tabla")
+    c1,c2,c3=st.columns(3)
+    with c1:
+        st.write("**Chat** — AI na srpskom, praktičan i podržavajući.")
+        if st.button("Otvori chat →", use_container_width=True): goto("chat")
+    with c2:
+        st.write("**Check-in** — 2 pitanja + mikro-ciljevi i streak.")
+        if st.button("Idi na check-in →", use_container_width=True): goto("checkin")
+    with c3:
+        st.write("**Analitika** — trendovi i talasne linije napretka.")
+        if st.button("Vidi trendove →", use_container_width=True): goto("analytics")
+    if st.button("🔎 Pretraži beleške i razgovore"): goto("search")
+    if is_admin() and st.button("🛠️ Angažovanje (admin)"): goto("admin")
+    with st.expander("📦 Preuzmi svoje podatke"):
+        st.caption("Check-in-ovi, razgovori (i arhivirani), sažeci i nalog (bez lozinke).")
+        fmt = st.radio("Format", ("ndjson", "csv"), horizontal=True, key="export_fmt")
+        uid, email = get_or_create_uid(), st.session_state.get("auth_email", "")
+        # fajl se pravi tek na klik, ne pri svakom rerun-u stranice
+        st.download_button("⬇️ Preuzmi", lambda: "".join(export_user(uid, email, fmt)).encode("utf-8"),
+                           file_name=f"mindmate_{uid}.{fmt}", mime=EXPORT_MIME[fmt], key="export_dl")
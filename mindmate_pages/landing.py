@@ -0,0 +1,24 @@
+# mindmate_pages/landing.py — LANDING (cta → login); HTML šablon je konstanta modula (učitava se jednom po procesu)
+import json
+from streamlit.components.v1 import html as st_html
+import streamlit as st
+from mindmate_core import compute_metrics, compute_trend_series, metrics_version
+from mindmate_pages.assets import Template
+
+# (NE MENJAM – isti kao u tvom kodu, skraćen radi prostora)
+LANDING = """<html>...SAV TVOJ LANDING KOD OVDE IZOSTAVLJEN RADI DUŽINE...
+"""  # <-- ostavi tvoj originalni LANDING iz poruke; radi skraćenja ovde je izostavljen
+
+# slotovi se nalaze jednom po procesu; HTML se pravi iznova tek kad se metrike promene
+LANDING_T = Template(LANDING, ("SESS", "USERS", "SAT", "RET", "X_LABELS", "P_SERIES", "M_SERIES"))
+
+def _values():
+    users, sessions, sat, retention = compute_metrics()
+    labels, prod, mood = compute_trend_series()
+    return {"SESS": str(max(sessions,0)), "USERS": str(max(users,1)),
+            "SAT": str(max(min(sat,100),0)), "RET": str(max(min(retention,100),0)),
+            "X_LABELS": json.dumps(labels), "P_SERIES": json.dumps(prod), "M_SERIES": json.dumps(mood)}
+
+def render_landing():
+    html = LANDING_T.cached((metrics_version(), bool(st.session_state.get("auth_ok", False))), _values)
+    st_html(html, height=5200, width=1280, scrolling=True)
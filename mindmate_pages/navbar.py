@@ -0,0 +1,38 @@
+# mindmate_pages/navbar.py — NAV (Apple-style, veća opacity); HTML se sklapa jednom po procesu (2 varijante)
+import streamlit as st
+from mindmate_pages.assets import Template, asset_tag
+
+NAVBAR = """__ASSETS__
+<div class="mm-nav">
+  <div class="mm-bar" id="mmBar">
+    <div class="mm-inner">
+      <a class="mm-brand" href="?landing"><div class="mm-dot"></div><div>MindMate</div></a>
+      <button class="mm-toggle" id="mmToggle" aria-label="Open menu" aria-expanded="false" aria-controls="mmMenu">
+        <span></span><span></span><span></span>
+      </button>
+      <nav class="mm-menu" id="mmMenu" aria-label="Glavna navigacija">
+        <div class="mm-links" id="mmLinks">
+          <a class="mm-link" href="?landing" data-page="landing">Welcome</a>
+          <a class="mm-link" href="?home" data-page="home">Početna</a>
+          <a class="mm-link" href="?chat" data-page="chat">Chat</a>
+          <a class="mm-link" href="?checkin" data-page="checkin">Check-in</a>
+          <a class="mm-link" href="?analytics" data-page="analytics">Analitika</a>
+          <a class="mm-link" href="?search" data-page="search">Pretraga</a>
+          <span class="mm-indicator" id="mmIndicator" aria-hidden="true"></span>
+        </div>
+        <a class="mm-cta" href="__CTA_HREF__">__CTA_LABEL__</a>
+      </nav>
+    </div>
+  </div>
+</div>
+"""
+
+# CSS/JS su statički fajlovi (static/mindmate_navbar.*); varijanta zavisi samo od prijave → dve po procesu
+NAVBAR_T = Template(NAVBAR, ("CTA_HREF", "CTA_LABEL", "ASSETS"))
+CTA = {True: ("?logout=1", "Izloguj se"), False: ("?login", "Prijava")}
+
+def render_navbar():
+    auth = bool(st.session_state.get("auth_ok", False))
+    html = NAVBAR_T.cached(auth, lambda: {"CTA_HREF": CTA[auth][0], "CTA_LABEL": CTA[auth][1],
+                                          "ASSETS": asset_tag("mindmate_navbar.css") + asset_tag("mindmate_navbar.js")})
+    st.markdown(html, unsafe_allow_html=True)
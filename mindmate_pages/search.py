@@ -0,0 +1,40 @@
+# mindmate_pages/search.py — pretraga sopstvenih beleški i razgovora („kad sam pisao o snu?”)
+import time
+import streamlit as st
+from mindmate_core import search_history
+from mindmate_search import parse_query
+from mindmate_crisis import normalize
+from mindmate_pages.common import get_or_create_uid
+
+KIND_LABEL = {"note": "📝 Beleška iz check-in-a", "user": "💬 Ti", "assistant": "🤖 MindMate"}
+
+def _snippet(text, clauses, before=12, after=28):
+    # isečak oko prvog pogotka, pogođene reči podebljane
+    terms = {v for k, v in clauses if k == "term"} | {t for k, v in clauses if k == "phrase" for t in v}
+    prefixes = tuple(v for k, v in clauses if k == "prefix")
+    words = text.split()
+    hit = [any(t in terms or t.startswith(prefixes) for t in normalize(w).split()) for w in words]
+    j = hit.index(True) if True in hit else 0
+    lo, hi = max(0, j-before), min(len(words), j+after)
+    out = " ".join(f"**{w}**" if h else w for w, h in zip(words[lo:hi], hit[lo:hi]))
+    return ("… " if lo else "") + out + (" …" if hi < len(words) else "")
+
+def render_search():
+    st.subheader("🔎 Pretraga")
+    st.caption('Reči moraju sve da se pojave · "tačna fraza" · spav* nalazi spavanje, spavam… · bez obzira na ćirilicu i kvačice')
+    q = st.text_input("Šta tražiš?", key="search_q", placeholder='npr. san, "ne mogu da spavam", posao*')
+    c1, c2, c3 = st.columns([1, 1, 1])
+    since = c1.date_input("Od", value=None, key="search_since", format="DD.MM.YYYY")
+    until = c2.date_input("Do", value=None, key="search_until", format="DD.MM.YYYY")
+    with c3:
+        st.write(""); replies = st.checkbox("I odgovori MindMate-a", key="search_replies")
+    if not q.strip(): return
+    kinds = ("note", "user", "assistant") if replies else ("note", "user")
+    t0 = time.perf_counter()
+    hits = search_history(get_or_create_uid(), q, since.isoformat() if since else None,
+                          until.isoformat() if until else None, kinds, limit=30)
+    ms = 1000*(time.perf_counter()-t0)
+    st.caption(f"{len(hits)} {'pogodak' if len(hits) % 10 == 1 and len(hits) % 100 != 11 else 'pogodaka'} · {ms:.1f} ms")
+    clauses = parse_query(q)
+    for h in hits:
+        st.markdown(f"**{h['ts'][:10]}** · {KIND_LABEL.get(h['kind'], h['kind'])}  \n{_snippet(h['text'], clauses)}")
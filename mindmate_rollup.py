@@ -0,0 +1,285 @@
+# mindmate_rollup.py — zbirovi check-in-a po danu, nedelji i mesecu, po korisniku i ukupno
+#   python mindmate_rollup.py rebuild [--db URL]           — izgradi iznova iz sirovih zapisa (bez učitavanja baze)
+#   python mindmate_rollup.py show UID|* [--grain week] [--days 365]
+# Kofa = [broj, Σ ukupnog skora, min, max, Σphq1, Σphq2, Σgad1, Σgad2] — sabira se, pa se svaki upis
+# dodaje u O(1) (save_checkin, tuđi upisi preko sync-a), a dugi opsezi čitaju ≤ ~100 kofa umesto svih zapisa.
+# Snimak: <baza>.rollup.json.gz (wm = najveći ts, tail = ključevi (uid, ts) zapisa od wm − REPLAY_MARGIN).
+# Piše ga pozadinska nit; pod zaključavanjem se serijalizuju samo uid-ovi izmenjeni od prethodnog snimka
+# (ostali su već gotovi JSON delovi), pa render i upisi ne čekaju ceo snimak.
+# Pri startu se učita snimak i dopuni zapisima od wm − REPLAY_MARGIN; tail sprečava dvostruko brojanje.
+# Zapisi starijeg ts dodati mimo aplikacije (uvoz dump-a) ulaze tek posle rebuild-a; aplikacija koja
+# zatekne snimak novije izgradnje (drugi epoch) preuzima njega umesto da ga pregazi.
+import os, sys, json, gzip, time, argparse, threading
+from datetime import date, datetime, timedelta
+from mindmate_store import parse_db_url
+from mindmate_metrics import checkin_total
+
+ROLLUP_PATH       = os.environ.get("MINDMATE_ROLLUP_PATH", "")
+ROLLUP_PERSIST    = int(os.environ.get("MINDMATE_ROLLUP_PERSIST", "200"))     # novih zapisa do snimka
+ROLLUP_MIN_POINTS = int(os.environ.get("MINDMATE_ROLLUP_MIN_POINTS", "12"))   # tačaka na grafiku za „dovoljno fino”
+REPLAY_MARGIN     = timedelta(minutes=10)
+GRAINS = ("day", "week", "month")
+GRAIN_DAYS = {"day": 1, "week": 7, "month": 30.44}
+ALL = "*"                                # ključ ukupnog zbira (svi korisnici)
+PARTS = ("phq1", "phq2", "gad1", "gad2")
+
+def rollup_path_for(db_url):
+    if ROLLUP_PATH: return ROLLUP_PATH
+    _, path = parse_db_url(db_url)
+    return os.path.splitext(path)[0] + ".rollup.json.gz"
+
+def day_of(r):
+    d = (r.get("date") or r.get("ts") or "")[:10]
+    return d if len(d) == 10 and d[4] == "-" and d[7] == "-" else None
+
+_WEEK = {}   # dan → ponedeljak (memo; dana ima malo, zapisa mnogo)
+
+def bucket(day, grain):
+    # "YYYY-MM-DD" → kofa: isti dan | ponedeljak te nedelje | "YYYY-MM"
+    if grain == "day": return day
+    if grain == "month": return day[:7]
+    w = _WEEK.get(day)
+    if w is None:
+        d = date.fromisoformat(day)
+        w = _WEEK[day] = (d - timedelta(days=d.weekday())).isoformat()
+    return w
+
+def pick_grain(days, min_points=ROLLUP_MIN_POINTS):
+    # najkrupnija granulacija koja za opseg od `days` dana i dalje daje bar min_points tačaka
+    for g in reversed(GRAINS):
+        if days/GRAIN_DAYS[g] >= min_points: return g
+    return "day"
+
+def _int(v):
+    try: return int(v or 0)
+    except (TypeError, ValueError): return 0
+
+class CheckinRollups:
+    def __init__(self):
+        self.tables = {g: {} for g in GRAINS}   # granulacija → uid|ALL → kofa → [n, Σ, min, max, Σphq1, Σphq2, Σgad1, Σgad2]
+        self.hours = {}                         # uid|ALL → [24] broj check-in-a po satu (iz ts)
+        self.wm = ""                            # najveći ts
+        self._cut = ""                          # wm − REPLAY_MARGIN
+        self.seen = set()                       # (uid, ts) od wm(poslednjeg snimka) − REPLAY_MARGIN
+        self.epoch = ""                         # oznaka izgradnje (rebuild) iz koje potiče stanje
+        self.dirty = 0
+        self._touched = set()                   # uid|ALL izmenjeni od poslednjeg snimka
+        self._frozen = {}                       # uid|ALL → JSON [day, week, month, hours] iz poslednjeg snimka
+        self.version = 0
+        self.lock = threading.Lock()
+
+    # ---------- upis ----------
+    def add(self, r):
+        day = day_of(r)
+        if day is None: return False
+        uid, ts = r.get("uid", ""), r.get("ts", "")
+        vals = [_int(r.get(k)) for k in PARTS]
+        total = checkin_total(r)
+        with self.lock:
+            key = (uid, ts)
+            if key in self.seen: return False
+            if ts > self.wm: self.wm = ts; self._cut = self._cutoff()
+            if ts >= self._cut: self.seen.add(key)
+            for g in GRAINS:
+                b = bucket(day, g)
+                t = self.tables[g]
+                for scope in (uid, ALL):
+                    tab = t.get(scope)
+                    if tab is None: tab = t[scope] = {}
+                    s = tab.get(b)
+                    if s is None: tab[b] = [1, total, total, total] + vals
+                    else:
+                        s[0] += 1; s[1] += total
+                        if total < s[2]: s[2] = total
+                        if total > s[3]: s[3] = total
+                        for i, v in enumerate(vals): s[4+i] += v
+            h = ts[11:13]
+            if h.isdigit() and int(h) < 24:
+                for scope in (uid, ALL): self.hours.setdefault(scope, [0]*24)[int(h)] += 1
+            self._touched.add(uid); self._touched.add(ALL)
+            self.dirty += 1; self.version += 1
+        return True
+
+    def _cutoff(self):
+        if not self.wm: return ""
+        try: return (datetime.fromisoformat(self.wm[:26]) - REPLAY_MARGIN).isoformat()
+        except ValueError: return ""
+
+    def observe(self, coll, rec):
+        if coll == "checkins": self.add(rec)
+
+    # ---------- upiti ----------
+    def series(self, uid, grain, since=None, last=None):
+        # [{"bucket", "n", "mean", "min", "max", "phq1", …}] rastuće; since = "YYYY-MM-DD" (uključivo, po kofi),
+        # last = samo poslednjih N kofa
+        lo = bucket(since, grain) if since else ""
+        with self.lock:
+            tab = self.tables[grain].get(uid, {})
+            keys = sorted(b for b in tab if b >= lo)
+            rows = [(b, list(tab[b])) for b in (keys[-last:] if last else keys)]
+        return [{"bucket": b, "n": s[0], "mean": s[1]/s[0], "min": s[2], "max": s[3],
+                 **{k: s[4+i]/s[0] for i, k in enumerate(PARTS)}} for b, s in rows]
+
+    def first_day(self, uid):
+        with self.lock: days = self.tables["day"].get(uid)
+        return min(days) if days else None
+
+    def hours_of(self, uid):
+        with self.lock: return list(self.hours.get(uid, [0]*24))
+
+    # ---------- izgradnja i snimak ----------
+    def build(self, records):
+        for r in records: self.add(r)
+
+    def dump(self):
+        # JSON snimka. Pod self.lock: samo izmenjeni uid-ovi + zaglavlje (konzistentan presek);
+        # spajanje delova ide van zaključavanja
+        with self.lock:
+            for s in self._touched:
+                self._frozen[s] = json.dumps([self.tables[g].get(s, {}) for g in GRAINS] + [self.hours.get(s)],
+                                             ensure_ascii=False, separators=(",", ":"))
+            self._touched.clear()
+            self.seen = {k for k in self.seen if k[1] >= self._cut}
+            self.dirty = 0
+            head = json.dumps({"v": 2, "epoch": self.epoch, "wm": self.wm, "tail": sorted(self.seen)},
+                              ensure_ascii=False, separators=(",", ":"))
+            parts = list(self._frozen.items())
+        return head[:-1] + ',"scopes":{' + ",".join(json.dumps(s, ensure_ascii=False) + ":" + v for s, v in parts) + "}}"
+
+    @classmethod
+    def restore(cls, d):
+        ro = cls()
+        ro.epoch, ro.wm = d["epoch"], d["wm"]
+        ro._cut = ro._cutoff()
+        ro.seen = {tuple(k) for k in d["tail"]}
+        for s, (*grains, hours) in d["scopes"].items():
+            for g, tab in zip(GRAINS, grains):
+                if tab: ro.tables[g][s] = tab
+            if hours: ro.hours[s] = hours
+        ro._frozen = {s: json.dumps(v, ensure_ascii=False, separators=(",", ":")) for s, v in d["scopes"].items()}
+        return ro
+
+def read_snapshot(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f: d = json.load(f)
+        if d.get("v") == 2: return CheckinRollups.restore(d)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError): pass
+    return None
+
+def write_snapshot(path, ro):
+    data = ro.dump()
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f: f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try: os.remove(tmp)
+        except OSError: pass
+        return None
+    return os.path.getmtime(path)
+
+class RollupStore:
+    # zbirovi procesa: snimak + dopuna iz baze (db je izvor istine); učitava se pri prvom upitu
+    def __init__(self, path):
+        self.path = path
+        self.current = CheckinRollups()
+        self._mtime = None                   # mtime snimka koji je ovaj proces poslednji video/pisao
+        self._started = False
+        self._persisting = False             # snimak u pozadini u toku (najviše jedan)
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()     # persist: čitanje/pisanje snimka, preuzimanje tuđeg rebuild-a
+
+    def _catch_up(self, ro, db):
+        ro.build(r for r in db.iter_records("checkins") if r.get("ts", "") >= ro._cut)
+
+    def get(self, db):
+        # prvi poziv učitava (ostali čekaju); dalje samo čitanje — kad se skupi ROLLUP_PERSIST novih
+        # zapisa, snimak piše pozadinska nit
+        with self._lock:
+            start, self._started = not self._started, True
+        if start:
+            try: self._load(db)
+            except BaseException:
+                with self._lock: self._started = False     # sledeći upit pokušava ponovo
+                raise
+            finally: self._loaded.set()
+        self._loaded.wait()
+        if self.current.dirty >= ROLLUP_PERSIST: self.persist_async(db)
+        return self.current
+
+    def _load(self, db):
+        ro = read_snapshot(self.path)
+        try: self._mtime = os.path.getmtime(self.path)
+        except OSError: self._mtime = None
+        # objavljen pre dopune: upisi tokom prolaza kroz bazu idu pravo u njega (tail/seen sprečava duplikat)
+        if ro is None:
+            ro = self.current = CheckinRollups(); ro.epoch = datetime.utcnow().isoformat()
+            ro.build(db.iter_records("checkins"))
+        else:
+            self.current = ro
+            self._catch_up(ro, db)
+        if ro.dirty: self.persist(db)        # deo učitavanja (obično ga radi warmup nit na startu)
+
+    def observe(self, coll, rec):
+        # pre učitavanja nema šta da se dopunjuje — zapis je već u bazi, ulazi pri dopuni
+        if self._started: self.current.observe(coll, rec)
+
+    def persist_async(self, db):
+        with self._lock:
+            if self._persisting: return
+            self._persisting = True
+        def run():
+            try: self.persist(db)
+            except Exception: pass          # snimak je samo ubrzanje; sledeći krug pokušava ponovo
+            finally:
+                with self._lock: self._persisting = False
+        threading.Thread(target=run, name="mindmate-rollup-persist", daemon=True).start()
+
+    def persist(self, db):
+        # snimak koji je u međuvremenu napravio rebuild (drugi epoch) se preuzima, ne pregazi
+        with self._io_lock:
+            try: mtime = os.path.getmtime(self.path)
+            except OSError: mtime = None
+            if mtime is not None and mtime != self._mtime:
+                disk = read_snapshot(self.path)
+                if disk is not None and disk.epoch != self.current.epoch:
+                    self._mtime, self.current = mtime, disk     # prvo objava, pa dopuna (kao pri učitavanju)
+                    self._catch_up(disk, db)
+            self._mtime = write_snapshot(self.path, self.current) or self._mtime
+
+def rebuild(url, path=None):
+    # offline: jedan prolaz kroz sirove zapise sa diska (mindmate_export), novi epoch → aplikacije ga preuzimaju
+    from mindmate_export import iter_store
+    ro = CheckinRollups(); ro.epoch = datetime.utcnow().isoformat()
+    ro.build(rec for coll, rec in iter_store(url) if coll == "checkins")
+    write_snapshot(path or rollup_path_for(url), ro)
+    return ro
+
+def main(argv=None):
+    import mindmate_core as core
+    ap = argparse.ArgumentParser(description="MindMate zbirovi check-in-a")
+    ap.add_argument("--db", default=None, help="URL baze (podrazumevano MINDMATE_DB)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="izgradi zbirove iznova iz sirovih check-in-a")
+    s = sub.add_parser("show", help="zbirovi jednog uid-a (* = svi korisnici)")
+    s.add_argument("uid"); s.add_argument("--grain", choices=GRAINS); s.add_argument("--days", type=int, default=365)
+    a = ap.parse_args(argv)
+
+    url = a.db or core.DB_PATH
+    if a.cmd == "rebuild":
+        t0 = time.perf_counter(); ro = rebuild(url)
+        print(f"{ro.version} check-in-a, {sum(len(v) for v in ro.tables['day'].values())} dnevnih kofa "
+              f"({time.perf_counter()-t0:.1f} s) → {rollup_path_for(url)}")
+    elif a.cmd == "show":
+        ro = read_snapshot(rollup_path_for(url))
+        if ro is None: ap.exit(1, "Nema snimka — pokreni rebuild.\n")
+        grain = a.grain or pick_grain(a.days)
+        since = (date.today() - timedelta(days=a.days-1)).isoformat()
+        for r in ro.series(a.uid, grain, since):
+            print(f"{r['bucket']:>10}  n={r['n']:<5} prosek={r['mean']:5.2f}  min={r['min']:<2} max={r['max']:<2}  "
+                  + " ".join(f"{k}={r[k]:.2f}" for k in PARTS))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# mindmate_router.py — raspodela chat zahteva na više LLM hostova (Ollama, OpenAI kao rezerva)
+#   OLLAMA_HOSTS=http://gpu1:11434,http://gpu2:11434 MINDMATE_LLM_FALLBACK=openai streamlit run mindmate_app_v41.py
+# Bira se zdrav host sa najmanjim EWMA(vreme do prvog tokena) × (generacije u toku + 1); rezerva
+# (veći priority) tek kad nijedan primarni nije dostupan. Greška pre prvog tokena → sledeći host.
+# Circuit breaker: posle MINDMATE_LLM_CB_FAILURES uzastopnih grešaka host se isključuje na
+# MINDMATE_LLM_CB_COOLDOWN_S, zatim propušta jedan probni zahtev (uspeh ga vraća, greška ponovo isključuje).
+# MINDMATE_LLM_HEDGE_MS > 0: ako prvi token ne stigne za toliko ms, isti zahtev ide i na drugi host;
+# pobeđuje onaj koji prvi odgovori; poraženom se odmah zatvara konekcija (i dok još čeka zaglavlja) i
+# oslobađa mesto u inflight. Zdravlje hostova proverava pozadinska nit.
+import os, time, queue, threading
+from mindmate_telemetry import inc
+
+CB_FAILURES   = int(os.environ.get("MINDMATE_LLM_CB_FAILURES", "3"))
+CB_COOLDOWN_S = float(os.environ.get("MINDMATE_LLM_CB_COOLDOWN_S", "30"))
+HEDGE_MS      = float(os.environ.get("MINDMATE_LLM_HEDGE_MS", "0"))
+HEALTH_S      = float(os.environ.get("MINDMATE_LLM_HEALTH_S", "10"))
+EWMA_ALPHA    = 0.3
+INITIAL_TTFT_S = 1.0   # procena dok host nema merenja
+
+class NoBackend(Exception):
+    pass
+
+class Backend:
+    # stream(messages, stats, session, attempt) → generator tokena; izuzetak = neuspeh hosta.
+    # attempt.attach(close) registruje prekid konekcije koji attempt.stop() poziva iz druge niti
+    # ping() → bez izuzetka ako je host živ (None = ne proverava se, npr. OpenAI)
+    def __init__(self, name, kind, stream, ping=None, priority=0):
+        self.name, self.kind, self.stream, self.ping, self.priority = name, kind, stream, ping, priority
+        self.ewma = INITIAL_TTFT_S
+        self.inflight = 0
+        self.failures = 0          # uzastopne greške
+        self.open_until = 0.0      # breaker otvoren do (monotonic); 0 = zatvoren
+        self.probing = False       # poluotvoren: probni zahtev u toku
+        self.up = True             # poslednja provera zdravlja
+        self.served = self.errors = 0
+
+class _Attempt(threading.Thread):
+    # jedan pokušaj na jednom hostu; tokeni idu u zajednički red (attempt, vrsta, vrednost)
+    def __init__(self, router, backend, messages, session, out):
+        super().__init__(name=f"mindmate-llm-{backend.name}", daemon=True)
+        self.router, self.backend, self.messages, self.session, self.out = router, backend, messages, session, out
+        self.stats, self.cancel = {}, threading.Event()
+        self.t0, self.first = time.monotonic(), None
+        self._closers, self._done, self._lock = [], False, threading.Lock()
+
+    def attach(self, close):
+        # poziva backend kad otvori konekciju; već prekinut pokušaj je zatvara odmah
+        with self._lock:
+            if not self.cancel.is_set() and not self._done: self._closers.append(close); return
+        close()
+
+    def _settle(self, ok, err):
+        # tačno jednom po pokušaju: inflight se vraća, breaker/EWMA se ažuriraju
+        with self._lock:
+            if self._done: return False
+            self._done, closers = True, self._closers; self._closers = []
+        # prekinut pre prvog tokena (izgubio hedge): proteklo vreme je donja granica TTFT-a
+        self.router._finish(self.backend, (self.first or time.monotonic()) - self.t0, ok, err,
+                            err is None or self.first is not None)
+        return closers
+
+    def stop(self):
+        # poraženi hedge / prekinut odgovor: mesto se oslobađa sada, konekcija se gasi bez čekanja tokena
+        self.cancel.set()
+        closers = self._settle(False, None)
+        for close in closers or ():
+            try: close()
+            except Exception: pass
+
+    def run(self):
+        ok, err = False, None
+        gen = self.backend.stream(self.messages, self.stats, self.session, self)
+        try:
+            for tok in gen:
+                if self.first is None: self.first = time.monotonic()
+                if self.cancel.is_set(): break
+                self.out.put((self, "tok", tok))
+            else:
+                ok = True
+        except Exception as e:
+            if not self.cancel.is_set(): err = e            # greška posle stop() je posledica prekida
+        finally:
+            gen.close()
+            self._settle(ok, err)
+            self.out.put((self, "err", err) if err is not None else (self, "end", None))
+
+class LLMRouter:
+    def __init__(self, backends, hedge_ms=HEDGE_MS, health_s=HEALTH_S):
+        self.backends = list(backends)
+        self.hedge_s = hedge_ms/1000
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if health_s > 0 and any(b.ping for b in self.backends):
+            threading.Thread(target=self._health_loop, args=(health_s,), name="mindmate-llm-health", daemon=True).start()
+
+    # ---------- izbor hosta ----------
+    def _available(self, b, now):
+        if not b.up or b.open_until > now: return False
+        return not (b.open_until and b.probing)        # poluotvoren: samo jedan probni zahtev
+
+    def pick(self, exclude=()):
+        now = time.monotonic()
+        with self._lock:
+            cands = [b for b in self.backends if b not in exclude and self._available(b, now)]
+            if not cands: return None
+            top = min(b.priority for b in cands)
+            b = min((b for b in cands if b.priority == top), key=lambda b: b.ewma*(b.inflight+1))
+            b.inflight += 1
+            if b.open_until: b.probing = True
+            return b
+
+    def _finish(self, b, ttft, ok, err, measured):
+        with self._lock:
+            b.inflight -= 1
+            b.probing = False
+            if measured: b.ewma = (1-EWMA_ALPHA)*b.ewma + EWMA_ALPHA*ttft
+            if ok:
+                b.failures, b.open_until = 0, 0.0; b.served += 1
+            elif err is not None:
+                b.failures += 1; b.errors += 1
+                # probni zahtev pao ili previše uzastopnih grešaka → isključen na CB_COOLDOWN_S
+                if b.open_until or b.failures >= CB_FAILURES:
+                    b.open_until = time.monotonic() + CB_COOLDOWN_S
+                    inc("mindmate_llm_circuit_open_total", host=b.name)
+
+    # ---------- zahtev ----------
+    def stream(self, messages, stats=None, session=None):
+        # generator tokena sa hosta koji prvi odgovori; NoBackend kad nijedan host nije dostupan
+        out, tried, live = queue.Queue(), [], []
+        def start():
+            b = self.pick(tried)
+            if b is None: return None
+            a = _Attempt(self, b, messages, session, out)
+            tried.append(b); live.append(a); a.start()
+            return a
+        if start() is None: raise NoBackend("Nijedan LLM host trenutno nije dostupan.")
+        t0, hedged, winner, err = time.monotonic(), not self.hedge_s, None, None
+        try:
+            while True:
+                timeout = None if hedged or winner else max(0.0, t0 + self.hedge_s - time.monotonic())
+                try: a, kind, val = out.get(timeout=timeout)
+                except queue.Empty:
+                    hedged = True
+                    if start(): inc("mindmate_llm_hedged_total")
+                    continue
+                if winner is not None and a is not winner: continue      # kasni tokeni poraženog
+                if kind == "tok":
+                    if winner is None:
+                        winner = a
+                        for o in live:
+                            if o is not a: o.stop()
+                    yield val
+                elif kind == "end":
+                    if winner is None: winner = a                      # prazan odgovor je i dalje odgovor
+                    break
+                else:
+                    if winner is a: raise val                          # greška usred odgovora: ne ponavlja se
+                    # pre prvog tokena: zamena na sledećem hostu (i za pali hedge dok prvi pokušaj još čeka)
+                    live.remove(a); err = val
+                    if (not live or hedged) and start(): inc("mindmate_llm_failover_total")
+                    elif not live: raise err
+        finally:
+            for a in live: a.stop()
+            if winner is not None and stats is not None:
+                stats.update(winner.stats); stats["backend"] = winner.backend.name
+
+    # ---------- zdravlje ----------
+    def check(self):
+        for b in self.backends:
+            if not b.ping: continue
+            try: b.ping(); ok = True
+            except Exception: ok = False
+            with self._lock: b.up = ok
+
+    def _health_loop(self, every):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(every)
+
+    def close(self): self._stop.set()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{"host": b.name, "kind": b.kind, "up": b.up, "available": self._available(b, now),
+                     "circuit": "open" if b.open_until > now else ("half-open" if b.open_until else "closed"),
+                     "ewma_ttft_s": round(b.ewma, 3), "inflight": b.inflight,
+                     "served": b.served, "errors": b.errors} for b in self.backends]
@@ -0,0 +1,136 @@
+# mindmate_scheduler.py — ograničen broj istovremenih LLM generacija + fer red čekanja po uid-u
+import os, time, threading
+from collections import OrderedDict, deque
+
+# Ollama: po hostu (OLLAMA_HOSTS=a,b,… → ukupno puta broj hostova)
+_OLLAMA_HOSTS = len([h for h in os.environ.get("OLLAMA_HOSTS", "").split(",") if h.strip()]) or 1
+MAX_INFLIGHT = {
+    "ollama": int(os.environ.get("MINDMATE_OLLAMA_MAX_INFLIGHT", "2"))*_OLLAMA_HOSTS,
+    "openai": int(os.environ.get("MINDMATE_OPENAI_MAX_INFLIGHT", "16")),
+}
+MAX_QUEUE      = int(os.environ.get("MINDMATE_LLM_MAX_QUEUE", "50"))
+QUEUE_TIMEOUT  = float(os.environ.get("MINDMATE_LLM_QUEUE_TIMEOUT", "300"))
+INITIAL_SERVICE_S = 15.0   # procena trajanja jedne generacije dok nema merenja
+
+class QueueFull(Exception):
+    pass
+
+class QueueTimeout(Exception):
+    pass
+
+class _Ticket:
+    __slots__ = ("uid", "granted", "t0")
+    def __init__(self, uid):
+        self.uid, self.granted, self.t0 = uid, False, time.monotonic()
+
+# Red je round-robin između uid-ova, FIFO unutar jednog uid-a: korisnik sa 5 poruka u redu
+# ne blokira ostale. Slot se drži dok traje cela (streaming) generacija.
+class LLMScheduler:
+    def __init__(self, max_inflight, max_queue=MAX_QUEUE, timeout=QUEUE_TIMEOUT):
+        self.max_inflight = max(max_inflight, 1)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.inflight = 0
+        self.rejected = 0
+        self.service_s = INITIAL_SERVICE_S   # EWMA trajanja generacije
+        self._queues = OrderedDict()         # uid → deque[_Ticket], redosled = rotacija
+        self._queued = 0
+        self._cv = threading.Condition()
+
+    def _grant(self):
+        # poziva se pod _cv
+        while self.inflight < self.max_inflight and self._queues:
+            uid, q = next(iter(self._queues.items()))
+            t = q.popleft(); self._queued -= 1
+            if q: self._queues.move_to_end(uid)
+            else: del self._queues[uid]
+            t.granted = True; self.inflight += 1
+        self._cv.notify_all()
+
+    def _drop(self, ticket):
+        # otkazan zahtev izlazi iz reda odmah (pod _cv)
+        q = self._queues.get(ticket.uid)
+        if q is None or ticket not in q: return
+        q.remove(ticket); self._queued -= 1
+        if not q: del self._queues[ticket.uid]
+
+    def _position(self, ticket):
+        # koliko zahteva ide pre ovog po round-robin redosledu (pod _cv)
+        qs = [list(q) for q in self._queues.values()]
+        pos, rnd = 0, 0
+        while True:
+            alive = False
+            for q in qs:
+                if rnd < len(q):
+                    alive = True
+                    if q[rnd] is ticket: return pos
+                    pos += 1
+            if not alive: return pos
+            rnd += 1
+
+    def eta(self, position):
+        return (position//self.max_inflight + 1)*self.service_s if position else 0.0
+
+    def stats(self):
+        with self._cv:
+            return {"inflight": self.inflight, "queued": self._queued, "rejected": self.rejected,
+                    "max_inflight": self.max_inflight, "service_s": round(self.service_s, 2)}
+
+    def enqueue(self, uid):
+        with self._cv:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"Red je pun ({self._queued} zahteva).")
+            t = _Ticket(uid)
+            self._queues.setdefault(uid, deque()).append(t); self._queued += 1
+            self._grant()
+            return t
+
+    def wait(self, ticket, on_wait=None, poll=0.5):
+        # on_wait(pozicija, procena_s) se zove van lock-a (crta UI)
+        deadline = ticket.t0 + self.timeout
+        while True:
+            with self._cv:
+                if ticket.granted: return
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    self._drop(ticket)
+                    raise QueueTimeout("Isteklo vreme čekanja u redu.")
+                pos = self._position(ticket) if on_wait else 0
+            if on_wait: on_wait(pos+1, self.eta(pos))
+            with self._cv:
+                if not ticket.granted: self._cv.wait(min(poll, left))
+
+    def release(self, ticket, elapsed=None):
+        with self._cv:
+            if ticket.granted:
+                ticket.granted = False; self.inflight -= 1
+                if elapsed: self.service_s = 0.8*self.service_s + 0.2*elapsed
+            else:
+                self._drop(ticket)
+            self._grant()
+
+    def run(self, uid, make_stream, on_wait=None):
+        # generator: ulazi u red na prvom next() (QueueFull/QueueTimeout pre prvog tokena),
+        # drži slot dok se stream ne potroši ili zatvori
+        def gen():
+            ticket, t0 = None, None
+            try:
+                ticket = self.enqueue(uid)
+                self.wait(ticket, on_wait)
+                if on_wait: on_wait(0, 0.0)
+                t0 = time.monotonic()
+                yield from make_stream()
+            finally:
+                if ticket: self.release(ticket, time.monotonic()-t0 if t0 else None)
+        return gen()
+
+_SCHEDULERS = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+def get_scheduler(provider):
+    with _SCHEDULERS_LOCK:
+        s = _SCHEDULERS.get(provider)
+        if s is None:
+            s = _SCHEDULERS[provider] = LLMScheduler(MAX_INFLIGHT.get(provider, 4))
+        return s
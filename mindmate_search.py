@@ -0,0 +1,222 @@
+# mindmate_search.py — pretraga punog teksta po korisniku: beleške iz check-in-a + chat istorija
+# Invertovani indeks po uid-u (termin → dokumenti, BM25 rangiranje); normalizacija kao u kriznom filteru
+# (mala slova, ćirilica → latinica, bez dijakritika), pa „san”, „САН” i „sán” nalaze isto.
+# Upit: reči (sve moraju da se pojave), "tačna fraza", prefiks* (spav* → spavanje, spavam…).
+# Indeks uid-a se učitava tek pri prvoj pretrazi (<baza>.search/<uid>.json.gz) i dopunjuje zapisima
+# novijim od snimka; dalje ga ažuriraju save_checkin/save_chat_event. Snimak je samo ubrzanje —
+# baza (+ arhiva) je izvor istine, pa izgubljen ili oštećen snimak znači samo ponovnu izgradnju.
+# Snimak piše pozadinska nit (najviše jedna po uid-u) — pretraga na niti stranice samo čita.
+import os, json, gzip, math, heapq, bisect, threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from mindmate_store import parse_db_url
+from mindmate_crisis import normalize
+
+SEARCH_DIR     = os.environ.get("MINDMATE_SEARCH_DIR", "")
+SEARCH_CACHE   = int(os.environ.get("MINDMATE_SEARCH_CACHE", "32"))        # učitanih indeksa po procesu
+SEARCH_PERSIST = int(os.environ.get("MINDMATE_SEARCH_PERSIST", "50"))      # novih dokumenata do snimka
+REPLAY_MARGIN  = timedelta(minutes=10)   # zapisi drugih procesa sa malo starijim ts od snimka
+MAX_EXPANSIONS = 64                      # termina po prefiksu
+BM25_K1, BM25_B = 1.2, 0.75
+KINDS = ("note", "user", "assistant")    # beleška iz check-in-a, poruka korisnika, odgovor MindMate-a
+
+def search_dir_for(db_url):
+    if SEARCH_DIR: return SEARCH_DIR
+    _, path = parse_db_url(db_url)
+    return os.path.splitext(path)[0] + ".search"
+
+def doc_of(coll, rec):
+    # (vrsta, ts, tekst) za indeks; None za zapise bez teksta
+    if coll == "checkins": kind, text = "note", rec.get("notes")
+    elif coll == "chat_events": kind, text = rec.get("role"), rec.get("content")
+    else: return None
+    return (kind, rec.get("ts") or "", text) if text and kind in KINDS else None
+
+def parse_query(q):
+    # → [("term", t) | ("prefix", p) | ("phrase", [t, …])]; navodnici bez para važe do kraja upita
+    out, parts = [], (q or "").split('"')
+    for i, part in enumerate(parts):
+        if i % 2:
+            toks = normalize(part).split()
+            if len(toks) > 1: out.append(("phrase", toks)); continue
+            part = " ".join(toks)
+        for w in part.split():
+            t = normalize(w)
+            if not t: continue
+            if w.endswith("*"): out += [("prefix", x) for x in t.split()[-1:]] + [("term", x) for x in t.split()[:-1]]
+            else: out += [("term", x) for x in t.split()]
+    return out
+
+class UidIndex:
+    def __init__(self):
+        self.docs = []            # id → (vrsta, ts, tekst)
+        self.keys = set()         # (vrsta, ts) — isti zapis se ne dodaje dvaput
+        self.post = {}            # termin → [id, …] (rastuće)
+        self.tf = {}              # termin → [broj pojavljivanja, …] (paralelno sa post)
+        self.dl = []              # id → broj termina
+        self.total = 0
+        self.wm = ""              # najveći ts u indeksu
+        self.dirty = 0            # dokumenata posle poslednjeg snimka
+        self._vocab = None        # sortirani termini (za prefikse), gradi se po potrebi
+        self.lock = threading.Lock()
+
+    def add(self, kind, ts, text):
+        if (kind, ts) in self.keys: return False
+        self.keys.add((kind, ts))
+        i, toks = len(self.docs), normalize(text).split()
+        self.docs.append((kind, ts, text)); self.dl.append(len(toks)); self.total += len(toks)
+        for t, c in Counter(toks).items():
+            p = self.post.get(t)
+            if p is None: p = self.post[t] = []; self.tf[t] = []; self._vocab = None
+            p.append(i); self.tf[t].append(c)
+        if ts > self.wm: self.wm = ts
+        self.dirty += 1
+        return True
+
+    def _expand(self, prefix):
+        if self._vocab is None: self._vocab = sorted(self.post)
+        lo = bisect.bisect_left(self._vocab, prefix)
+        hi = bisect.bisect_left(self._vocab, prefix + "\x7f", lo)
+        return self._vocab[lo:min(hi, lo + MAX_EXPANSIONS)]
+
+    def _ids(self, terms, union=True):
+        sets = [set(self.post.get(t, ())) for t in terms]
+        if not sets: return set()
+        return set().union(*sets) if union else set.intersection(*sets)
+
+    def _score(self, term, cand, scores):
+        # BM25 doprinos termina samo za preostale kandidate
+        ids = self.post.get(term)
+        if not ids: return
+        n, avg, dl = len(self.docs), self.total/len(self.docs), self.dl
+        idf = math.log(1 + (n - len(ids) + .5)/(len(ids) + .5))
+        tf = dict(zip(ids, self.tf[term]))
+        for i in cand:
+            f = tf.get(i)
+            if f: scores[i] = scores.get(i, 0.0) + idf*f*(BM25_K1+1)/(f + BM25_K1*(1 - BM25_B + BM25_B*dl[i]/avg))
+
+    def search(self, query, since=None, until=None, kinds=KINDS, limit=20):
+        clauses = parse_query(query)
+        if not clauses or not self.docs: return []
+        # 1) kandidati: presek skupova po klauzuli (prefiks = unija proširenja, fraza = presek reči), od najmanjeg
+        terms = [[v] if k == "term" else (self._expand(v) if k == "prefix" else v) for k, v in clauses]
+        sets = sorted((self._ids(t, k == "prefix") for (k, _), t in zip(clauses, terms)), key=len)
+        cand = sets[0]
+        for x in sets[1:]:
+            if not cand: break
+            cand = cand & x
+        # 2) vrsta i datum, pa susednost reči fraze (normalizovan tekst, samo za preostale)
+        docs = self.docs
+        cand = [i for i in cand if docs[i][0] in kinds and not (since and docs[i][1][:10] < since)
+                and not (until and docs[i][1][:10] > until)]
+        for k, v in clauses:
+            if k == "phrase" and cand:
+                needle = " " + " ".join(v) + " "
+                cand = [i for i in cand if needle in " " + normalize(docs[i][2]) + " "]
+        if not cand: return []
+        # 3) BM25 + noviji prvi kod istog skora
+        scores = {}
+        for t in {t for ts in terms for t in ts}: self._score(t, cand, scores)
+        top = heapq.nlargest(limit, cand, key=lambda i: (scores.get(i, 0.0), docs[i][1]))
+        return [{"kind": docs[i][0], "ts": docs[i][1], "text": docs[i][2], "score": round(scores.get(i, 0.0), 3)} for i in top]
+
+    # ---------- snimak ----------
+    def dump(self):
+        return {"v": 1, "wm": self.wm, "docs": self.docs, "post": self.post, "tf": self.tf, "dl": self.dl}
+
+    @classmethod
+    def restore(cls, d):
+        ix = cls()
+        ix.docs = [tuple(x) for x in d["docs"]]; ix.keys = {(k, ts) for k, ts, _ in ix.docs}
+        ix.post, ix.tf, ix.dl, ix.wm = d["post"], d["tf"], d["dl"], d["wm"]
+        ix.total = sum(ix.dl)
+        return ix
+
+class SearchIndex:
+    # source(uid, since) → iterable (coll, zapis) iz baze + arhive; since=None → sve
+    def __init__(self, directory, source, cache=SEARCH_CACHE):
+        self.dir, self.source, self.cache = directory, source, max(cache, 1)
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()       # uid → UidIndex (LRU)
+        self._loading = {}                 # uid → Event (drugi zahtev za isti uid čeka prvi)
+        self._persisting = set()           # uid-ovi čiji se snimak upravo piše u pozadini
+
+    def _path(self, uid): return os.path.join(self.dir, f"{uid}.json.gz")
+
+    def _snapshot(self, uid):
+        # → (indeks iz snimka ili prazan, od kog ts treba dopuniti iz baze; None = sve)
+        try:
+            with gzip.open(self._path(uid), "rt", encoding="utf-8") as f: d = json.load(f)
+            if d.get("v") == 1:
+                ix = UidIndex.restore(d)
+                return ix, (datetime.fromisoformat(ix.wm) - REPLAY_MARGIN).isoformat() if ix.wm else None
+        except (OSError, ValueError, KeyError, TypeError): pass
+        return UidIndex(), None
+
+    def get(self, uid):
+        while True:
+            with self._lock:
+                ev = self._loading.get(uid)
+                if ev is None:
+                    ix = self._loaded.get(uid)
+                    if ix is not None: self._loaded.move_to_end(uid); return ix
+                    ev = self._loading[uid] = threading.Event(); break
+            ev.wait()
+        try:
+            ix, since = self._snapshot(uid)
+            # objavi pre dopune: upisi tokom prolaza kroz bazu idu pravo u indeks (add je idempotentan)
+            with self._lock:
+                self._loaded[uid] = ix
+                while len(self._loaded) > self.cache: self._loaded.popitem(last=False)
+            for coll, rec in self.source(uid, since):
+                doc = doc_of(coll, rec)
+                if doc:
+                    with ix.lock: ix.add(*doc)
+        except BaseException:
+            with self._lock: self._loaded.pop(uid, None)
+            raise
+        finally:
+            with self._lock: self._loading.pop(uid, None)
+            ev.set()
+        if ix.dirty: self.persist_async(uid, ix)
+        return ix
+
+    def observe(self, coll, rec):
+        # upis iz ove aplikacije ili drugog procesa; neučitani uid-ovi se dopune pri učitavanju
+        if coll is None:
+            with self._lock: self._loaded.clear()
+            return
+        doc = doc_of(coll, rec)
+        if doc is None: return
+        with self._lock: ix = self._loaded.get(rec.get("uid", ""))
+        if ix is not None:
+            with ix.lock: ix.add(*doc)
+
+    def persist_async(self, uid, ix):
+        with self._lock:
+            if uid in self._persisting: return
+            self._persisting.add(uid)
+        def run():
+            try: self.persist(uid, ix)
+            except Exception: pass          # snimak je samo ubrzanje; sledeći krug pokušava ponovo
+            finally:
+                with self._lock: self._persisting.discard(uid)
+        threading.Thread(target=run, name="mindmate-search-persist", daemon=True).start()
+
+    def persist(self, uid, ix):
+        with ix.lock:
+            data, ix.dirty = json.dumps(ix.dump(), ensure_ascii=False), 0
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{self._path(uid)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f: f.write(data)
+            os.replace(tmp, self._path(uid))
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def search(self, uid, query, since=None, until=None, kinds=KINDS, limit=20):
+        ix = self.get(uid)
+        with ix.lock: hits = ix.search(query, since, until, kinds, limit)
+        if ix.dirty >= SEARCH_PERSIST: self.persist_async(uid, ix)
+        return hits
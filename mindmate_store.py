@@ -0,0 +1,933 @@
+# mindmate_store.py — MindMate skladište: legacy JSON fajl + append-only NDJSON žurnal
+# Više procesa nad istim MINDMATE_DB: upisi idu pod zaključavanjem fajla <baza>.lock, koji čuva i
+# verziju skladišta; ostali procesi porede verziju (jedan pread) i preuzimaju samo tuđe izmene.
+import os, re, sys, json, time, bisect, atexit, sqlite3, threading
+from datetime import datetime
+from mindmate_telemetry import span, observe, inc
+try: import fcntl
+except ImportError: fcntl = None   # Windows → msvcrt
+
+COLLECTIONS = ("checkins", "chat_events", "users", "summaries", "crisis_events")
+
+STORAGE_MODE            = os.environ.get("MINDMATE_STORAGE", "json").lower().strip()
+JOURNAL_FSYNC           = os.environ.get("MINDMATE_JOURNAL_FSYNC", "1") not in ("0", "false", "no")
+JOURNAL_COMPACT_MIN_MB  = float(os.environ.get("MINDMATE_JOURNAL_COMPACT_MB", "4"))
+FLUSH_INTERVAL_MS       = int(os.environ.get("MINDMATE_FLUSH_MS", "250"))
+FLUSH_BATCH             = int(os.environ.get("MINDMATE_FLUSH_BATCH", "256"))
+SYNC_INTERVAL_MS        = int(os.environ.get("MINDMATE_SYNC_MS", "500"))   # koliko često se proverava tuđa izmena
+
+class StoreError(RuntimeError):
+    """Upis u skladište ne uspeva (disk pun, prava pristupa…); zapisi ostaju u redu za ponovni pokušaj."""
+
+class StoreConflict(StoreError):
+    """Drugi proces je izmenio skladište posle poslednjeg sync-a — puno prepisivanje bi pregazilo tuđe upise."""
+
+def empty_db(): return {c: [] for c in COLLECTIONS}
+
+def normalize_db(data):
+    if not isinstance(data, dict): data = empty_db()
+    for c in COLLECTIONS: data.setdefault(c, [])
+    return data
+
+def email_key(email): return (email or "").strip().casefold()
+
+def dedupe_users(users):
+    # users je upsert kolekcija: kasniji zapis sa istim email-om zamenjuje raniji (na mestu prvog)
+    pos, out = {}, []
+    for u in users:
+        k = email_key(u.get("email"))
+        if k in pos: out[pos[k]] = u
+        else: pos[k] = len(out); out.append(u)
+    return out
+
+def _fsync_dir(path):
+    # rename je trajan tek kad se sinhronizuje i direktorijum (POSIX); na Windows-u nije moguće
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try: os.fsync(fd)
+    except OSError: pass
+    finally: os.close(fd)
+
+def atomic_write_json(path, obj, indent=None):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=indent)
+        f.flush(); os.fsync(f.fileno())
+        size = os.fstat(f.fileno()).st_size
+    os.replace(tmp, path)
+    _fsync_dir(path)
+    return size
+
+def _store_base(path): return path[:-5] if path.endswith(".json") else path
+
+# ---------- Zaključavanje između procesa + verzija skladišta ----------
+# <baza>.lock: bajtovi 0–19 verzija (raste sa svakim upisom), 20–39 generacija snapshot-a žurnala.
+# flock/msvcrt je savetodavno zaključavanje — poštuju ga samo MindMate procesi.
+class StoreLock:
+    _FMT = b"%020d%020d"
+
+    def __init__(self, path):
+        self.path = path
+        self._tlock = threading.RLock()   # niti istog procesa; flock je po procesu
+        self._depth = 0
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _os_lock(self):
+        if fcntl is not None: fcntl.flock(self._fd, fcntl.LOCK_EX); return
+        import msvcrt
+        os.lseek(self._fd, 1 << 30, 0)   # bajt van sadržaja: čitanje verzije ostaje slobodno
+        while True:
+            try: msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1); return
+            except OSError: continue
+
+    def _os_unlock(self):
+        if fcntl is not None: fcntl.flock(self._fd, fcntl.LOCK_UN); return
+        import msvcrt
+        os.lseek(self._fd, 1 << 30, 0); msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        self._tlock.acquire()
+        if self._depth == 0:
+            t0 = time.perf_counter()
+            try: self._os_lock()
+            except BaseException:
+                self._tlock.release(); raise
+            observe("mindmate_db_lock_wait_seconds", time.perf_counter()-t0)
+        self._depth += 1
+        return self
+
+    def __exit__(self, et, ev, tb):
+        self._depth -= 1
+        if self._depth == 0: self._os_unlock()
+        self._tlock.release()
+        return False
+
+    def read(self):
+        # (verzija, generacija); čita se i bez zaključavanja — 40 bajtova se upisuje jednim pwrite-om
+        if hasattr(os, "pread"): b = os.pread(self._fd, 40, 0)
+        else:
+            with self._tlock: os.lseek(self._fd, 0, 0); b = os.read(self._fd, 40)
+        if len(b) < 40: return 0, 0
+        return int(b[:20]), int(b[20:])
+
+    def write(self, version, gen):
+        # samo pod zaključavanjem
+        b = self._FMT % (version, gen)
+        if hasattr(os, "pwrite"): os.pwrite(self._fd, b, 0)
+        else: os.lseek(self._fd, 0, 0); os.write(self._fd, b)
+
+    def bump(self, gen=None):
+        v, g = self.read()
+        self.write(v+1, g if gen is None else gen)
+        return v+1
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+# ---------- Legacy: ceo DB u jednom JSON fajlu ----------
+class JsonFileStore:
+    kind = "json"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = StoreLock(_store_base(path) + ".lock")
+        self.version = 0     # verzija na kojoj je zasnovan pogled ovog procesa
+        self._stale = False  # tuđa izmena je spojena na disku, ali ne i u memoriji → pun reload
+
+    def load(self):
+        with self._lock, span("mindmate_db_load_seconds", backend=self.kind):
+            if not os.path.exists(self.path):
+                atomic_write_json(self.path, empty_db())
+            self.version, self._stale = self._lock.read()[0], False
+            return normalize_db(_read_json(self.path))
+
+    def _write(self, db):
+        with span("mindmate_db_write_seconds", backend=self.kind, op="save"):
+            n = atomic_write_json(self.path, db, indent=2)
+        observe("mindmate_db_write_bytes", n, backend=self.kind, op="save")
+        self.version = self._lock.bump()
+
+    def save(self, db):
+        with self._lock:
+            if self._lock.read()[0] != self.version: raise StoreConflict(self.path)
+            self._write(db)
+
+    def append_many(self, db, items):
+        # nema žurnala → svaki upis prepisuje ceo fajl (O(veličina baze))
+        with self._lock:
+            if self._lock.read()[0] == self.version and not self._stale:
+                self._write(db); return
+            # drugi proces je pisao: spoji naše zapise sa stanjem na disku umesto da ga pregazi
+            disk = normalize_db(_read_json(self.path))
+            for coll, rec in items: disk[coll].append(rec)
+            disk["users"] = dedupe_users(disk["users"])
+            self._write(disk)
+            self._stale = True
+
+    def append(self, db, coll, rec): self.append_many(db, [(coll, rec)])
+
+    def poll(self):
+        # [] bez promene; None → pogled treba ponovo učitati (JSON nema inkrementalni zapis izmena)
+        return None if self._stale or self._lock.read()[0] != self.version else []
+
+# ---------- Žurnal: snapshot + NDJSON po kolekciji ----------
+# Raspored na disku (za MINDMATE_DB=mindmate_db.json):
+#   mindmate_db.json                 — kompaktni snapshot, isti format kao legacy fajl + "_gen"
+#   mindmate_db.<kolekcija>.<gen>.ndjson — zapisi dodati posle snapshot-a generacije <gen>
+# Kompakcija: nova generacija → snapshot (tmp + fsync + os.replace) → brisanje starih generacija.
+# Pad pre rename-a ostavlja stari snapshot + stare žurnale; pad posle rename-a ostavlja žurnale
+# sa gen < snapshot gen koji se pri učitavanju ignorišu i brišu.
+# Više procesa: pre svakog upisa (pod <baza>.lock) proces dočitava tuđe linije od poslednjeg
+# pomeraja u fajlu — one idu u _inbox, odakle ih poll() predaje SharedDB-u. Promena generacije
+# (kompakcija u drugom procesu) znači pun reload.
+class JournalStore:
+    kind = "journal"
+
+    def __init__(self, path, fsync=JOURNAL_FSYNC, compact_min_bytes=int(JOURNAL_COMPACT_MIN_MB*1024*1024)):
+        self.path = path
+        self.base = path[:-5] if path.endswith(".json") else path
+        self.fsync = fsync
+        self.compact_min_bytes = compact_min_bytes
+        self.gen = 0
+        self.version = 0
+        self._files = {}
+        self._offsets = {}   # putanja žurnala → bajtova već pročitanih u memoriju
+        self._inbox = []     # tuđi zapisi (coll, rec) koje poll() još nije predao
+        self._stale = False
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self._lock = StoreLock(self.base + ".lock")
+        self._gen_re = re.compile(re.escape(os.path.basename(self.base)) + r"\.(" + "|".join(COLLECTIONS) + r")\.(\d+)\.ndjson$")
+
+    def _jpath(self, coll, gen): return f"{self.base}.{coll}.{gen}.ndjson"
+
+    def _journal_files(self):
+        d = os.path.dirname(os.path.abspath(self.path))
+        out = []
+        for name in os.listdir(d):
+            m = self._gen_re.match(name)
+            if m: out.append((int(m.group(2)), m.group(1), os.path.join(d, name)))
+        return sorted(out)
+
+    def _replay(self, p, start=0):
+        # čita kompletne linije od pomeraja start; nedovršen rep (pad usred upisa) se odseca
+        out, good = [], start
+        with open(p, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"): break
+                good += len(line)
+                try: out.append(json.loads(line))
+                except ValueError: continue
+        if good < os.path.getsize(p):
+            with open(p, "r+b") as f:
+                f.truncate(good); f.flush(); os.fsync(f.fileno())
+        self._journal_bytes += good - start
+        self._offsets[p] = good
+        return out
+
+    def _close_files(self):
+        for f in self._files.values():
+            try: f.close()
+            except OSError: pass
+        self._files.clear()
+
+    def _read_all(self):
+        snap = _read_json(self.path)
+        self._snapshot_bytes = os.path.getsize(self.path) if snap is not None else 0
+        db = normalize_db(snap)
+        snap_gen = int(db.pop("_gen", 0) or 0)
+        self._journal_bytes = 0
+        self._offsets = {}
+        gen = snap_gen
+        for g, coll, p in self._journal_files():
+            if g < snap_gen:
+                # ostatak prekinute kompakcije — već je u snapshot-u
+                try: os.remove(p)
+                except OSError: pass
+                continue
+            db[coll].extend(self._replay(p))
+            gen = max(gen, g)
+        db["users"] = dedupe_users(db["users"])
+        return db, gen
+
+    def load(self):
+        with self._lock, span("mindmate_db_load_seconds", backend=self.kind):
+            self._close_files()
+            db, self.gen = self._read_all()
+            self.version, disk_gen = self._lock.read()
+            if disk_gen != self.gen: self.version = self._lock.bump(self.gen)   # prvi proces / stari raspored
+            self._inbox, self._stale = [], False
+            return db
+
+    def _catch_up(self):
+        # pod zaključavanjem: dočitaj tuđe upise od poslednjeg pomeraja
+        version, gen = self._lock.read()
+        if version == self.version: return
+        if gen != self.gen:
+            self._close_files()
+            self.gen, self._stale, self._inbox = gen, True, []
+        elif not self._stale:
+            for g, coll, p in self._journal_files():
+                if g == self.gen and os.path.getsize(p) > self._offsets.get(p, 0):
+                    self._inbox += [(coll, r) for r in self._replay(p, self._offsets.get(p, 0))]
+        self.version = version
+
+    def poll(self):
+        # [] bez promene; [(coll, rec), …] tuđi zapisi; None → generacija se promenila, pun reload
+        if self._lock.read()[0] == self.version and not self._inbox and not self._stale: return []
+        with self._lock:
+            self._catch_up()
+            if self._stale: return None
+            out, self._inbox = self._inbox, []
+            return out
+
+    def _handle(self, coll):
+        f = self._files.get(coll)
+        if f is None:
+            f = self._files[coll] = open(self._jpath(coll, self.gen), "ab")
+        return f
+
+    def append_many(self, db, items):
+        if not items: return
+        chunks = {}
+        for coll, rec in items:
+            chunks.setdefault(coll, []).append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+        with self._lock:
+            self._catch_up()
+            with span("mindmate_db_write_seconds", backend=self.kind, op="append"):
+                written = 0
+                for coll, lines in chunks.items():
+                    data = "".join(lines).encode("utf-8")
+                    f = self._handle(coll)
+                    f.write(data); f.flush()
+                    if self.fsync: os.fsync(f.fileno())
+                    p = self._jpath(coll, self.gen)
+                    self._offsets[p] = self._offsets.get(p, 0) + len(data)
+                    written += len(data)
+                self._journal_bytes += written
+                self.version = self._lock.bump()
+            observe("mindmate_db_write_bytes", written, backend=self.kind, op="append")
+            # amortizovano O(zapis): kompakcija tek kad žurnal preraste snapshot
+            if self._journal_bytes >= max(self.compact_min_bytes, self._snapshot_bytes):
+                self.compact()
+
+    def append(self, db, coll, rec): self.append_many(db, [(coll, rec)])
+
+    def _write_snapshot(self, db):
+        old = [p for g, _, p in self._journal_files() if g <= self.gen]
+        self._close_files()
+        self.gen += 1
+        snap = {c: db.get(c, []) for c in COLLECTIONS}
+        snap["_gen"] = self.gen
+        with span("mindmate_db_write_seconds", backend=self.kind, op="snapshot"):
+            n = atomic_write_json(self.path, snap)
+        observe("mindmate_db_write_bytes", n, backend=self.kind, op="snapshot")
+        for p in old:
+            try: os.remove(p)
+            except OSError: pass
+        self._journal_bytes = 0
+        self._offsets = {}
+        self._snapshot_bytes = os.path.getsize(self.path)
+        self.version = self._lock.bump(self.gen)
+
+    def compact(self):
+        # gradi snapshot sa diska, ne iz memorije pozivaoca (sesije mogu imati zastarele kopije);
+        # tuđi zapisi se pre toga dočitaju u _inbox, pa SharedDB ne mora u pun reload
+        with self._lock:
+            self._catch_up()
+            if self._stale: return
+            self._close_files()
+            db, self.gen = self._read_all()
+            self._write_snapshot(db)
+
+    def save(self, db):
+        # eksplicitno prepisivanje celog stanja (npr. migracija) — postaje novi snapshot;
+        # tuđi upisi posle poslednjeg poll-a bi se izgubili → StoreConflict
+        with self._lock:
+            self._catch_up()
+            if self._stale or self._inbox: raise StoreConflict(self.path)
+            self._write_snapshot(db)
+
+# ---------- Izbor skladišta (jedna instanca po procesu) ----------
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+def open_store(path, mode=None):
+    mode = (mode or STORAGE_MODE)
+    key = (mode, os.path.abspath(path))
+    with _STORES_LOCK:
+        s = _STORES.get(key)
+        if s is None:
+            s = _STORES[key] = JournalStore(path) if mode == "journal" else JsonFileStore(path)
+        return s
+
+def parse_db_url(url):
+    # "sqlite:///rel.db" | "sqlite:////abs.db" | "journal://put.json" | "json://put.json" | "put.json"
+    scheme, sep, rest = url.partition("://")
+    if not sep: return STORAGE_MODE, url
+    scheme = scheme.lower()
+    if scheme == "sqlite": return "sqlite", rest[1:] if rest.startswith("/") else rest
+    if scheme in ("json", "journal"): return scheme, rest
+    raise ValueError(f"Nepoznata šema skladišta: {scheme}://")
+
+def _ts_key(r): return r.get("ts","")
+def _day_key(r): return (r.get("date",""), r.get("ts",""))   # redosled check-in-a (checkins())
+
+def _parse_ts(s):
+    try: return datetime.fromisoformat((s or "").split("+")[0])
+    except Exception: return datetime.utcnow()
+
+# ---------- Zajednički write-behind: red + pozadinska nit + flush na izlazu ----------
+# Upisi idu u red koji pozadinska nit prazni u grupama (na FLUSH_INTERVAL_MS ili kad
+# red dostigne FLUSH_BATCH). Redosled zaključavanja: _io_lock → lock (nikad obrnuto).
+# sync() najviše jednom u SYNC_INTERVAL_MS proverava verziju skladišta i tuđe zapise predaje
+# slušaocima (on_change); (None, None) znači da je pogled ponovo učitan u celini.
+class _WriteBehind:
+    def __init__(self, interval_ms=FLUSH_INTERVAL_MS, batch=FLUSH_BATCH, sync_ms=SYNC_INTERVAL_MS):
+        self.lock = threading.RLock()
+        self.interval = max(interval_ms, 1)/1000.0
+        self.batch = max(batch, 1)
+        self.sync_interval = sync_ms/1000.0
+        self.last_error = None
+        self._pending = []
+        self._listeners = []
+        self._synced = time.monotonic()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Condition(self.lock)
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="mindmate-db-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _enqueue(self, coll, rec):
+        # poziva se pod self.lock
+        self._pending.append((coll, rec))
+        if len(self._pending) >= self.batch: self._wake.notify()
+
+    def _snapshot(self): return None
+
+    def _write(self, items, view): raise NotImplementedError
+
+    @property
+    def backend(self): return self.kind
+
+    def pending(self):
+        with self.lock: return len(self._pending)
+
+    def check(self):
+        # poslednji flush nije uspeo → greška pozivaocu (zapisi ostaju u redu, nit pokušava ponovo)
+        e = self.last_error
+        if e is not None: raise StoreError(f"Upis u bazu ({self.backend}) ne uspeva: {e}") from e
+
+    def on_change(self, fn): self._listeners.append(fn)
+
+    def _sync(self): return []
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._synced < self.sync_interval: return 0
+        self._synced = now
+        # flush u toku drži _io_lock — tada se provera preskače (sledeći poziv)
+        if not self._io_lock.acquire(blocking=force): return 0
+        try: changes = self._sync()
+        except Exception:
+            # čitanje i dalje radi nad postojećim pogledom; sledeći krug pokušava ponovo
+            inc("mindmate_db_errors_total", backend=self.backend, op="sync")
+            if force: raise
+            return 0
+        finally: self._io_lock.release()
+        self._notify(changes)
+        return -1 if changes is None else len(changes)
+
+    def _notify(self, changes):
+        # van zaključavanja: slušalac sme da čita bazu
+        if changes is None:
+            inc("mindmate_db_reloads_total", backend=self.backend)
+            for fn in self._listeners: fn(None, None)
+        elif changes:
+            inc("mindmate_db_sync_records_total", len(changes), backend=self.backend)
+            for coll, rec in changes:
+                for fn in self._listeners: fn(coll, rec)
+
+    def flush(self):
+        with self._io_lock:
+            with self.lock:
+                items, self._pending = self._pending, []
+                if not items: return 0
+                view = self._snapshot()
+            try:
+                with span("mindmate_db_flush_seconds", backend=self.backend):
+                    self._write(items, view)
+                self.last_error = None
+                inc("mindmate_db_flush_records_total", len(items), backend=self.backend)
+            except Exception as e:
+                # vrati u red — sledeći krug pokušava ponovo
+                self.last_error = e
+                inc("mindmate_db_errors_total", backend=self.backend, op="flush")
+                with self.lock: self._pending[:0] = items
+                raise
+            return len(items)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self._closed and len(self._pending) < self.batch:
+                    self._wake.wait(self.interval)
+                if self._closed: return
+            try: self.flush()
+            except Exception: time.sleep(self.interval)
+
+    def close(self):
+        with self.lock:
+            if self._closed: return
+            self._closed = True
+            self._wake.notify()
+        self._writer.join(timeout=5)
+        try: self.flush()
+        except Exception as e:
+            sys.stderr.write(f"mindmate: {self.pending()} zapisa nije upisano u {self.backend} pri zatvaranju: {e}\n")
+
+# ---------- Deljeni DB u memoriji (json / journal) ----------
+# Sve sesije čitaju isti dict; upis na disk radi _WriteBehind nit.
+class SharedDB(_WriteBehind):
+    kind = "memory"
+
+    def __init__(self, store, db=None, interval_ms=FLUSH_INTERVAL_MS, batch=FLUSH_BATCH):
+        self.store = store
+        self.db = normalize_db(db if db is not None else store.load())
+        self._reindex_users()
+        self._reindex_uids()
+        super().__init__(interval_ms, batch)
+
+    def _reindex_uids(self):
+        # uid → chat_events sortirani po ts, uid → checkins po (date, ts); upiti po korisniku
+        # (istorija, pretraga, izvoz, analitika) ne skeniraju zapise svih korisnika
+        def group(coll, key):
+            by = {}
+            for r in self.db[coll]: by.setdefault(r.get("uid",""), []).append(r)
+            for lst in by.values(): lst.sort(key=key)
+            return by
+        self._chat_by_uid = group("chat_events", _ts_key)
+        self._checkins_by_uid = group("checkins", _day_key)
+
+    def _reindex_users(self):
+        # email (casefold) → pozicija u db["users"]; login/registracija su O(1)
+        self.db["users"] = dedupe_users(self.db["users"])
+        self._user_pos = {email_key(u.get("email")): i for i, u in enumerate(self.db["users"])}
+
+    def _snapshot(self):
+        # plitka kopija lista: upis na disk ne drži lock dok serijalizuje
+        return {c: list(v) for c, v in self.db.items()}
+
+    def _write(self, items, view): self.store.append_many(view, items)
+
+    @property
+    def backend(self): return self.store.kind
+
+    def _apply(self, coll, rec):
+        # poziva se pod self.lock
+        if coll == "users":
+            k = email_key(rec.get("email"))
+            i = self._user_pos.get(k)
+            if i is None: self._user_pos[k] = len(self.db["users"]); self.db["users"].append(rec)
+            else: self.db["users"][i] = rec
+        else:
+            self.db[coll].append(rec)
+            if coll in ("chat_events", "checkins"):
+                by, key = (self._chat_by_uid, _ts_key) if coll == "chat_events" else (self._checkins_by_uid, _day_key)
+                lst = by.setdefault(rec.get("uid",""), [])
+                if lst and key(lst[-1]) > key(rec): bisect.insort(lst, rec, key=key)   # zakasneo (drugi proces)
+                else: lst.append(rec)
+
+    def append(self, coll, rec):
+        with self.lock:
+            self._apply(coll, rec)
+            self._enqueue(coll, rec)
+
+    def _sync(self):
+        # pod _io_lock: nijedan flush nije u toku, pa je sve van reda već na disku
+        changes = self.store.poll()
+        if changes is None:
+            db = normalize_db(self.store.load())
+            with self.lock:
+                for coll, rec in self._pending: db[coll].append(rec)
+                self.db = db
+                self._reindex_users()
+                self._reindex_uids()
+        elif changes:
+            with self.lock:
+                for coll, rec in changes: self._apply(coll, rec)
+        return changes
+
+    def _rewrite(self, fn, tries=3):
+        # puno prepisivanje uz optimističku proveru verzije: drugi proces je u međuvremenu
+        # pisao → preuzmi njegove izmene (sync), ponovi fn nad svežim pogledom i pokušaj opet
+        for _ in range(tries):
+            with self._io_lock:
+                changes = self._sync()
+                with self.lock:
+                    out = fn()
+                    n = len(self._pending)
+                    view = self._snapshot()
+                try:
+                    self.store.save(view)
+                    with self.lock: del self._pending[:n]   # već sadržano u snapshot-u
+                    return out
+                except StoreConflict:
+                    inc("mindmate_db_conflicts_total", backend=self.backend)
+                finally:
+                    self._notify(changes)
+        raise StoreConflict(f"{self.backend}: skladište se menja brže nego što može da se prepiše")
+
+    def save(self):
+        # puno prepisivanje stanja; sve što čeka u redu je već sadržano u snapshot-u
+        self._rewrite(lambda: None)
+
+    # --- upiti ---
+    def iter_records(self, coll): return iter(list(self.db[coll]))
+
+    def find_user(self, email):
+        i = self._user_pos.get(email_key(email))
+        return None if i is None else self.db["users"][i]
+
+    def add_user(self, rec):
+        with self.lock:
+            if self.find_user(rec.get("email")) is not None: return False
+            self.append("users", rec)
+            return True
+
+    def update_user(self, email, fields):
+        # novi zapis zamenjuje stari (u memoriji na mestu; u žurnalu kao nova linija — upsert)
+        with self.lock:
+            u = self.find_user(email)
+            if u is None: return False
+            self.append("users", {**u, **fields})
+            return True
+
+    def distinct_uid_count(self):
+        uids = set([r.get("uid","") for r in self.db["checkins"]] + [r.get("uid","") for r in self.db["chat_events"]])
+        uids.discard("")
+        return len(uids)
+
+    def count_chat_events(self, role=None):
+        return sum(1 for r in self.db["chat_events"] if role is None or r.get("role")==role)
+
+    def checkins_since(self, cutoff):
+        return [r for r in self.db["checkins"] if _parse_ts(r.get("ts")) >= cutoff]
+
+    def checkins(self, uid=None):
+        if uid is None: return sorted(self.db["checkins"], key=_day_key)
+        with self.lock: return list(self._checkins_by_uid.get(uid, ()))
+
+    def latest_checkins(self, n): return self.checkins()[-n:]
+
+    def latest_summary(self, uid):
+        return next((r for r in reversed(self.db["summaries"]) if r.get("uid")==uid), None)
+
+    def chat_events(self, uid, since=None, until=None):
+        # ts kao ISO string: leksikografsko poređenje = hronološko
+        with self.lock:
+            lst = self._chat_by_uid.get(uid, [])
+            lo = 0 if since is None else bisect.bisect_left(lst, since, key=_ts_key)
+            hi = len(lst) if until is None else bisect.bisect_left(lst, until, key=_ts_key)
+            return lst[lo:hi]
+
+    def chat_page(self, uid, before=None, limit=50):
+        # najnovijih `limit` poruka sa ts < before, rastuće po ts
+        with self.lock:
+            lst = self._chat_by_uid.get(uid, [])
+            hi = len(lst) if before is None else bisect.bisect_left(lst, before, key=_ts_key)
+            return lst[max(0, hi-limit):hi]
+
+    # --- arhiviranje (mindmate_archive) ---
+    def records_before(self, coll, cutoff):
+        return [r for r in list(self.db[coll]) if r.get("ts","") < cutoff]
+
+    def delete_before(self, coll, cutoff):
+        # izbacuje stare zapise i prepisuje skladište (snapshot) — vruća baza ostaje mala
+        def drop():
+            keep = [r for r in self.db[coll] if r.get("ts","") >= cutoff]
+            removed = len(self.db[coll]) - len(keep)
+            self.db[coll] = keep
+            if coll in ("chat_events", "checkins"): self._reindex_uids()
+            return removed
+        if not any(r.get("ts","") < cutoff for r in list(self.db[coll])): return 0
+        return self._rewrite(drop)
+
+# ---------- SQLite (WAL) ----------
+SQLITE_FIELDS = {
+    "users":       ("email", "password", "created"),
+    "checkins":    ("uid", "ts", "date", "phq1", "phq2", "gad1", "gad2", "notes"),
+    "chat_events": ("uid", "ts", "role", "content", "ttft_ms", "tps"),
+    "summaries":   ("uid", "ts", "content"),
+    "crisis_events": ("uid", "ts", "terms", "mode"),
+}
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users(id INTEGER PRIMARY KEY, email TEXT NOT NULL, password TEXT, created TEXT, email_key TEXT);
+CREATE TABLE IF NOT EXISTS checkins(id INTEGER PRIMARY KEY, uid TEXT, ts TEXT, date TEXT,
+    phq1 INTEGER, phq2 INTEGER, gad1 INTEGER, gad2 INTEGER, notes TEXT);
+CREATE INDEX IF NOT EXISTS checkins_uid_date ON checkins(uid, date, ts);
+CREATE INDEX IF NOT EXISTS checkins_date_ts ON checkins(date, ts);
+CREATE INDEX IF NOT EXISTS checkins_ts ON checkins(ts);
+CREATE TABLE IF NOT EXISTS chat_events(id INTEGER PRIMARY KEY, uid TEXT, ts TEXT, role TEXT, content TEXT,
+    ttft_ms REAL, tps REAL);
+CREATE INDEX IF NOT EXISTS chat_events_uid_ts ON chat_events(uid, ts);
+CREATE INDEX IF NOT EXISTS chat_events_role ON chat_events(role);
+CREATE INDEX IF NOT EXISTS chat_events_ts ON chat_events(ts);
+CREATE TABLE IF NOT EXISTS summaries(id INTEGER PRIMARY KEY, uid TEXT, ts TEXT, content TEXT);
+CREATE INDEX IF NOT EXISTS summaries_uid ON summaries(uid, id);
+CREATE TABLE IF NOT EXISTS crisis_events(id INTEGER PRIMARY KEY, uid TEXT, ts TEXT, terms TEXT, mode TEXT);
+CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY, v INTEGER);
+INSERT OR IGNORE INTO meta(k, v) VALUES('version', 0);
+"""
+
+# kolone dodate posle prve verzije šeme — postojeće baze se dopunjuju pri otvaranju
+SQLITE_ADDED_COLUMNS = {
+    "chat_events": {"ttft_ms": "REAL", "tps": "REAL"},
+    "users": {"email_key": "TEXT"},
+}
+
+def _sqlite_init(c):
+    c.executescript(SQLITE_SCHEMA)
+    for coll, cols in SQLITE_ADDED_COLUMNS.items():
+        have = {r[1] for r in c.execute(f"PRAGMA table_info({coll})")}
+        for col, typ in cols.items():
+            if col not in have: c.execute(f"ALTER TABLE {coll} ADD COLUMN {col} {typ}")
+    # email_key = email_key(email) (casefold, kao JSON/žurnal); COLLATE NOCASE sabija samo ASCII.
+    # Stare baze: popuna ključa + zamena NOCASE indeksa
+    old = c.execute("SELECT id, email FROM users WHERE email_key IS NULL").fetchall()
+    if old:
+        with c: c.executemany("UPDATE users SET email_key=? WHERE id=?", [(email_key(e), i) for i, e in old])
+    c.execute("DROP INDEX IF EXISTS users_email")
+    try: c.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users(email_key)")
+    except sqlite3.IntegrityError:
+        # stara baza sa nalozima koji se razlikuju samo po ne-ASCII velikim slovima: važi noviji (kao upsert u JSON-u)
+        c.execute("CREATE INDEX IF NOT EXISTS users_email_key_dup ON users(email_key)")
+
+def _sqlite_row(coll, rec):
+    row = tuple(rec.get(k) for k in SQLITE_FIELDS[coll])
+    return row + (email_key(rec.get("email")),) if coll == "users" else row
+
+def _sqlite_insert(coll):
+    cols = SQLITE_FIELDS[coll] + (("email_key",) if coll == "users" else ())
+    verb = "INSERT OR IGNORE" if coll == "users" else "INSERT"
+    return f"{verb} INTO {coll}({','.join(cols)}) VALUES({','.join('?'*len(cols))})"
+
+# Više procesa: SQLite sam zaključava upise; meta.version raste u istoj transakciji sa svakim
+# upisom. Tuđi check-in/chat zapisi su redovi sa id > _seen (poslednji id koji ovaj proces zna).
+SQLITE_WATCHED = ("checkins", "chat_events")
+
+class SqliteDB(_WriteBehind):
+    kind = "sqlite"
+
+    def __init__(self, path, interval_ms=FLUSH_INTERVAL_MS, batch=FLUSH_BATCH):
+        self.path = path
+        self._tls = threading.local()
+        with self._conn() as c:
+            _sqlite_init(c)
+            self.version = c.execute("SELECT v FROM meta WHERE k='version'").fetchone()[0]
+            self._seen = {t: c.execute(f"SELECT COALESCE(MAX(id), 0) FROM {t}").fetchone()[0] for t in SQLITE_WATCHED}
+        self._inbox = []
+        super().__init__(interval_ms, batch)
+
+    def _conn(self):
+        c = getattr(self._tls, "conn", None)
+        if c is None:
+            c = self._tls.conn = sqlite3.connect(self.path, timeout=30)
+            c.row_factory = sqlite3.Row
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+        return c
+
+    def _foreign(self, c, seen):
+        # pod _io_lock: redovi drugih procesa posle poslednjeg viđenog id-a (seen se pomera)
+        out = []
+        for t in SQLITE_WATCHED:
+            cols = ",".join(SQLITE_FIELDS[t])
+            for r in c.execute(f"SELECT id,{cols} FROM {t} WHERE id>? ORDER BY id", (seen[t],)):
+                out.append((t, self._row(t, r))); seen[t] = r["id"]
+        return out
+
+    @staticmethod
+    def _bump(c):
+        # u transakciji upisa: nova verzija skladišta
+        c.execute("UPDATE meta SET v=v+1 WHERE k='version'")
+        return c.execute("SELECT v FROM meta WHERE k='version'").fetchone()[0]
+
+    def _write(self, items, view):
+        groups = {}
+        for coll, rec in items:
+            groups.setdefault(coll, []).append(_sqlite_row(coll, rec))
+        seen = dict(self._seen)
+        with span("mindmate_db_write_seconds", backend=self.kind, op="append"), self._conn() as c:  # jedna transakcija po grupi
+            c.execute("BEGIN IMMEDIATE")
+            foreign = self._foreign(c, seen)   # pre naših redova: sve sa većim id-em posle ovoga je naše
+            for coll, rows in groups.items():
+                c.executemany(_sqlite_insert(coll), rows)
+                if coll in seen: seen[coll] = c.execute(f"SELECT MAX(id) FROM {coll}").fetchone()[0]
+            version = self._bump(c)
+        self._seen, self.version = seen, version
+        self._inbox += foreign
+
+    def _sync(self):
+        v = self._conn().execute("SELECT v FROM meta WHERE k='version'").fetchone()[0]
+        if v == self.version and not self._inbox: return []
+        seen = dict(self._seen)
+        out = self._inbox + self._foreign(self._conn(), seen)
+        self._seen, self._inbox, self.version = seen, [], max(self.version, v)
+        return out
+
+    def append(self, coll, rec):
+        with self.lock: self._enqueue(coll, rec)
+
+    def save(self): self.flush()
+
+    def _q(self, sql, args=()):
+        # read-your-writes: sve iz reda mora biti u bazi pre upita
+        if self._pending: self.flush()
+        return self._conn().execute(sql, args)
+
+    @staticmethod
+    def _row(coll, r): return {k: r[k] for k in SQLITE_FIELDS[coll]}
+
+    # --- upiti ---
+    def iter_records(self, coll):
+        cols = ",".join(SQLITE_FIELDS[coll])
+        for r in self._q(f"SELECT {cols} FROM {coll} ORDER BY id"): yield self._row(coll, r)
+
+    def find_user(self, email):
+        r = self._q("SELECT email,password,created FROM users WHERE email_key=? ORDER BY id DESC LIMIT 1", (email_key(email),)).fetchone()
+        return self._row("users", r) if r else None
+
+    def add_user(self, rec):
+        if self._pending: self.flush()
+        with self._io_lock:
+            try:
+                with self._conn() as c:
+                    c.execute("BEGIN IMMEDIATE")
+                    if c.execute("SELECT 1 FROM users WHERE email_key=?", (email_key(rec.get("email")),)).fetchone(): return False
+                    c.execute("INSERT INTO users(email,password,created,email_key) VALUES(?,?,?,?)", _sqlite_row("users", rec))
+                    self._bump(c)   # self.version ostaje — sledeći sync samo proveri id-eve
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+    def update_user(self, email, fields):
+        cols = [k for k in fields if k in SQLITE_FIELDS["users"] and k != "email"]
+        if not cols: return False
+        if self._pending: self.flush()
+        with self._io_lock:
+            with self._conn() as c:
+                cur = c.execute(f"UPDATE users SET {','.join(k+'=?' for k in cols)} WHERE email_key=?",
+                                tuple(fields[k] for k in cols) + (email_key(email),))
+                self._bump(c)
+            return cur.rowcount > 0
+
+    def distinct_uid_count(self):
+        return self._q("SELECT COUNT(*) FROM (SELECT uid FROM checkins UNION SELECT uid FROM chat_events) WHERE uid<>''").fetchone()[0]
+
+    def count_chat_events(self, role=None):
+        if role is None: return self._q("SELECT COUNT(*) FROM chat_events").fetchone()[0]
+        return self._q("SELECT COUNT(*) FROM chat_events WHERE role=?", (role,)).fetchone()[0]
+
+    def checkins_since(self, cutoff):
+        cols = ",".join(SQLITE_FIELDS["checkins"])
+        return [self._row("checkins", r) for r in self._q(f"SELECT {cols} FROM checkins WHERE ts>=?", (cutoff.isoformat(),))]
+
+    def checkins(self, uid=None):
+        cols = ",".join(SQLITE_FIELDS["checkins"])
+        if uid is None: cur = self._q(f"SELECT {cols} FROM checkins ORDER BY date, ts")
+        else: cur = self._q(f"SELECT {cols} FROM checkins WHERE uid=? ORDER BY date, ts", (uid,))
+        return [self._row("checkins", r) for r in cur]
+
+    def latest_checkins(self, n):
+        cols = ",".join(SQLITE_FIELDS["checkins"])
+        rows = self._q(f"SELECT {cols} FROM checkins ORDER BY date DESC, ts DESC LIMIT ?", (n,)).fetchall()
+        return [self._row("checkins", r) for r in reversed(rows)]
+
+    def latest_summary(self, uid):
+        r = self._q("SELECT uid,ts,content FROM summaries WHERE uid=? ORDER BY id DESC LIMIT 1", (uid,)).fetchone()
+        return self._row("summaries", r) if r else None
+
+    def chat_events(self, uid, since=None, until=None):
+        cols = ",".join(SQLITE_FIELDS["chat_events"])
+        sql, args = f"SELECT {cols} FROM chat_events WHERE uid=?", [uid]
+        if since is not None: sql += " AND ts>=?"; args.append(since)
+        if until is not None: sql += " AND ts<?"; args.append(until)
+        return [self._row("chat_events", r) for r in self._q(sql + " ORDER BY ts, id", args)]
+
+    def chat_page(self, uid, before=None, limit=50):
+        cols = ",".join(SQLITE_FIELDS["chat_events"])
+        sql, args = f"SELECT {cols} FROM chat_events WHERE uid=?", [uid]
+        if before is not None: sql += " AND ts<?"; args.append(before)
+        rows = self._q(sql + " ORDER BY ts DESC, id DESC LIMIT ?", args + [limit]).fetchall()
+        return [self._row("chat_events", r) for r in reversed(rows)]
+
+    # --- arhiviranje (mindmate_archive) ---
+    def records_before(self, coll, cutoff):
+        cols = ",".join(SQLITE_FIELDS[coll])
+        return [self._row(coll, r) for r in self._q(f"SELECT {cols} FROM {coll} WHERE ts<? ORDER BY id", (cutoff,))]
+
+    def delete_before(self, coll, cutoff):
+        if self._pending: self.flush()
+        with self._io_lock:
+            with self._conn() as c:
+                n = c.execute(f"DELETE FROM {coll} WHERE ts<?", (cutoff,)).rowcount
+                self._bump(c)
+            return n
+
+    def vacuum(self):
+        # vraća prostor posle brisanja (SQLite inače samo ponovo koristi slobodne stranice)
+        with self._io_lock:
+            self._conn().execute("VACUUM")
+
+def open_db(url, loader=None):
+    # loader: opciona funkcija (store → dict) za memorijska skladišta
+    mode, path = parse_db_url(url)
+    if mode == "sqlite": return SqliteDB(path)
+    store = open_store(path, mode)
+    return SharedDB(store, loader(store) if loader else None)
+
+# ---------- Jednokratna migracija JSON/žurnal → SQLite ----------
+def migrate_to_sqlite(src_url, dst_path, batch=10000):
+    mode, path = parse_db_url(src_url)
+    if mode == "sqlite": raise ValueError("Izvor mora biti JSON ili žurnal.")
+    src = normalize_db(open_store(path, mode).load())
+    conn = sqlite3.connect(dst_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    _sqlite_init(conn)
+    counts = {}
+    try:
+        if any(conn.execute(f"SELECT 1 FROM {c} LIMIT 1").fetchone() for c in COLLECTIONS):
+            raise ValueError(f"{dst_path} već sadrži podatke — migracija se radi jednom, u praznu bazu.")
+        for coll in COLLECTIONS:
+            sql, rows = _sqlite_insert(coll), src[coll]
+            for i in range(0, len(rows), batch):
+                with conn:
+                    conn.executemany(sql, [_sqlite_row(coll, r) for r in rows[i:i+batch]])
+            counts[coll] = len(rows)
+    finally:
+        conn.close()
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="MindMate skladište")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="prebaci JSON/žurnal bazu u SQLite")
+    m.add_argument("src", help="npr. mindmate_db.json ili journal://mindmate_db.json")
+    m.add_argument("dst", help="npr. sqlite:///mindmate.db")
+    a = ap.parse_args()
+    if a.cmd == "migrate":
+        mode, dst = parse_db_url(a.dst)
+        if mode != "sqlite": ap.error("Odredište mora biti sqlite:///…")
+        try: counts = migrate_to_sqlite(a.src, dst)
+        except ValueError as e: ap.exit(1, f"{e}\n")
+        for coll, n in counts.items(): print(f"{coll}: {n}")
@@ -0,0 +1,153 @@
+# mindmate_telemetry.py — tajmeri (span), histogrami i brojači + Prometheus /metrics u pozadinskoj niti
+#   MINDMATE_METRICS_PORT=9108 streamlit run mindmate_app_v41.py   → curl 127.0.0.1:9108/metrics
+#   MINDMATE_METRICS=1 uključuje merenje bez HTTP endpoint-a (npr. za benchmark)
+# Isključeno (podrazumevano): span() vraća deljeni no-op, observe()/inc() se vraćaju odmah.
+import os, time, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_PORT = int(os.environ.get("MINDMATE_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.environ.get("MINDMATE_METRICS_HOST", "127.0.0.1")
+ENABLED = bool(METRICS_PORT) or os.environ.get("MINDMATE_METRICS", "0") in ("1", "true", "yes")
+
+LATENCY = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES   = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+SIZE    = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# ime → (tip, opis, kofe); labele se zadaju pri merenju
+METRICS = {
+    "mindmate_rerun_seconds":         ("histogram", "Trajanje cele skripte (rerun) po stranici", LATENCY),
+    "mindmate_render_seconds":        ("histogram", "Rutiranje + render_* po stranici", LATENCY),
+    "mindmate_db_load_seconds":       ("histogram", "Učitavanje baze (_init_db / store.load)", LATENCY),
+    "mindmate_db_flush_seconds":      ("histogram", "Write-behind flush jedne grupe upisa", LATENCY),
+    "mindmate_db_write_seconds":      ("histogram", "Upis na disk po operaciji skladišta", LATENCY),
+    "mindmate_db_write_bytes":        ("histogram", "Bajtova upisanih na disk po operaciji", BYTES),
+    "mindmate_db_flush_records_total":("counter",   "Zapisa upisanih kroz write-behind", None),
+    "mindmate_db_errors_total":       ("counter",   "Neuspeli upisi/učitavanja baze", None),
+    "mindmate_db_lock_wait_seconds":  ("histogram", "Čekanje na zaključavanje skladišta (između procesa)", LATENCY),
+    "mindmate_db_conflicts_total":    ("counter",   "Puno prepisivanje odbijeno jer je drugi proces pisao", None),
+    "mindmate_db_sync_records_total": ("counter",   "Zapisi drugih procesa preuzeti u pogled ovog procesa", None),
+    "mindmate_db_reloads_total":      ("counter",   "Puna ponovna učitavanja pogleda posle tuđe izmene", None),
+    "mindmate_llm_seconds":           ("histogram", "Trajanje generacije (zahtev → poslednji token)", LATENCY),
+    "mindmate_llm_ttft_seconds":      ("histogram", "Vreme do prvog tokena", LATENCY),
+    "mindmate_llm_prompt_chars":      ("histogram", "Veličina prompta u karakterima", tuple(x*4 for x in SIZE)),
+    "mindmate_llm_response_chars":    ("histogram", "Veličina odgovora u karakterima", SIZE),
+    "mindmate_llm_errors_total":      ("counter",   "Greške LLM backend-a", None),
+    "mindmate_llm_failover_total":    ("counter",   "Zahtevi prebačeni na drugi host posle greške", None),
+    "mindmate_llm_hedged_total":      ("counter",   "Zahtevi poslati i na drugi host (spor prvi token)", None),
+    "mindmate_llm_circuit_open_total":("counter",   "Isključenja hosta (circuit breaker)", None),
+    "mindmate_crisis_hits_total":     ("counter",   "Poruke sa kriznim izrazima (lokalni filter)", None),
+    "mindmate_page_errors_total":     ("counter",   "Izuzeci tokom render_*", None),
+    "mindmate_page_import_seconds":   ("histogram", "Prvi uvoz modula stranice (lazy import)", LATENCY),
+    "mindmate_archive_seconds":       ("histogram", "Jedan krug arhiviranja chat_events", LATENCY),
+}
+
+_LOCK = threading.Lock()
+_DATA = {}         # ime → {labele(tuple) → [kofe..., sum, count] | broj}
+_COLLECTORS = []   # fn() → [(ime, tip, opis, {labele}, vrednost)] — gauge-ovi očitani pri scrape-u
+
+def _key(labels): return tuple(sorted(labels.items()))
+
+def observe(name, value, **labels):
+    if not ENABLED: return
+    _, _, buckets = METRICS[name]
+    k = _key(labels)
+    with _LOCK:
+        series = _DATA.setdefault(name, {})
+        h = series.get(k)
+        if h is None: h = series[k] = [0]*(len(buckets)+2)
+        for i, b in enumerate(buckets):
+            if value <= b: h[i] += 1; break
+        h[-2] += value; h[-1] += 1
+
+def inc(name, n=1, **labels):
+    if not ENABLED: return
+    k = _key(labels)
+    with _LOCK:
+        series = _DATA.setdefault(name, {})
+        series[k] = series.get(k, 0) + n
+
+class _Span:
+    __slots__ = ("name", "labels", "t0", "error")
+    def __init__(self, name, labels, error):
+        self.name, self.labels, self.error = name, labels, error
+    def __enter__(self):
+        self.t0 = time.perf_counter(); return self
+    def __exit__(self, et, ev, tb):
+        observe(self.name, time.perf_counter()-self.t0, **self.labels)
+        # BaseException (npr. Streamlit rerun/stop) nije greška
+        if self.error and et is not None and issubclass(et, Exception): inc(self.error, **self.labels)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, et, ev, tb): return False
+
+_NOOP = _NoSpan()
+
+def span(name, error=None, **labels):
+    # with span("mindmate_db_write_seconds", backend="journal"): …
+    return _Span(name, labels, error) if ENABLED else _NOOP
+
+def add_collector(fn):
+    if ENABLED: _COLLECTORS.append(fn)
+
+# ---------- Prometheus text format (0.0.4) ----------
+def _esc(v): return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+def _num(v): return repr(float(v)) if isinstance(v, float) else str(v)
+
+def render():
+    out = []
+    with _LOCK:
+        data = {n: {k: (list(v) if isinstance(v, list) else v) for k, v in s.items()} for n, s in _DATA.items()}
+    for name in sorted(data):
+        kind, help_, buckets = METRICS[name]
+        out += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"]
+        for k, v in sorted(data[name].items()):
+            if kind == "counter":
+                out.append(f"{name}{_labels(k)} {_num(v)}"); continue
+            acc = 0
+            for b, c in zip(buckets, v):
+                acc += c; out.append(f"{name}_bucket{_labels(k, [('le', _num(b))])} {acc}")
+            out.append(f"{name}_bucket{_labels(k, [('le', '+Inf')])} {v[-1]}")
+            out.append(f"{name}_sum{_labels(k)} {_num(v[-2])}")
+            out.append(f"{name}_count{_labels(k)} {v[-1]}")
+    families = {}   # uzorci iste metrike moraju biti zajedno
+    for fn in list(_COLLECTORS):
+        try: samples = fn()
+        except Exception: continue
+        for name, kind, help_, labels, value in samples:
+            fam = families.setdefault(name, [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"])
+            fam.append(f"{name}{_labels(sorted(labels.items()))} {_num(value)}")
+    for fam in families.values(): out += fam
+    return "\n".join(out) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *a): pass
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404); self.send_header("Content-Length", "0"); self.end_headers(); return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+_SERVER = None
+
+def start_exporter(port=METRICS_PORT, host=METRICS_HOST):
+    # jedan /metrics server po procesu; bez porta (ili zauzet port) → None
+    global _SERVER
+    if not port: return None
+    with _LOCK:
+        if _SERVER is None:
+            try: _SERVER = ThreadingHTTPServer((host, port), _Handler)
+            except OSError: return None
+            _SERVER.daemon_threads = True
+            threading.Thread(target=_SERVER.serve_forever, name="mindmate-metrics", daemon=True).start()
+        return _SERVER
@@ -0,0 +1,53 @@
+// MindMate navbar: aktivni link + indikator, hamburger meni, senka pri skrolu
+(function(){
+  const bar = document.getElementById('mmBar');
+  const toggle = document.getElementById('mmToggle');
+  const menu = document.getElementById('mmMenu');
+  const linksWrap = document.getElementById('mmLinks');
+  const indicator = document.getElementById('mmIndicator');
+  const links = [...document.querySelectorAll('.mm-link')];
+  const onScroll = () => bar.classList.toggle('scrolled', window.scrollY > 8);
+  onScroll(); addEventListener('scroll', onScroll, {passive:true});
+  const qs = new URLSearchParams(location.search);
+  const key = ['landing','home','chat','checkin','analytics','search','login','register'].find(k => qs.has(k)) || 'landing';
+  const active = links.find(a => a.dataset.page === key) || links[0];
+  active.classList.add('is-active');
+  function moveIndicator(el){
+    if(!el || !indicator) return;
+    const r = el.getBoundingClientRect();
+    const rw = linksWrap.getBoundingClientRect();
+    indicator.style.opacity = '1';
+    indicator.style.width = r.width + 'px';
+    indicator.style.transform = `translateX(${r.left - rw.left}px)`;
+  }
+  moveIndicator(active);
+  links.forEach(a=>{
+    a.addEventListener('mouseenter', ()=> moveIndicator(a));
+    a.addEventListener('focus', ()=> moveIndicator(a));
+    a.addEventListener('click', ()=>{
+      links.forEach(l=>l.classList.remove('is-active'));
+      a.classList.add('is-active'); moveIndicator(a);
+      if(menu.classList.contains('open')) setMenu(false);
+    });
+  });
+  linksWrap.addEventListener('mouseleave', ()=> moveIndicator(document.querySelector('.mm-link.is-active')));
+  function setMenu(open){
+    menu.classList.toggle('open', open);
+    toggle.setAttribute('aria-expanded', open);
+    const [a,b,c] = toggle.querySelectorAll('span');
+    if(open){
+      a.style.transform = 'translateY(7px) rotate(45deg)';
+      b.style.opacity = '0';
+      c.style.transform = 'translateY(-7px) rotate(-45deg)';
+    }else{
+      a.style.transform = ''; b.style.opacity = ''; c.style.transform = '';
+    }
+  }
+  toggle?.addEventListener('click', ()=> setMenu(!menu.classList.contains('open')));
+  menu?.addEventListener('click', e => { if(e.target.closest('a')) setMenu(false); });
+  addEventListener('keydown', e => { if(e.key==='Escape' && menu.classList.contains('open')) setMenu(false); });
+  let rAF=null; addEventListener('resize', ()=>{
+    cancelAnimationFrame(rAF);
+    rAF=requestAnimationFrame(()=>moveIndicator(document.querySelector('.mm-link.is-active')||active));
+  });
+})();
@@ -0,0 +1,3 @@
+# moduli aplikacije su ravni fajlovi u korenu repozitorijuma
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
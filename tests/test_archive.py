@@ -0,0 +1,21 @@
+import threading
+from mindmate_archive import ChatArchive
+
+def rows(tag, n):
+    return [{"uid": f"u{i%5}", "ts": f"2025-0{1+i%2}-{1+i%28:02d}T10:00:{i%60:02d}.{i:06d}", "role": "user",
+             "content": f"{tag} {i}"} for i in range(n)]
+
+def test_two_instances_on_one_dir_lose_nothing(tmp_path):
+    # dva „procesa” (odvojeni StoreLock fd-ovi) naizmenično dopisuju i kompaktuju iste segmente
+    a, b = ChatArchive(str(tmp_path / "arch")), ChatArchive(str(tmp_path / "arch"))
+    def work(ar, tag):
+        for k in range(15):
+            ar.add(rows(f"{tag}{k}", 20))
+            if k % 4 == 3: ar.compact()
+    ts = [threading.Thread(target=work, args=(ar, t)) for ar, t in ((a, "a"), (b, "b"))]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    want = sorted(r["content"] for t in "ab" for k in range(15) for r in rows(f"{t}{k}", 20))
+    for ar in (a, b):
+        assert sorted(r["content"] for r in ar.iter_all()) == want
+        assert sum(s["count"] for s in ar.stats()) == len(want)
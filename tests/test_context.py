@@ -0,0 +1,30 @@
+import pytest
+from mindmate_context import ContextManager
+
+LOG = [("user" if i % 2 == 0 else "assistant", f"poruka broj {i} " * 20) for i in range(40)]
+
+def fold(cm, uid="u1"):
+    st = cm._state(uid, "s1")
+    cm._fold(uid, st, st.summary, LOG[:10], 10, "s1")
+    return st
+
+@pytest.mark.parametrize("reply", ["[Nijedan LLM host trenutno nije dostupan.]", "[OPENAI_API_KEY nije postavljen]",
+                                   "[Greška LLM: timeout]", "", "   "])
+def test_backend_error_text_is_not_a_summary(reply):
+    saved = []
+    cm = ContextManager(lambda msgs: reply, persist=lambda uid, t: saved.append(t), budget=300)
+    st = fold(cm)
+    assert st.summary == "" and st.covered == 0 and saved == []
+
+def test_summarizer_exception_keeps_previous_summary():
+    def boom(msgs): raise ConnectionError("host pao")
+    cm = ContextManager(boom, load_summary=lambda uid: "stari sažetak", budget=300)
+    with pytest.raises(ConnectionError): fold(cm)
+    assert cm.summary("u1") == "stari sažetak" and not cm._states["u1"].busy
+
+def test_real_summary_is_stored_and_error_text_is_not_loaded():
+    saved = []
+    cm = ContextManager(lambda msgs: "Korisnik loše spava [posao].", persist=lambda uid, t: saved.append(t), budget=300)
+    assert fold(cm).summary == saved[0] == "Korisnik loše spava [posao]."
+    cm2 = ContextManager(lambda msgs: "", load_summary=lambda uid: "[Greška Ollama: 500]")
+    assert cm2._state("u2", "s").summary == ""
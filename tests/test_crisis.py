@@ -0,0 +1,24 @@
+import pytest
+from mindmate_crisis import scan, normalize
+
+CRISIS = [
+    "Hoću da se ubijem", "hocu da se ubijem", "Želim da se ubijem.", "zelim se ubiti",
+    "Ubiću se ako ovo potraje", "mislim da ću se ubiti", "Ubio bih se", "ne znam, bih se ubila",
+    "Хоћу да се убијем", "ne želim više da živim", "ne zelim vise da zivim", "razmišljam o samoubistvu",
+    "sečem se kad sam tužna", "opet sam se sekla... se sečem", "hoću da se obesim",
+    "želim da umrem", "I want to kill myself", "thinking about SUICIDE",
+]
+SAFE = [
+    "", "Danas sam umoran, ali ok", "Ubili su me ispiti ove nedelje", "Sečem luk za ručak",
+    "Pročitao sam knjigu o ubistvu", "ne daj se obeshrabriti", "gledao sam film o Hitnoj pomoći",
+]
+
+@pytest.mark.parametrize("text", CRISIS)
+def test_crisis_phrases(text): assert scan(text), text
+
+@pytest.mark.parametrize("text", SAFE)
+def test_ordinary_phrases(text): assert scan(text) == [], text
+
+def test_normalize_folds_script_and_diacritics():
+    assert normalize("Хоћу ДА се убијем!") == normalize("hoću da se ubijem") == "hocu da se ubijem"
+    assert normalize("Đorđe  žuri") == "djordje zuri"
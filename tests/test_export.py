@@ -0,0 +1,57 @@
+import io, csv, json
+import pytest
+from mindmate_store import open_db
+from mindmate_export import user_records, all_records, iter_store, to_ndjson, to_csv, read_ndjson, import_records, CSV_FIELDS
+
+SCHEMES = ("json://{d}/{n}.json", "journal://{d}/{n}.json", "sqlite:///{d}/{n}.sqlite")
+
+def records():
+    out = []
+    for i in range(120):
+        uid, ts = f"u{i%4}", f"2025-{1+i%12:02d}-{1+i%28:02d}T10:{i%60:02d}:00.{i:06d}"
+        if i % 3 == 0:
+            out.append(("checkins", {"uid": uid, "ts": ts, "date": ts[:10], "phq1": i%4, "phq2": 1, "gad1": 0, "gad2": 2,
+                                     "notes": f"san \"{i}\", č\nnovi red"}))
+        else:
+            out.append(("chat_events", {"uid": uid, "ts": ts, "role": "user" if i % 2 else "assistant", "content": f"poruka {i} ć"}))
+    out += [("summaries", {"uid": "u0", "ts": "2025-05-01T00:00:00", "content": "sažetak"}),
+            ("crisis_events", {"uid": "u0", "ts": "2025-05-01T00:00:00", "terms": "x", "mode": "inline"}),
+            ("users", {"email": "Ana@x.rs", "password": "hash", "created": "2025-01-01"})]
+    return out
+
+def norm(pairs):
+    # SQLite vraća sve kolone (nepostojeće kao None) — porede se samo postavljena polja
+    return sorted(json.dumps([c, {k: v for k, v in r.items() if v is not None}], sort_keys=True, ensure_ascii=False) for c, r in pairs)
+
+def make(tmp_path, scheme, name="src"):
+    url = scheme.format(d=tmp_path, n=name)
+    db = open_db(url)
+    for coll, rec in records(): db.append(coll, rec)
+    db.flush(); db.close()
+    return url
+
+@pytest.mark.parametrize("scheme", SCHEMES)
+def test_user_export_has_only_that_user(tmp_path, scheme):
+    url = make(tmp_path, scheme)
+    lines = [json.loads(l) for l in to_ndjson(user_records(url, "u0", "ana@X.rs"))]
+    got = [(d.pop("_coll"), d) for d in lines]
+    want = [(c, r) for c, r in records() if r.get("uid") == "u0"]
+    assert norm([x for x in got if x[0] != "users"]) == norm(want)
+    assert [r for c, r in got if c == "users"] == [{"email": "Ana@x.rs", "created": "2025-01-01"}]   # bez lozinke
+
+@pytest.mark.parametrize("src", SCHEMES)
+@pytest.mark.parametrize("dst", SCHEMES)
+def test_full_dump_import_roundtrip(tmp_path, src, dst):
+    url = make(tmp_path, src)
+    dump = "".join(to_ndjson(all_records(url)))
+    target = dst.format(d=tmp_path, n="dst")
+    counts = import_records(target, read_ndjson(io.StringIO(dump)), batch=16)
+    assert sum(counts.values()) == len(records())
+    assert norm(iter_store(target)) == norm(iter_store(url)) == norm(records())
+
+def test_csv_export(tmp_path):
+    url = make(tmp_path, SCHEMES[1])
+    rows = list(csv.DictReader(io.StringIO("".join(to_csv(user_records(url, "u1"))))))
+    assert rows and set(rows[0]) == set(CSV_FIELDS)
+    assert len(rows) == sum(1 for _, r in records() if r.get("uid") == "u1")
+    assert all(r["uid"] == "u1" and "password" not in r for r in rows)
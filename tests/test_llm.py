@@ -0,0 +1,21 @@
+import pytest
+import mindmate_llm as llm
+from mindmate_mockllm import MockConfig, start
+
+M = [{"role": "system", "content": "kratko"}, {"role": "user", "content": "zdravo"}]
+
+@pytest.fixture
+def generate_only():
+    srv = start(cfg=MockConfig(ttft_ms=0, tps=0, tokens=5, jitter=0, generate_only=True))
+    host = f"http://127.0.0.1:{srv.server_port}"
+    llm._OLLAMA_CAPS.pop(host, None)
+    yield host, srv.cfg
+    srv.shutdown(); srv.server_close()
+
+@pytest.mark.parametrize("session", [None, "u1:s1"])
+def test_generate_only_host_gets_one_404_per_process(generate_only, session, monkeypatch):
+    host, cfg = generate_only
+    monkeypatch.setattr(llm, "OLLAMA_CONTEXT_MODE", "0")      # i bez KV konteksta (npr. sažimanje bez sesije)
+    for _ in range(4):
+        assert "".join(llm.stream_ollama(M, {}, session=session, host=host)).strip()
+    assert cfg.stats()["requests"] == {"/api/chat": 1, "/api/generate": 4}
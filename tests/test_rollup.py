@@ -0,0 +1,77 @@
+import json, random
+from datetime import date, datetime, timedelta
+import pytest
+from mindmate_rollup import CheckinRollups, RollupStore, read_snapshot, bucket, pick_grain, GRAINS, PARTS, ALL
+
+def records(n, seed=7):
+    rng, out = random.Random(seed), []
+    for i in range(n):
+        d = (date(2024, 1, 1) + timedelta(days=rng.randrange(500))).isoformat()
+        v = [rng.randint(0, 3) for _ in PARTS]
+        out.append({"uid": f"u{rng.randrange(6)}", "ts": f"{d}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00.{i:06d}",
+                    "date": d, **dict(zip(PARTS, v)), "notes": ""})
+    return out
+
+def naive(rows, uid, grain, since=None):
+    # obična rekonstrukcija: grupisanje sirovih zapisa po kofi
+    groups = {}
+    for r in rows:
+        if uid != ALL and r["uid"] != uid: continue
+        b = bucket(r["date"], grain)
+        if since and b < bucket(since, grain): continue
+        groups.setdefault(b, []).append(r)
+    out = []
+    for b in sorted(groups):
+        g, tot = groups[b], [sum(r[k] for k in PARTS) for r in groups[b]]
+        out.append({"bucket": b, "n": len(g), "mean": sum(tot)/len(g), "min": min(tot), "max": max(tot),
+                    **{k: sum(r[k] for r in g)/len(g) for k in PARTS}})
+    return out
+
+def same(ro, rows, since=None):
+    return all(ro.series(uid, g, since) == pytest.approx(naive(rows, uid, g, since))
+               for g in GRAINS for uid in [ALL] + [f"u{i}" for i in range(6)])
+
+def test_totals_match_plain_recomputation():
+    rows = records(2000)
+    ro = CheckinRollups(); ro.build(rows)
+    assert same(ro, rows) and same(ro, rows, since="2024-09-15")
+    assert ro.series(ALL, "day", last=5) == ro.series(ALL, "day")[-5:]
+    hours = [0]*24
+    for r in rows: hours[int(r["ts"][11:13])] += 1
+    assert ro.hours_of(ALL) == hours
+
+def test_same_record_counted_once():
+    rows = sorted(records(300), key=lambda r: r["ts"])
+    ro = CheckinRollups(); ro.build(rows); ro.build(rows[-50:])
+    assert same(ro, rows)
+
+def test_snapshot_roundtrip_and_replay():
+    rows = sorted(records(1500), key=lambda r: r["ts"])
+    # nekoliko zapisa par minuta pre granice snimka — ulaze u tail i ponovo stižu pri dopuni
+    edge = datetime.fromisoformat(rows[999]["ts"])
+    rows[995:1000] = [{**rows[995+i], "uid": "u1", "date": rows[999]["date"],
+                       "ts": (edge - timedelta(minutes=5-i)).isoformat()} for i in range(5)]
+    rows.sort(key=lambda r: r["ts"])
+    ro = CheckinRollups(); ro.build(rows[:1000])
+    back = CheckinRollups.restore(json.loads(ro.dump()))
+    assert back.tables == ro.tables and back.hours == ro.hours
+    replay = [r for r in rows if r["ts"] >= back._cut]          # kao RollupStore._catch_up
+    assert len(replay) > 500
+    back.build(replay)                     # preklapanje sa snimkom se ne broji dvaput
+    assert same(back, rows)
+    ro.build(rows[1000:1200])              # inkrementalan snimak: samo izmenjeni uid-ovi se ponovo serijalizuju
+    assert CheckinRollups.restore(json.loads(ro.dump())).tables == ro.tables
+
+def test_store_loads_snapshot_and_catches_up(tmp_path):
+    class DB:
+        def __init__(self, rows): self.rows = rows
+        def iter_records(self, coll): return iter(list(self.rows))
+    rows = sorted(records(800), key=lambda r: r["ts"])
+    path = str(tmp_path / "db.rollup.json.gz")
+    first = RollupStore(path); first.get(DB(rows[:600]))
+    assert read_snapshot(path).tables == first.current.tables
+    second = RollupStore(path)
+    assert same(second.get(DB(rows)), rows)
+
+def test_pick_grain_keeps_enough_points():
+    assert pick_grain(7) == "day" and pick_grain(90) == "week" and pick_grain(1000) == "month"
@@ -0,0 +1,29 @@
+import time, threading
+from mindmate_router import Backend, LLMRouter
+
+def slow_backend(closed):
+    # čeka prvi token dok ga ruter ne prekine (attempt.attach → zatvaranje „konekcije”)
+    def stream(messages, stats, session, attempt):
+        gone = threading.Event()
+        attempt.attach(lambda: (closed.set(), gone.set()))
+        if gone.wait(5): raise ConnectionError("zatvoreno")
+        yield "kasno"
+    return Backend("slow", "ollama", stream)
+
+def fast_backend():
+    def stream(messages, stats, session, attempt):
+        time.sleep(0.02)
+        yield from ("brz ", "odgovor")
+    return Backend("fast", "ollama", stream)
+
+def test_losing_hedge_is_closed_and_frees_its_slot():
+    closed = threading.Event()
+    slow, fast = slow_backend(closed), fast_backend()
+    router = LLMRouter([slow, fast], hedge_ms=30, health_s=0)
+    stats = {}
+    t0 = time.monotonic()
+    assert "".join(router.stream([], stats)) == "brz odgovor"
+    assert stats["backend"] == "fast" and time.monotonic() - t0 < 1
+    assert closed.wait(1)                          # poraženi ne čeka svoj prvi token
+    assert slow.inflight == 0 and fast.inflight == 0
+    assert slow.errors == 0                        # prekid nije greška hosta
@@ -0,0 +1,29 @@
+import os, time, threading
+import mindmate_search
+from mindmate_search import SearchIndex
+
+def rows(n, uid="u1"):
+    return [("chat_events", {"uid": uid, "ts": f"2025-02-{1+i%28:02d}T09:{i%60:02d}:00.{i:06d}", "role": "user",
+                             "content": f"loše spavam {i}" if i % 2 else f"Сан и умор {i}"}) for i in range(n)]
+
+def wait_idle(ix, uid):
+    for _ in range(200):
+        with ix._lock:
+            if uid not in ix._persisting: return
+        time.sleep(0.01)
+
+def test_search_persists_snapshot_off_the_calling_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(mindmate_search, "SEARCH_PERSIST", 5)
+    data, seen, writers = rows(40), [], []
+    ix = SearchIndex(str(tmp_path / "s"), lambda uid, since: (seen.append(since), iter(data))[1])
+    real = SearchIndex.persist
+    monkeypatch.setattr(SearchIndex, "persist", lambda self, uid, u: (writers.append(threading.current_thread()), real(self, uid, u))[1])
+    assert len(ix.search("u1", "san", limit=100)) == 20 and len(ix.search("u1", "spav*", limit=100)) == 20
+    wait_idle(ix, "u1")
+    for coll, rec in rows(60)[40:]: ix.observe(coll, rec)
+    assert len(ix.search("u1", "spavam", limit=100)) == 30
+    wait_idle(ix, "u1")
+    assert writers and threading.current_thread() not in writers     # search() na niti stranice samo čita
+    assert os.path.exists(ix._path("u1")) and ix.get("u1").dirty == 0
+    again = SearchIndex(str(tmp_path / "s"), lambda uid, since: (seen.append(since), iter(()))[1])
+    assert len(again.search("u1", "san", limit=100)) == 30 and seen[-1] is not None   # iz snimka, dopuna od wm
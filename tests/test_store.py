@@ -0,0 +1,91 @@
+import os, glob
+import pytest
+from mindmate_store import JournalStore, COLLECTIONS, open_db
+from mindmate_core import uid_for_email
+
+def recs(n, uid="u1"):
+    return [("checkins", {"uid": uid, "ts": f"2025-01-{1+i%28:02d}T10:00:{i%60:02d}", "date": f"2025-01-{1+i%28:02d}",
+                          "phq1": i%4, "phq2": 1, "gad1": 0, "gad2": 2, "notes": f"beleška {i} č\n"}) for i in range(n)]
+
+def journals(path): return glob.glob(os.path.splitext(str(path))[0] + ".*.ndjson")
+
+def test_journal_roundtrip_and_user_upsert(tmp_path):
+    p = str(tmp_path / "db.json")
+    st = JournalStore(p, fsync=False, compact_min_bytes=1 << 30)
+    st.load()
+    items = recs(50) + [("chat_events", {"uid": "u1", "ts": "2025-01-01T10:00:00", "role": "user", "content": "zdravo"}),
+                        ("users", {"email": "Ana@x.rs", "password": "h1", "created": "c"}),
+                        ("users", {"email": "ana@x.rs", "password": "h2", "created": "c"})]
+    st.append_many(None, items)
+    db = JournalStore(p).load()
+    assert db["checkins"] == [r for c, r in items if c == "checkins"]
+    assert [u["password"] for u in db["users"]] == ["h2"]          # kasniji zapis istog email-a zamenjuje raniji
+    assert len(db["chat_events"]) == 1 and set(db) == set(COLLECTIONS)
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    p = str(tmp_path / "db.json")
+    st = JournalStore(p, fsync=False, compact_min_bytes=1 << 30)
+    st.load()
+    st.append_many(None, recs(30))
+    before = JournalStore(p).load()
+    st.compact()
+    assert journals(p) == [] and os.path.exists(p)
+    st.append_many(None, recs(5, "u2"))                             # nova generacija žurnala posle snimka
+    after = JournalStore(p).load()
+    assert after["checkins"] == before["checkins"] + [r for _, r in recs(5, "u2")]
+
+def test_compaction_triggers_on_size(tmp_path):
+    p = str(tmp_path / "db.json")
+    st = JournalStore(p, fsync=False, compact_min_bytes=2000)
+    st.load()
+    for i in range(20): st.append_many(None, recs(5, f"u{i}"))
+    assert st.gen > 0
+    assert len(JournalStore(p).load()["checkins"]) == 100
+
+def test_torn_tail_is_dropped(tmp_path):
+    p = str(tmp_path / "db.json")
+    st = JournalStore(p, fsync=False, compact_min_bytes=1 << 30)
+    st.load()
+    st.append_many(None, recs(3))
+    (j,) = journals(p)
+    with open(j, "ab") as f: f.write(b'{"uid": "u1", "ts": "2025-02')   # pad usred upisa
+    db = JournalStore(p).load()
+    assert len(db["checkins"]) == 3
+    with open(j, "rb") as f: assert f.read().endswith(b"\n")
+
+def test_poll_sees_other_process_and_reload_after_compaction(tmp_path):
+    p = str(tmp_path / "db.json")
+    a, b = JournalStore(p, fsync=False, compact_min_bytes=1 << 30), JournalStore(p, fsync=False, compact_min_bytes=1 << 30)
+    a.load(); b.load()
+    assert b.poll() == []
+    a.append_many(None, recs(4))
+    assert [r for _, r in b.poll()] == [r for _, r in recs(4)]
+    a.compact()
+    assert b.poll() is None                                         # nova generacija → pun reload
+    assert len(b.load()["checkins"]) == 4
+
+@pytest.mark.parametrize("scheme", ("json://{d}/db.json", "journal://{d}/db.json", "sqlite:///{d}/db.sqlite"))
+def test_email_lookup_casefolds_non_ascii(tmp_path, scheme):
+    db = open_db(scheme.format(d=tmp_path))
+    assert db.add_user({"email": "Đorđe@x.rs", "password": "h", "created": "c"})
+    assert not db.add_user({"email": "ĐORĐE@x.rs", "password": "h2", "created": "c"})
+    assert db.find_user(" đorđe@X.rs ")["password"] == "h"
+    assert db.update_user("đORĐE@x.rs", {"password": "h3"}) and db.find_user("Đorđe@x.rs")["password"] == "h3"
+    assert db.add_user({"email": "Straße@x.rs", "password": "s", "created": "c"})
+    assert not db.add_user({"email": "STRASSE@x.rs", "password": "s2", "created": "c"})     # ß → ss
+    assert db.find_user("strasse@X.RS")["email"] == "Straße@x.rs"
+    db.close()
+    assert uid_for_email("Straße@x.rs") == uid_for_email(" STRASSE@x.rs") == uid_for_email("strasse@x.rs")
+    assert uid_for_email("Đorđe@x.rs") == uid_for_email("ĐORĐE@X.RS")
+
+def test_checkins_by_uid_sorted_and_kept_current(tmp_path):
+    db = open_db(f"json://{tmp_path}/db.json")
+    rows = [{"uid": f"u{i%3}", "date": f"2025-03-{28-i%27:02d}", "ts": f"2025-03-{28-i%27:02d}T08:{i%60:02d}:00"} for i in range(90)]
+    for r in rows: db.append("checkins", r)
+    late = {"uid": "u1", "date": "2025-01-01", "ts": "2025-01-01T00:00:00"}    # stariji datum stiže poslednji
+    db.append("checkins", late)
+    for u in ("u0", "u1", "u2"):
+        want = sorted([r for r in rows + [late] if r["uid"] == u], key=lambda r: (r["date"], r["ts"]))
+        assert db.checkins(u) == want
+    assert db.checkins("nema") == []
+    db.close()